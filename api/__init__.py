@@ -1,15 +1,27 @@
 from flask import Flask
 import os
 
+from sdk.analytics.dashboard import DASHBOARD_SNAPSHOT_PATH, cfg
 
-def create_app():
+
+def create_app(test_config=None):
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_mapping(
-        SECRET_KEY='dev'
+        SECRET_KEY='dev',
+        DASHBOARD_SNAPSHOT_PATH=DASHBOARD_SNAPSHOT_PATH,
+        DASHBOARD_CACHE_TTL=cfg['DASHBOARD_CACHE_TTL'],
     )
+    if test_config is not None:
+        app.config.from_mapping(test_config)
     try:
         os.makedirs(app.instance_path)
     except OSError:
         pass
 
+    from api import dashboard
+    app.extensions['dashboard_cache'] = dashboard.SnapshotCache(
+        app.config['DASHBOARD_SNAPSHOT_PATH'], ttl=app.config['DASHBOARD_CACHE_TTL']
+    )
+    app.register_blueprint(dashboard.bp)
+
     return app
@@ -0,0 +1,174 @@
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from sdk.analytics.dashboard import (
+    DashboardSnapshot,
+    equity_key,
+    holdings_key,
+    indicators_key,
+    portfolios_key,
+)
+
+bp = Blueprint("dashboard", __name__, url_prefix="/api")
+
+
+class CachedPayload:
+    def __init__(self, body: bytes, etag: str, expires: float):
+        """
+        :param body: gzip-compressed JSON.
+        :param etag: digest of body.
+        :param expires: monotonic time after which the entry is re-read from the snapshot.
+        """
+        self.body = body
+        self.etag = etag
+        self.expires = expires
+        self._identity: Optional[bytes] = None
+
+    @property
+    def identity(self) -> bytes:
+        """
+        :return: uncompressed JSON, for the rare client that doesn't accept gzip.
+        """
+        if self._identity is None:
+            self._identity = gzip.decompress(self.body)
+        return self._identity
+
+    def __repr__(self):
+        return "CachedPayload<body, etag, expires>"
+
+
+class SnapshotCache:
+    """
+    In-process TTL + LRU cache over the current dashboard snapshot. Requests are served from memory; the snapshot
+    manifest is checked at most once per ttl, and a rebuilt snapshot drops every cached payload.
+    """
+
+    def __init__(self, path: str, ttl: float = 60.0, max_entries: int = 4_096):
+        """
+        :param path: snapshot root directory.
+        :param ttl: seconds a payload (and the manifest check) is trusted before going back to disk.
+        :param max_entries: payloads kept in memory.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedPayload]" = OrderedDict()
+        self._snapshot: Optional[DashboardSnapshot] = None
+        self._manifest_mtime: Optional[float] = None
+        self._checked = float("-inf")
+
+    def snapshot(self) -> Optional[DashboardSnapshot]:
+        """
+        :return: the current snapshot (None if none has been built).
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked < self.ttl:
+                return self._snapshot
+            self._checked = now
+            mtime = DashboardSnapshot.manifest_mtime(self.path)
+            if mtime != self._manifest_mtime:
+                self._snapshot = DashboardSnapshot(self.path) if mtime else None
+                self._manifest_mtime = mtime
+                self._entries.clear()
+            return self._snapshot
+
+    def get(self, key: str) -> Optional[CachedPayload]:
+        """
+        :return: cached payload for key (None if the snapshot has no such payload).
+        """
+        snapshot = self.snapshot()
+        if snapshot is None or key not in snapshot:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > now:
+                self._entries.move_to_end(key)
+                return entry
+        entry = CachedPayload(snapshot.read(key), snapshot.etag(key), now + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._snapshot = None
+            self._manifest_mtime = None
+            self._checked = float("-inf")
+
+    def __repr__(self):
+        return "SnapshotCache<path, ttl, max_entries>"
+
+
+def _cache() -> SnapshotCache:
+    return current_app.extensions["dashboard_cache"]
+
+
+def _respond(key: str) -> Response:
+    """
+    Serve a precomputed payload: 304 when the client's ETag / Last-Modified is current, gzip bytes as stored
+    when the client accepts them.
+    """
+    cache = _cache()
+    entry = cache.get(key)
+    if entry is None:
+        if cache.snapshot() is None:
+            abort(503, description="No dashboard snapshot has been built yet.")
+        abort(404)
+    gzipped = "gzip" in request.accept_encodings
+    response = Response(
+        entry.body if gzipped else entry.identity, mimetype="application/json"
+    )
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.set_etag(entry.etag if gzipped else f"{entry.etag}-identity")
+    response.last_modified = cache.snapshot().built_at
+    response.cache_control.public = True
+    response.cache_control.max_age = int(cache.ttl)
+    return response.make_conditional(request)
+
+
+@bp.route("/portfolios")
+def portfolios():
+    return _respond(portfolios_key())
+
+
+@bp.route("/portfolios/<name>/holdings")
+def holdings(name: str):
+    return _respond(holdings_key(name))
+
+
+@bp.route("/portfolios/<name>/equity")
+def equity(name: str):
+    return _respond(equity_key(name))
+
+
+@bp.route("/indicators/<symbol>")
+def indicators(symbol: str):
+    try:
+        key = indicators_key(symbol)
+    except ValueError as err:
+        abort(400, description=str(err))
+    return _respond(key)
+
+
+@bp.route("/snapshot")
+def snapshot():
+    current = _cache().snapshot()
+    if current is None:
+        abort(503, description="No dashboard snapshot has been built yet.")
+    return jsonify(
+        version=current.version,
+        built_at=current.built_at.isoformat(),
+        payloads=len(current.entries),
+    )
@@ -0,0 +1,333 @@
+import gzip
+import hashlib
+import json
+import math
+import os
+import pathlib
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.analytics.valuation import PortfolioValuation
+from sdk.data import models
+from sdk.data.panel import get_panel
+from sdk.data.storage import get_store
+from sdk.entities.portfolio import Portfolio
+from sdk.factors.panel_indicators import PanelIndicators
+from sdk.misc.utils import load_cfg, normalize_symbol, timed
+
+module_path = pathlib.Path(__file__).parent.resolve()
+cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
+DASHBOARD_SNAPSHOT_PATH = os.path.join(
+    module_path, "..", "data", cfg["DASHBOARD_SNAPSHOT_PATH"]
+)
+
+_MANIFEST_FILE = "CURRENT.json"
+# indicator series published per symbol: name -> (PanelIndicators method, window)
+DASHBOARD_INDICATORS = {
+    "sma_50": ("sma", 50),
+    "ema_20": ("ema", 20),
+    "volatility_21": ("rolling_std", 21),
+}
+
+
+def portfolios_key() -> str:
+    return "portfolios"
+
+
+def holdings_key(portfolio: str) -> str:
+    return f"portfolios/{portfolio}/holdings"
+
+
+def equity_key(portfolio: str) -> str:
+    return f"portfolios/{portfolio}/equity"
+
+
+def indicators_key(symbol: str) -> str:
+    return f"indicators/{normalize_symbol(symbol)}"
+
+
+def _column(values: np.ndarray, decimals: int) -> List[Optional[float]]:
+    """
+    :return: values rounded for transport, with NaN as null (JSON has no NaN).
+    """
+    return [
+        None if math.isnan(v) else v
+        for v in np.round(np.asarray(values, dtype=np.float64), decimals).tolist()
+    ]
+
+
+def _dates(index: pd.DatetimeIndex) -> List[str]:
+    """
+    :return: ISO dates (in the index's own timezone) - much faster than strftime for long indexes.
+    """
+    index = pd.DatetimeIndex(index)
+    local = index.tz_localize(None) if index.tz is not None else index
+    return np.datetime_as_string(local.to_numpy(), unit="D").tolist()
+
+
+def encode_payload(payload: Dict) -> bytes:
+    """
+    :return: compact, gzip-compressed JSON. The gzip header carries no timestamp, so identical payloads encode
+    to identical bytes (and ETags) across rebuilds.
+    """
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def portfolio_payloads(
+    portfolio: Portfolio, valuation: PortfolioValuation
+) -> Dict[str, Dict]:
+    """
+    :param portfolio: Portfolio (with holdings loaded).
+    :param valuation: its PortfolioValuation.
+    :return: Dict[key, payload] of the portfolio's holdings and (columnar) equity curve.
+    """
+    holding_values = valuation.holding_values
+    equity = valuation.equity
+    as_of = holding_values.index[-1] if len(holding_values.index) else None
+    total = float(equity.iloc[-1]) if len(equity) else portfolio.free_cash
+    holdings = []
+    for symbol, holding in sorted(portfolio.holdings.items()):
+        company = holding.stock.company if holding.stock else None
+        value = float(holding_values[symbol].iloc[-1]) if as_of is not None else 0.0
+        holdings.append(
+            {
+                "symbol": symbol,
+                "company": company.company_name if company else None,
+                "sector": company.sector if company else None,
+                "qty": holding.qty_owned,
+                "date_purchased": pd.Timestamp(holding.date_purchased).isoformat(),
+                "price": (
+                    round(value / holding.qty_owned, 4) if holding.qty_owned else None
+                ),
+                "market_value": round(value, 2),
+                "weight": round(value / total, 6) if total else None,
+            }
+        )
+    holdings_value = holding_values.sum(axis=1).to_numpy()
+    return {
+        holdings_key(portfolio.name): {
+            "portfolio": portfolio.name,
+            "as_of": as_of.date().isoformat() if as_of is not None else None,
+            "holdings": holdings,
+        },
+        equity_key(portfolio.name): {
+            "portfolio": portfolio.name,
+            "dates": _dates(equity.index),
+            "columns": {
+                "equity": _column(equity.to_numpy(), 2),
+                "cash": _column(valuation.cash.to_numpy(), 2),
+                "holdings": _column(holdings_value, 2),
+            },
+        },
+    }
+
+
+def indicator_payloads(close: pd.DataFrame) -> Dict[str, Dict]:
+    """
+    :param close: (dates x symbols) close prices.
+    :return: Dict[key, payload] of columnar indicator series per symbol, computed for every symbol at once.
+    """
+    returns = PanelIndicators.percent_returns(close)
+    series = {"close": close.to_numpy(dtype=np.float64)}
+    for name, (method, window) in DASHBOARD_INDICATORS.items():
+        source = returns if method == "rolling_std" else close
+        series[name] = np.asarray(
+            getattr(PanelIndicators, method)(source, window=window)
+        )
+    dates = _dates(close.index)
+    payloads = {}
+    for col, symbol in enumerate(close.columns):
+        listed = ~np.isnan(series["close"][:, col])
+        if not listed.any():
+            continue
+        rows = slice(listed.argmax(), len(listed) - listed[::-1].argmax())
+        payloads[indicators_key(symbol)] = {
+            "symbol": symbol,
+            "dates": dates[rows],
+            "columns": {
+                name: _column(values[rows, col], 6 if name.startswith("vol") else 4)
+                for name, values in series.items()
+            },
+        }
+    return payloads
+
+
+def _load_close(symbols: Sequence[str]) -> pd.DataFrame:
+    panel = get_panel()
+    if panel is not None and all(symbol in panel for symbol in symbols):
+        return panel.field("Close", symbols)
+    frames = get_store().load_many(symbols)
+    close = pd.DataFrame(
+        {symbol: market_data["Close"] for symbol, market_data in frames.items()}
+    )
+    return close.sort_index().reindex(columns=list(symbols))
+
+
+@timed
+def build_dashboard_snapshot(
+    portfolios: Optional[Iterable[Portfolio]] = None,
+    symbols: Optional[Iterable[str]] = None,
+    close: Optional[pd.DataFrame] = None,
+    path: str = DASHBOARD_SNAPSHOT_PATH,
+    keep: int = 2,
+) -> str:
+    """
+    Precompute every dashboard payload into a new snapshot version under path, then point the manifest at it.
+    Readers keep serving the previous version until the manifest is swapped (and up to keep versions stay on disk).
+    :param portfolios: Portfolio objects to publish (default every portfolio in the db).
+    :param symbols: symbols to publish indicator series for (default every symbol in close / the market data store).
+    :param close: optional (dates x symbols) close panel (default the shared PricePanel, else the market data store).
+    :param path: snapshot root directory.
+    :param keep: snapshot versions kept on disk.
+    :return: the new version's directory.
+    """
+    if portfolios is None:
+        portfolios = [Portfolio(name) for name in models.fetch_portfolio_names()]
+    portfolios = list(portfolios)
+    if symbols is not None:
+        symbols = [normalize_symbol(s) for s in symbols]
+    elif close is not None:
+        symbols = list(close.columns)
+    else:
+        panel = get_panel()
+        symbols = panel.symbols if panel is not None else get_store().symbols()
+    held = {symbol for portfolio in portfolios for symbol in portfolio.holdings} | {
+        t.symbol for portfolio in portfolios for t in portfolio.transaction_history
+    }
+    wanted = sorted(set(symbols) | held)
+    if close is None:
+        close = _load_close(wanted)
+    else:
+        close = close.reindex(columns=wanted)
+
+    payloads = indicator_payloads(close[symbols])
+    n_indicators = len(payloads)
+    summaries = []
+    for portfolio in portfolios:
+        traded = set(portfolio.holdings) | {
+            t.symbol for t in portfolio.transaction_history
+        }
+        try:
+            valuation = PortfolioValuation.from_portfolio(
+                portfolio, close=close[sorted(traded)]
+            )
+        except ValueError as err:
+            logger.warning(f"Skipping portfolio {portfolio.name}: {err}")
+            continue
+        payloads.update(portfolio_payloads(portfolio, valuation))
+        equity = valuation.equity
+        summaries.append(
+            {
+                "name": portfolio.name,
+                "holdings": portfolio.get_num_holdings(),
+                "value": round(float(equity.iloc[-1]), 2) if len(equity) else None,
+                "cash": (
+                    round(float(valuation.cash.iloc[-1]), 2)
+                    if len(equity)
+                    else round(portfolio.free_cash, 2)
+                ),
+            }
+        )
+    payloads[portfolios_key()] = {"portfolios": summaries}
+
+    now = datetime.now(timezone.utc)
+    built_at = now.replace(
+        microsecond=0
+    )  # served as Last-Modified, which has whole seconds.
+    # versions sort by build time; microseconds keep builds within one second apart, and a version directory that
+    # already exists (a concurrent build) is never written into.
+    while True:
+        version = now.strftime("%Y%m%dT%H%M%S%fZ")
+        version_path = os.path.join(path, version)
+        try:
+            os.makedirs(version_path)
+            break
+        except FileExistsError:
+            now += timedelta(microseconds=1)
+    entries = {}
+    for key, payload in payloads.items():
+        body = encode_payload(payload)
+        digest = hashlib.sha1(body).hexdigest()
+        file = f"{hashlib.sha1(key.encode()).hexdigest()[:20]}.json.gz"
+        with open(os.path.join(version_path, file), "wb") as out:
+            out.write(body)
+        entries[key] = {"file": file, "etag": digest, "bytes": len(body)}
+    tmp_manifest = os.path.join(path, f"{_MANIFEST_FILE}.tmp")
+    with open(tmp_manifest, "w") as manifest:
+        json.dump(
+            {"version": version, "built_at": built_at.isoformat(), "payloads": entries},
+            manifest,
+        )
+    os.replace(tmp_manifest, os.path.join(path, _MANIFEST_FILE))
+
+    versions = sorted(
+        entry for entry in os.listdir(path) if os.path.isdir(os.path.join(path, entry))
+    )
+    for stale in versions[: -max(keep, 1)]:
+        shutil.rmtree(os.path.join(path, stale), ignore_errors=True)
+    logger.success(
+        f"Built dashboard snapshot {version}: {len(summaries)} portfolios, "
+        f"{n_indicators} indicator series ({path})"
+    )
+    return version_path
+
+
+class DashboardSnapshot:
+    """
+    Read side of a snapshot built by build_dashboard_snapshot: maps payload keys to their pre-encoded
+    gzip JSON bytes and ETags.
+    """
+
+    def __init__(self, path: str = DASHBOARD_SNAPSHOT_PATH):
+        """
+        :param path: snapshot root directory.
+        """
+        with open(os.path.join(path, _MANIFEST_FILE)) as manifest:
+            meta = json.load(manifest)
+        self.path = path
+        self.version: str = meta["version"]
+        self.built_at = datetime.fromisoformat(meta["built_at"])
+        self.entries: Dict[str, Dict] = meta["payloads"]
+
+    @staticmethod
+    def manifest_mtime(path: str = DASHBOARD_SNAPSHOT_PATH) -> Optional[float]:
+        """
+        :return: modification time of the snapshot manifest (None if no snapshot has been built).
+        """
+        try:
+            return os.stat(os.path.join(path, _MANIFEST_FILE)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def etag(self, key: str) -> str:
+        return self.entries[key]["etag"]
+
+    def read(self, key: str) -> bytes:
+        """
+        :return: gzip-compressed JSON payload for key.
+        """
+        with open(
+            os.path.join(self.path, self.version, self.entries[key]["file"]), "rb"
+        ) as payload:
+            return payload.read()
+
+    def load(self, key: str) -> Dict:
+        """
+        :return: decoded payload for key.
+        """
+        return json.loads(gzip.decompress(self.read(key)))
+
+    def __repr__(self):
+        return "DashboardSnapshot<path, version, built_at, entries>"
+
+
+if __name__ == "__main__":
+    """Run directly to rebuild the dashboard snapshot (the nightly refresh job does this after refreshing data)."""
+    build_dashboard_snapshot()
@@ -0,0 +1,556 @@
+import os
+import pathlib
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.data.panel import get_panel
+from sdk.data.storage import get_store
+from sdk.entities.asset import Stock
+from sdk.misc.utils import load_cfg, normalize_symbol, timed
+
+module_path = pathlib.Path(__file__).parent.resolve()
+cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
+RISK_BENCHMARK = cfg.get("RISK_BENCHMARK", "SPY")
+RISK_COVARIANCE_PATH = os.path.join(
+    module_path, "..", "data", cfg.get("RISK_COVARIANCE_PATH", "risk_covariance.npz")
+)
+RISK_COVARIANCE_HALFLIFE = float(cfg.get("RISK_COVARIANCE_HALFLIFE", 63))
+
+TRADING_DAYS = 252
+
+Returns = Union[pd.Series, np.ndarray]
+
+
+def returns_panel(close: pd.DataFrame) -> pd.DataFrame:
+    """
+    :param close: (dates x symbols) close prices.
+    :return: daily simple returns - the first row, and days a symbol has no price on either side, are 0.
+    """
+    values = close.ffill().to_numpy(dtype=np.float64)
+    returns = np.zeros_like(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = values[1:] / values[:-1] - 1
+    returns[~np.isfinite(returns)] = 0.0
+    return pd.DataFrame(returns, index=close.index, columns=close.columns)
+
+
+class RollingCovariance:
+    """
+    Sample covariance of the last `window` return vectors, kept up to date in O(N^2) per new day: a ring buffer of
+    the window's rows plus running sums of returns and of their outer products. The sums are rebuilt from the
+    buffer once per window so floating point drift can't accumulate.
+    """
+
+    def __init__(self, symbols: Sequence[str], window: int = 252):
+        if window < 2:
+            raise ValueError(f"window must be at least 2, got {window}.")
+        self.symbols = [normalize_symbol(s) for s in symbols]
+        self.window = window
+        n = len(self.symbols)
+        self._buffer = np.zeros((window, n))
+        self._count = 0  # rows seen (capped at window for the statistics)
+        self._next = 0  # buffer row the next update overwrites
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._since_rebuild = 0
+        self.last_date = None
+
+    @classmethod
+    @timed
+    def from_returns(
+        cls, returns: pd.DataFrame, window: int = 252
+    ) -> "RollingCovariance":
+        """
+        :param returns: (dates x symbols) returns, e.g. returns_panel(close) - only the last window rows are used.
+        """
+        covariance = cls(returns.columns, window=window)
+        tail = np.nan_to_num(returns.to_numpy(dtype=np.float64)[-window:])
+        covariance._buffer[: len(tail)] = tail
+        covariance._count = len(tail)
+        covariance._next = len(tail) % window
+        covariance._rebuild()
+        covariance.last_date = returns.index[-1] if len(returns.index) else None
+        return covariance
+
+    def _rebuild(self) -> None:
+        rows = self._buffer[: self._count]
+        self._sum = rows.sum(axis=0)
+        self._cross = rows.T @ rows
+        self._since_rebuild = 0
+
+    def update(self, returns: Union[pd.Series, np.ndarray], date=None) -> None:
+        """
+        :param returns: the newest day's return per symbol (a Series is aligned to self.symbols, missing -> 0).
+        :param date: optional date of the row, kept as last_date.
+        """
+        row = _align(returns, self.symbols)
+        if self._count == self.window:
+            dropped = self._buffer[self._next].copy()
+            self._sum -= dropped
+            # add the new row's and remove the dropped row's outer product as one rank-2 BLAS product.
+            rows = np.stack((row, dropped))
+            self._cross += (rows.T * np.array([1.0, -1.0])) @ rows
+        else:
+            self._count += 1
+            self._cross += np.outer(row, row)
+        self._buffer[self._next] = row
+        self._next = (self._next + 1) % self.window
+        self._sum += row
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+        self.last_date = date if date is not None else self.last_date
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        :return: (symbols x symbols) sample covariance of daily returns.
+        """
+        k = self._count
+        if k < 2:
+            return np.full(self._cross.shape, np.nan)
+        mean = self._sum / k
+        return (self._cross - k * np.outer(mean, mean)) / (k - 1)
+
+    @property
+    def covariance(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, index=self.symbols, columns=self.symbols)
+
+    def save(self, path: str) -> None:
+        """
+        Persist the state (e.g. after the daily refresh) so the next update doesn't need the history.
+        """
+        np.savez(
+            path,
+            kind="rolling",
+            symbols=np.array(self.symbols),
+            window=self.window,
+            buffer=self._buffer,
+            count=self._count,
+            next=self._next,
+            last_date=str(self.last_date),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RollingCovariance":
+        state = np.load(path, allow_pickle=False)
+        covariance = cls(state["symbols"].tolist(), window=int(state["window"]))
+        covariance._buffer = state["buffer"]
+        covariance._count = int(state["count"])
+        covariance._next = int(state["next"])
+        covariance.last_date = _load_date(state)
+        covariance._rebuild()
+        return covariance
+
+    def __repr__(self):
+        return "RollingCovariance<symbols, window, values>"
+
+
+class EWMACovariance:
+    """
+    Exponentially weighted (RiskMetrics style, zero mean) covariance: C = decay * C + (1 - decay) * r r'. Each
+    update is O(N^2); seeding from history is a single weighted matrix product. Weights are normalized by their
+    total, so short histories aren't biased towards zero.
+    """
+
+    def __init__(self, symbols: Sequence[str], halflife: float = 63):
+        """
+        :param halflife: days for an observation's weight to halve (decay = 0.5 ** (1 / halflife)).
+        """
+        self.symbols = [normalize_symbol(s) for s in symbols]
+        self.halflife = halflife
+        self.decay = 0.5 ** (1 / halflife)
+        n = len(self.symbols)
+        self._weighted = np.zeros((n, n))  # sum of weight * r r'
+        self._weight = 0.0  # sum of weights
+        self.last_date = None
+
+    @classmethod
+    @timed
+    def from_returns(
+        cls, returns: pd.DataFrame, halflife: float = 63
+    ) -> "EWMACovariance":
+        """
+        :param returns: (dates x symbols) returns, e.g. returns_panel(close).
+        """
+        covariance = cls(returns.columns, halflife=halflife)
+        values = np.nan_to_num(returns.to_numpy(dtype=np.float64))
+        # rows older than ~20 half-lives carry < 1e-6 of the weight.
+        values = values[-int(20 * halflife) :]
+        weights = (1 - covariance.decay) * covariance.decay ** np.arange(
+            len(values) - 1, -1, -1
+        )
+        covariance._weighted = (values * weights[:, None]).T @ values
+        covariance._weight = float(weights.sum())
+        covariance.last_date = returns.index[-1] if len(returns.index) else None
+        return covariance
+
+    def update(self, returns: Union[pd.Series, np.ndarray], date=None) -> None:
+        """
+        :param returns: the newest day's return per symbol (a Series is aligned to self.symbols, missing -> 0).
+        :param date: optional date of the row, kept as last_date.
+        """
+        row = _align(returns, self.symbols)
+        self._weighted *= self.decay
+        self._weighted += np.outer((1 - self.decay) * row, row)
+        self._weight = self.decay * self._weight + (1 - self.decay)
+        self.last_date = date if date is not None else self.last_date
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        :return: (symbols x symbols) covariance of daily returns.
+        """
+        if not self._weight:
+            return np.full(self._weighted.shape, np.nan)
+        return self._weighted / self._weight
+
+    @property
+    def covariance(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, index=self.symbols, columns=self.symbols)
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            kind="ewma",
+            symbols=np.array(self.symbols),
+            halflife=self.halflife,
+            weighted=self._weighted,
+            weight=self._weight,
+            last_date=str(self.last_date),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "EWMACovariance":
+        state = np.load(path, allow_pickle=False)
+        covariance = cls(state["symbols"].tolist(), halflife=float(state["halflife"]))
+        covariance._weighted = state["weighted"]
+        covariance._weight = float(state["weight"])
+        covariance.last_date = _load_date(state)
+        return covariance
+
+    def __repr__(self):
+        return "EWMACovariance<symbols, halflife, values>"
+
+
+def load_covariance(path: str) -> Union[RollingCovariance, EWMACovariance]:
+    """
+    :return: the RollingCovariance or EWMACovariance saved at path.
+    """
+    with np.load(path, allow_pickle=False) as state:
+        kind = str(state["kind"])
+    return (RollingCovariance if kind == "rolling" else EWMACovariance).load(path)
+
+
+@timed
+def refresh_covariance(
+    close: Optional[pd.DataFrame] = None,
+    path: str = RISK_COVARIANCE_PATH,
+    halflife: float = RISK_COVARIANCE_HALFLIFE,
+) -> Union[RollingCovariance, EWMACovariance]:
+    """
+    Bring the saved covariance up to date (e.g. after the nightly refresh): load it, update it with each day after
+    its last_date and save it again, so the history is only read in full when there is no saved state yet or the
+    universe changed.
+    :param close: (dates x symbols) close prices (default the shared PricePanel, else the market data store).
+    :param path: where the state is saved.
+    :param halflife: half-life of the EWMACovariance seeded when there is no usable saved state.
+    :return: the updated covariance.
+    """
+    if close is None:
+        panel = get_panel()
+        if panel is not None:
+            close = panel.field("Close", panel.symbols)
+        else:
+            frames = get_store().load_many(get_store().symbols())
+            close = pd.DataFrame(
+                {symbol: data["Close"] for symbol, data in frames.items()}
+            ).sort_index()
+    returns = returns_panel(close)
+    covariance = load_covariance(path) if os.path.exists(path) else None
+    symbols = [normalize_symbol(s) for s in close.columns]
+    if covariance is not None and (
+        covariance.symbols != symbols or covariance.last_date is None
+    ):
+        logger.info(f"Universe changed since {path} was saved - seeding it again.")
+        covariance = None
+    if covariance is None:
+        covariance = EWMACovariance.from_returns(returns, halflife=halflife)
+    else:
+        new = np.flatnonzero(returns.index > covariance.last_date)
+        values = returns.to_numpy(dtype=np.float64)
+        for row in new:
+            covariance.update(values[row], date=returns.index[row])
+        logger.info(f"Updated the covariance with {len(new)} new days.")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # np.savez adds .npz to names without it, so the temporary file keeps the suffix.
+    tmp_path = f"{path}.tmp.npz"
+    covariance.save(tmp_path)
+    os.replace(tmp_path, path)
+    return covariance
+
+
+def _align(returns: Union[pd.Series, np.ndarray], symbols: Sequence[str]) -> np.ndarray:
+    if isinstance(returns, pd.Series):
+        returns = returns.reindex(symbols)
+    return np.nan_to_num(np.asarray(returns, dtype=np.float64))
+
+
+def _load_date(state) -> Optional[pd.Timestamp]:
+    date = str(state["last_date"])
+    return None if date == "None" else pd.Timestamp(date)
+
+
+def historical_var(returns: Returns, confidence: float = 0.95) -> Dict[str, float]:
+    """
+    :param returns: portfolio (or asset) returns / P&L.
+    :param confidence: e.g. 0.95 or 0.99.
+    :return: Dict with the loss not exceeded with the given confidence (var) and the mean loss beyond it (cvar),
+    both as positive numbers in the units of returns.
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {"var": np.nan, "cvar": np.nan}
+    cutoff = np.quantile(values, 1 - confidence)
+    return {"var": float(-cutoff), "cvar": float(-values[values <= cutoff].mean())}
+
+
+def parametric_var(
+    volatility: float, mean: float = 0.0, confidence: float = 0.95
+) -> Dict[str, float]:
+    """
+    Normal (variance-covariance) VaR and CVaR.
+    :param volatility: standard deviation of returns over the horizon.
+    :param mean: expected return over the horizon.
+    :return: Dict with var and cvar as positive losses.
+    """
+    normal = NormalDist()
+    z = normal.inv_cdf(confidence)
+    return {
+        "var": float(z * volatility - mean),
+        "cvar": float(volatility * normal.pdf(z) / (1 - confidence) - mean),
+    }
+
+
+def beta(returns: pd.DataFrame, benchmark: pd.Series) -> pd.Series:
+    """
+    :param returns: (dates x symbols) returns.
+    :param benchmark: benchmark index returns (aligned on the returns' dates).
+    :return: beta of every symbol to the benchmark, in one pass.
+    """
+    market = benchmark.reindex(returns.index).to_numpy(dtype=np.float64)
+    valid = ~np.isnan(market)
+    values = np.nan_to_num(returns.to_numpy(dtype=np.float64)[valid])
+    market = market[valid]
+    deviation = market - market.mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        betas = deviation @ (values - values.mean(axis=0)) / (deviation @ deviation)
+    return pd.Series(betas, index=returns.columns, name="beta")
+
+
+def risk_contributions(
+    weights: np.ndarray, covariance: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    :param weights: portfolio weights per asset.
+    :param covariance: asset covariance matrix.
+    :return: Dict with volatility (of the portfolio), marginal (d volatility / d weight), component
+    (weight * marginal - sums to volatility) and percent (component / volatility).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    exposure = covariance @ weights
+    volatility = float(np.sqrt(max(weights @ exposure, 0.0)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        marginal = exposure / volatility
+    component = weights * marginal
+    return {
+        "volatility": volatility,
+        "marginal": marginal,
+        "component": component,
+        "percent": component / volatility,
+    }
+
+
+def _holdings_close(portfolio, symbols: Sequence[str]) -> pd.DataFrame:
+    """
+    :return: close prices of symbols from the shared panel, else from each holding's market data.
+    """
+    panel = get_panel()
+    if panel is not None and all(symbol in panel for symbol in symbols):
+        return panel.field("Close", symbols)
+    return pd.DataFrame(
+        {
+            symbol: (portfolio.holdings[symbol].stock or Stock(symbol)).market_data[
+                "Close"
+            ]
+            for symbol in symbols
+        }
+    ).sort_index()
+
+
+def load_benchmark_returns(symbol: str = RISK_BENCHMARK) -> pd.Series:
+    """
+    :return: daily returns of the benchmark index (e.g. SPY) from the local store.
+    """
+    close = get_store().load(symbol)["Close"]
+    return returns_panel(close.to_frame(symbol))[symbol].rename(symbol)
+
+
+class PortfolioRisk:
+    """
+    Risk of a set of weights against a returns history: portfolio volatility, historical and parametric VaR/CVaR,
+    beta to a benchmark and each asset's marginal / component contribution to risk.
+    """
+
+    def __init__(
+        self,
+        weights: pd.Series,
+        returns: pd.DataFrame,
+        covariance: Optional[np.ndarray] = None,
+        benchmark: Optional[pd.Series] = None,
+    ):
+        """
+        :param weights: weight per symbol as a fraction of equity (cash is the remainder and carries no risk).
+        :param returns: (dates x symbols) daily returns covering the weights' symbols.
+        :param covariance: optional covariance of the returns' columns (e.g. EWMACovariance(...).values) - default
+        the sample covariance of returns.
+        :param benchmark: optional benchmark daily returns for beta.
+        """
+        self.symbols = list(returns.columns)
+        self.weights = weights.reindex(self.symbols).fillna(0.0)
+        self.returns = returns
+        values = np.nan_to_num(returns.to_numpy(dtype=np.float64))
+        self.covariance = (
+            covariance
+            if covariance is not None
+            else np.cov(values, rowvar=False, ddof=1)
+        )
+        self.covariance = np.atleast_2d(self.covariance)
+        self.benchmark = benchmark
+        self.portfolio_returns = pd.Series(
+            values @ self.weights.to_numpy(), index=returns.index, name="returns"
+        )
+
+    @classmethod
+    @timed
+    def from_portfolio(
+        cls,
+        portfolio,
+        close: Optional[pd.DataFrame] = None,
+        lookback: int = TRADING_DAYS,
+        halflife: Optional[float] = None,
+        benchmark: Optional[pd.Series] = None,
+    ) -> "PortfolioRisk":
+        """
+        :param portfolio: Portfolio whose current holdings are analysed (weights are market value / total equity).
+        :param close: optional (dates x symbols) close prices - default the shared PricePanel, else the holdings'
+        market data.
+        :param lookback: days of returns to use.
+        :param halflife: use an EWMA covariance with this half-life instead of the sample covariance.
+        :param benchmark: optional benchmark returns for beta.
+        """
+        symbols = sorted(portfolio.holdings)
+        if not symbols:
+            raise ValueError(f"Portfolio {portfolio.name} has no holdings.")
+        close = (close if close is not None else _holdings_close(portfolio, symbols))[
+            symbols
+        ]
+        returns = returns_panel(close).iloc[-lookback:]
+        last = close.ffill().iloc[-1]
+        values = pd.Series(
+            {s: portfolio.holdings[s].qty_owned * last[s] for s in symbols}
+        )
+        weights = values / (values.sum() + portfolio.free_cash)
+        covariance = (
+            EWMACovariance.from_returns(returns, halflife=halflife).values
+            if halflife
+            else None
+        )
+        return cls(weights, returns, covariance=covariance, benchmark=benchmark)
+
+    @property
+    def volatility(self) -> float:
+        """
+        :return: daily volatility of the portfolio implied by the covariance.
+        """
+        w = self.weights.to_numpy()
+        return float(np.sqrt(max(w @ self.covariance @ w, 0.0)))
+
+    def var(self, confidence: float = 0.95, horizon: int = 1) -> Dict[str, float]:
+        """
+        :param horizon: days (parametric figures scale with sqrt(horizon), historical ones use overlapping
+        horizon-day returns).
+        :return: Dict with historical_var, historical_cvar, parametric_var and parametric_cvar as fractions of
+        equity.
+        """
+        returns = self.portfolio_returns
+        if horizon > 1:
+            returns = np.exp(np.log1p(returns).rolling(horizon).sum().dropna()) - 1
+        historical = historical_var(returns, confidence)
+        parametric = parametric_var(
+            self.volatility * np.sqrt(horizon),
+            float(self.portfolio_returns.mean()) * horizon,
+            confidence,
+        )
+        return {
+            "historical_var": historical["var"],
+            "historical_cvar": historical["cvar"],
+            "parametric_var": parametric["var"],
+            "parametric_cvar": parametric["cvar"],
+        }
+
+    def beta(self) -> Optional[float]:
+        """
+        :return: beta of the portfolio to the benchmark (None without one).
+        """
+        if self.benchmark is None:
+            return None
+        return float(beta(self.portfolio_returns.to_frame(), self.benchmark).iloc[0])
+
+    def contributions(self) -> pd.DataFrame:
+        """
+        :return: per-symbol weight, marginal, component and percent contribution to (daily) volatility, largest
+        contributors first.
+        """
+        risk = risk_contributions(self.weights.to_numpy(), self.covariance)
+        contributions = pd.DataFrame(
+            {
+                "weight": self.weights.to_numpy(),
+                "marginal": risk["marginal"],
+                "component": risk["component"],
+                "percent": risk["percent"],
+            },
+            index=self.symbols,
+        )
+        return contributions.sort_values("component", ascending=False)
+
+    def summary(self, confidence: float = 0.95) -> Dict[str, float]:
+        """
+        :return: Dict of daily and annualized volatility, 1-day VaR/CVaR and beta.
+        """
+        return {
+            "volatility": self.volatility,
+            "annualized_volatility": self.volatility * float(np.sqrt(TRADING_DAYS)),
+            **self.var(confidence),
+            "beta": self.beta(),
+        }
+
+    def __repr__(self):
+        return "PortfolioRisk<symbols, weights, returns, covariance, benchmark>"
+
+
+if __name__ == "__main__":
+    from sdk.entities.portfolio import Portfolio
+
+    portfolio = Portfolio(name="MyPortfolio")
+    try:
+        benchmark = load_benchmark_returns()
+    except Exception as err:
+        logger.warning(f"No benchmark returns for {RISK_BENCHMARK}: {err}")
+        benchmark = None
+    risk = PortfolioRisk.from_portfolio(portfolio, benchmark=benchmark)
+    print(risk.summary())
+    print(risk.contributions())
@@ -0,0 +1,281 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.data.panel import get_panel
+from sdk.data.storage import to_day_ordinals
+from sdk.entities.asset import Stock
+from sdk.entities.transaction import Transaction
+from sdk.misc.enums import Direction
+from sdk.misc.utils import currency, normalize_symbol, timed
+
+
+def _signed_qty(transaction: Transaction) -> int:
+    return (
+        transaction.qty if transaction.direction == Direction.Buy else -transaction.qty
+    )
+
+
+class PortfolioValuation:
+    """
+    Values a transaction ledger against a (dates x symbols) close panel in one pass: trades are scattered into a
+    (dates x symbols) matrix of position changes and cumulated into positions, which are multiplied by the as-of
+    (forward filled) closes. Trades are booked at the close of their date (or the next trading day). New days are
+    appended with extend() without revaluing the history.
+    """
+
+    def __init__(
+        self,
+        close: pd.DataFrame,
+        transactions: Sequence[Transaction] = (),
+        initial_cash: float = 1_00_000.00,
+        opening_positions: Optional[Dict[str, int]] = None,
+    ):
+        """
+        :param close: (dates x symbols) close prices, e.g. PricePanel.field('Close') - must cover every traded symbol.
+        :param transactions: ledger of MarketBuy/MarketSell orders.
+        :param initial_cash: cash before the first transaction.
+        :param opening_positions: optional Dict[symbol, shares] held from the first date without a cash cost
+        (e.g. holdings recorded without their transactions).
+        """
+        self.symbols: List[str] = [normalize_symbol(symbol) for symbol in close.columns]
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.initial_cash = initial_cash
+        self.dates = close.index[:0]
+        n_symbols = len(self.symbols)
+        self._positions = np.zeros((0, n_symbols), dtype=np.int64)
+        self._marks = np.zeros((0, n_symbols))
+        self._cash = np.zeros(0)
+        self._contribution = np.zeros((0, n_symbols))
+        # state carried into the next extend()
+        self._last_positions = np.zeros(n_symbols, dtype=np.int64)
+        for symbol, qty in (opening_positions or {}).items():
+            self._last_positions[self._column(symbol)] += qty
+        self._last_marks = np.full(n_symbols, np.nan)
+        self._last_cash = initial_cash
+        self.extend(close, transactions)
+
+    def _column(self, symbol: str) -> int:
+        try:
+            return self.symbol_index[normalize_symbol(symbol)]
+        except KeyError:
+            raise ValueError(
+                f"No close prices for {symbol} - add it to the close panel."
+            )
+
+    def extend(
+        self, close: pd.DataFrame, transactions: Sequence[Transaction] = ()
+    ) -> None:
+        """
+        Append new days of closes (and the transactions made on them). Costs O(new days x symbols).
+        :param close: closes for dates after the last valued date (columns are aligned by symbol).
+        :param transactions: transactions dated within the new days.
+        :return: None
+        """
+        if len(self.dates) and len(close.index) and close.index[0] <= self.dates[-1]:
+            raise ValueError(
+                f"Can only extend with dates after {self.dates[-1].date()} (got {close.index[0].date()})."
+            )
+        close = close.reindex(columns=self.symbols)
+        n_days = len(close.index)
+        if not n_days:
+            if transactions:
+                raise ValueError(
+                    "Transactions need the closes of the days they were made on."
+                )
+            return
+        days = to_day_ordinals(close.index)
+        position_change = np.zeros((n_days, len(self.symbols)), dtype=np.int64)
+        cash_flow = np.zeros(n_days)
+        if transactions:
+            trade_days = to_day_ordinals([t.date for t in transactions])
+            after = to_day_ordinals(self.dates[-1:])[0] if len(self.dates) else -np.inf
+            if trade_days.min() <= after or trade_days.max() > days[-1]:
+                raise ValueError("Transactions must fall within the dates being added.")
+            rows = np.searchsorted(days, trade_days, side="left")
+            cols = np.array([self._column(t.symbol) for t in transactions])
+            qty = np.array([_signed_qty(t) for t in transactions], dtype=np.int64)
+            prices = np.array([t.price for t in transactions], dtype=np.float64)
+            np.add.at(position_change, (rows, cols), qty)
+            np.add.at(cash_flow, rows, -qty * prices)
+
+        positions = self._last_positions + np.cumsum(position_change, axis=0)
+        cash = self._last_cash + np.cumsum(cash_flow)
+        # as-of prices: carry the last close over days a symbol has no bar.
+        marks = (
+            pd.DataFrame(
+                np.vstack([self._last_marks, close.to_numpy(dtype=np.float64)])
+            )
+            .ffill()
+            .to_numpy()
+        )
+        previous_positions = np.vstack([self._last_positions, positions[:-1]])
+        with np.errstate(invalid="ignore"):
+            contribution = np.nan_to_num(previous_positions * np.diff(marks, axis=0))
+        marks = marks[1:]
+        if transactions:
+            # P&L between each trade's fill price and that day's close, so contributions add up to the equity curve.
+            np.add.at(
+                contribution,
+                (rows, cols),
+                np.nan_to_num(qty * (marks[rows, cols] - prices)),
+            )
+
+        self.dates = self.dates.append(close.index) if len(self.dates) else close.index
+        self._positions = np.vstack([self._positions, positions])
+        self._marks = np.vstack([self._marks, marks])
+        self._cash = np.concatenate([self._cash, cash])
+        self._contribution = np.vstack([self._contribution, contribution])
+        self._last_positions = positions[-1]
+        self._last_marks = marks[-1]
+        self._last_cash = float(cash[-1])
+
+    @property
+    def positions(self) -> pd.DataFrame:
+        """
+        :return: (dates x symbols) shares held at each close.
+        """
+        return pd.DataFrame(self._positions, index=self.dates, columns=self.symbols)
+
+    @property
+    def holding_values(self) -> pd.DataFrame:
+        """
+        :return: (dates x symbols) market value of each holding.
+        """
+        return pd.DataFrame(
+            np.nan_to_num(self._positions * self._marks),
+            index=self.dates,
+            columns=self.symbols,
+        )
+
+    @property
+    def contribution(self) -> pd.DataFrame:
+        """
+        :return: (dates x symbols) daily P&L of each holding (shares held overnight x change in close).
+        """
+        return pd.DataFrame(self._contribution, index=self.dates, columns=self.symbols)
+
+    @property
+    def cash(self) -> pd.Series:
+        return pd.Series(self._cash, index=self.dates, name="cash")
+
+    @property
+    def equity(self) -> pd.Series:
+        """
+        :return: daily portfolio value (cash + holdings).
+        """
+        return pd.Series(
+            self._cash + np.nan_to_num(self._positions * self._marks).sum(axis=1),
+            index=self.dates,
+            name="equity",
+        )
+
+    @classmethod
+    @timed
+    def from_portfolio(
+        cls, portfolio, close: Optional[pd.DataFrame] = None
+    ) -> "PortfolioValuation":
+        """
+        :param portfolio: Portfolio whose transaction_history (and holdings) should be valued.
+        :param close: optional close panel - defaults to the shared PricePanel, else each holding's market data.
+        :return: PortfolioValuation from the portfolio's first transaction onwards. Initial cash is inferred from
+        the current free cash and the ledger; holdings not explained by the ledger become opening positions.
+        """
+        transactions = sorted(portfolio.transaction_history, key=lambda t: t.date)
+        symbols = sorted(
+            {t.symbol for t in transactions} | set(portfolio.holdings.keys())
+        )
+        if close is None:
+            panel = get_panel()
+            if panel is not None and all(symbol in panel for symbol in symbols):
+                close = panel.field("Close", symbols)
+            else:
+                stocks = {
+                    symbol: holding.stock or Stock(symbol)
+                    for symbol, holding in portfolio.holdings.items()
+                }
+                close = pd.DataFrame(
+                    {
+                        symbol: (stocks.get(symbol) or Stock(symbol)).market_data[
+                            "Close"
+                        ]
+                        for symbol in symbols
+                    }
+                ).sort_index()
+        close = cls._extend_to_trades(close, transactions)
+        traded = {}
+        for t in transactions:
+            traded[t.symbol] = traded.get(t.symbol, 0) + _signed_qty(t)
+        opening_positions = {
+            symbol: holding.qty_owned - traded.get(symbol, 0)
+            for symbol, holding in portfolio.holdings.items()
+            if holding.qty_owned != traded.get(symbol, 0)
+        }
+        spent = sum(_signed_qty(t) * t.price for t in transactions)
+        first_dates = [t.date for t in transactions[:1]] + [
+            portfolio.holdings[symbol].date_purchased for symbol in opening_positions
+        ]
+        if first_dates:
+            first_day = to_day_ordinals(first_dates).min()
+            close = close.iloc[
+                np.searchsorted(to_day_ordinals(close.index), first_day) :
+            ]
+        valuation = cls(
+            close,
+            transactions,
+            initial_cash=portfolio.free_cash + spent,
+            opening_positions=opening_positions,
+        )
+        if not len(valuation.dates):
+            logger.warning(f"No closes to value {portfolio.name} on.")
+            return valuation
+        logger.success(
+            f"Valued {portfolio.name} over {len(valuation.dates)} days: {currency(valuation.equity.iloc[-1])}."
+        )
+        return valuation
+
+    @staticmethod
+    def _extend_to_trades(
+        close: pd.DataFrame, transactions: Sequence[Transaction]
+    ) -> pd.DataFrame:
+        """
+        :param close: (dates x symbols) close prices.
+        :param transactions: ledger, sorted by date.
+        :return: close with a row for each day traded after its last bar (e.g. trades made today before the nightly
+        refresh), holding each symbol's last close - or, for symbols without any close, the day's last fill price.
+        """
+        if not len(transactions):
+            return close
+        if not isinstance(close.index, pd.DatetimeIndex):  # e.g. an empty frame.
+            close = close.set_axis(pd.DatetimeIndex(close.index), axis=0)
+        trade_days = to_day_ordinals([t.date for t in transactions])
+        if len(close.index):
+            late = trade_days > to_day_ordinals(close.index[-1:])[0]
+        else:
+            late = np.ones(len(trade_days), dtype=bool)
+        if not late.any():
+            return close
+        days, rows = np.unique(trade_days[late], return_inverse=True)
+        index = pd.DatetimeIndex(days.astype("datetime64[D]"))
+        if close.index.tz is not None:
+            index = index.tz_localize(close.index.tz)
+        marks = np.full((len(days), len(close.columns)), np.nan)
+        if len(close.index):
+            marks[:] = close.ffill().iloc[-1].to_numpy(dtype=np.float64)
+        unpriced = np.isnan(marks[0])
+        late = [t for t, is_late in zip(transactions, late) if is_late]
+        columns = {symbol: i for i, symbol in enumerate(close.columns)}
+        for row, t in zip(rows, late):
+            col = columns.get(
+                normalize_symbol(t.symbol)
+            )  # missing: reported by extend.
+            if col is not None and unpriced[col]:
+                marks[row:, col] = t.price
+        extra = pd.DataFrame(marks, index=index, columns=close.columns)
+        logger.warning(
+            f"{len(late)} transactions after the last close are valued at the last close (or fill price)."
+        )
+        return pd.concat([close, extra]) if len(close.index) else extra
+
+    def __repr__(self):
+        return "PortfolioValuation<dates, symbols, positions, holding_values, contribution, cash, equity>"
@@ -0,0 +1,235 @@
+from datetime import date
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.data.panel import PricePanel
+from sdk.data.storage import to_market_timestamp
+from sdk.entities.asset import Stock
+from sdk.entities.portfolio import Portfolio
+from sdk.entities.transaction import MarketBuy, MarketSell, Transaction
+from sdk.factors.technical_indicators import Metrics
+from sdk.misc.utils import currency, normalize_symbol, timed
+
+
+class BarContext:
+    """
+    What a strategy sees on each bar: prices up to and including the current bar, current positions and cash,
+    and buy/sell methods that queue market orders to be filled at this bar's price.
+    """
+
+    def __init__(self, backtester: "Backtester"):
+        self._backtester = backtester
+        self.row = 0
+        self.orders: List[Transaction] = []
+
+    @property
+    def date(self) -> pd.Timestamp:
+        return self._backtester.dates[self.row]
+
+    @property
+    def symbols(self) -> List[str]:
+        return self._backtester.panel.symbols
+
+    @property
+    def prices(self) -> np.ndarray:
+        """
+        :return: fill price of every symbol on this bar (NaN where the symbol has no bar).
+        """
+        return self._backtester.fill_prices[self.row]
+
+    @property
+    def positions(self) -> np.ndarray:
+        """
+        :return: shares held of every symbol (read-only view).
+        """
+        positions = self._backtester.positions.view()
+        positions.flags.writeable = False
+        return positions
+
+    @property
+    def cash(self) -> float:
+        return self._backtester.portfolio.free_cash
+
+    @property
+    def equity(self) -> float:
+        return self._backtester.mark_to_market(self.row)
+
+    def price(self, symbol: str) -> float:
+        return float(self.prices[self._backtester.panel.symbol_index[symbol]])
+
+    def history(
+        self, field: str = "Close", lookback: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        :param field: panel field, e.g. Close.
+        :param lookback: number of bars (default: all bars so far).
+        :return: (bars x symbols) view of field ending at the current bar - never includes future bars.
+        """
+        start = 0 if lookback is None else max(self.row + 1 - lookback, 0)
+        field_index = self._backtester.panel.field_index[field]
+        return self._backtester.panel.values[start : self.row + 1, :, field_index]
+
+    def buy(self, symbol: str, qty: int) -> None:
+        if qty > 0:
+            self.orders.append(
+                MarketBuy(
+                    date=self.date.to_pydatetime(),
+                    symbol=symbol,
+                    price=self.price(normalize_symbol(symbol)),
+                    qty=int(qty),
+                )
+            )
+
+    def sell(self, symbol: str, qty: int) -> None:
+        if qty > 0:
+            self.orders.append(
+                MarketSell(
+                    date=self.date.to_pydatetime(),
+                    symbol=symbol,
+                    price=self.price(normalize_symbol(symbol)),
+                    qty=int(qty),
+                )
+            )
+
+    def order_target(self, symbol: str, qty: int) -> None:
+        """
+        Buy or sell whatever is needed to end the bar holding qty shares of symbol.
+        """
+        held = int(
+            self._backtester.positions[
+                self._backtester.panel.symbol_index[normalize_symbol(symbol)]
+            ]
+        )
+        if qty > held:
+            self.buy(symbol, qty - held)
+        elif qty < held:
+            self.sell(symbol, held - qty)
+
+
+class BacktestResult:
+    def __init__(
+        self,
+        equity: pd.Series,
+        cash: pd.Series,
+        transactions: List[Transaction],
+        portfolio: Portfolio,
+        rejected: int = 0,
+    ):
+        self.equity = equity
+        self.cash = cash
+        self.transactions = transactions
+        self.portfolio = portfolio
+        self.rejected = rejected
+
+    def percent_returns(self) -> pd.Series:
+        return Metrics.percent_returns(self.equity)
+
+    def max_drawdown(self) -> float:
+        return Metrics.max_drawdown(self.equity)
+
+    def __str__(self):
+        return (
+            f"[Backtest] {self.equity.index[0].date()} -> {self.equity.index[-1].date()} | "
+            f"final value {currency(self.equity.iloc[-1])} | "
+            f"max drawdown {self.max_drawdown():.2%} | "
+            f"{len(self.transactions)} transactions ({self.rejected} rejected)"
+        )
+
+    def __repr__(self):
+        return "BacktestResult<equity, cash, transactions, portfolio, rejected>"
+
+
+class Backtester:
+    """
+    Event-driven backtest: replays a PricePanel bar by bar, calls strategy(ctx) on each bar, then fills the queued
+    MarketBuy/MarketSell orders against a Portfolio at that bar's prices and records the portfolio's value.
+    All prices come from the panel's preloaded arrays.
+    """
+
+    def __init__(
+        self,
+        panel: PricePanel,
+        strategy: Callable[[BarContext], None],
+        initial_cash: float = 1_00_000.00,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        fill_field: str = "Close",
+        name: str = "backtest",
+    ):
+        self.panel = panel
+        self.strategy = strategy
+        rows = np.arange(len(panel.dates))
+        if start_date is not None:
+            rows = rows[panel.dates[rows] >= to_market_timestamp(start_date)]
+        if end_date is not None:
+            rows = rows[panel.dates[rows] <= to_market_timestamp(end_date)]
+        if not len(rows):
+            raise ValueError(f"No bars in panel between {start_date} and {end_date}.")
+        self.first_row = int(rows[0])
+        self.dates = panel.dates[: rows[-1] + 1]
+        self.fill_prices = panel.values[
+            : rows[-1] + 1, :, panel.field_index[fill_field]
+        ]
+        # last known price per symbol, so holdings are still valued on days a symbol has no bar.
+        self.mark_prices = pd.DataFrame(self.fill_prices).ffill().fillna(0.0).to_numpy()
+        self.portfolio = Portfolio(name=name, free_cash=initial_cash, load_local=False)
+        self.positions = np.zeros(len(panel.symbols), dtype=np.int64)
+        self._stocks: Dict[str, Stock] = {}
+        self.rejected = 0
+
+    def mark_to_market(self, row: int) -> float:
+        return float(self.portfolio.free_cash + self.positions @ self.mark_prices[row])
+
+    def _stock(self, symbol: str) -> Stock:
+        if symbol not in self._stocks:
+            self._stocks[symbol] = Stock(
+                symbol=symbol, market_data=self.panel.frame(symbol)
+            )
+        return self._stocks[symbol]
+
+    def _fill(self, order: Transaction) -> None:
+        col = self.panel.symbol_index[order.symbol]
+        if np.isnan(order.price):
+            raise ValueError(
+                f"No {order.symbol} bar on {order.date:%Y-%m-%d} to fill against."
+            )
+        if isinstance(order, MarketBuy):
+            self.portfolio.purchase_asset(
+                buy_order=order, stock=self._stock(order.symbol)
+            )
+            self.positions[col] += order.qty
+        else:
+            self.portfolio.sell_asset(sell_order=order)
+            self.positions[col] -= order.qty
+
+    @timed
+    def run(self) -> BacktestResult:
+        ctx = BarContext(self)
+        n_bars = len(self.dates) - self.first_row
+        equity = np.empty(n_bars)
+        cash = np.empty(n_bars)
+        for i, row in enumerate(range(self.first_row, len(self.dates))):
+            ctx.row = row
+            ctx.orders = []
+            self.strategy(ctx)
+            # sells first, so their proceeds can fund this bar's buys.
+            for order in sorted(ctx.orders, key=lambda o: isinstance(o, MarketBuy)):
+                try:
+                    self._fill(order)
+                except ValueError as err:
+                    self.rejected += 1
+                    logger.warning(err)
+            equity[i] = self.mark_to_market(row)
+            cash[i] = self.portfolio.free_cash
+        index = self.dates[self.first_row :]
+        return BacktestResult(
+            equity=pd.Series(equity, index=index, name="equity"),
+            cash=pd.Series(cash, index=index, name="cash"),
+            transactions=self.portfolio.transaction_history,
+            portfolio=self.portfolio,
+            rejected=self.rejected,
+        )
+
+    def __repr__(self):
+        return "Backtester<panel, strategy, portfolio, positions>"
@@ -0,0 +1,284 @@
+import concurrent.futures
+import csv
+import itertools
+import os
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.backtest.vectorized import WeightBacktester
+from sdk.factors.panel_indicators import PanelIndicators
+from sdk.misc.utils import timed
+
+# objective(close, start, end, **params) -> metrics. close is the full price frame; the objective may use rows
+# before start as warm-up history but must only score (and never look at) rows in [start, end).
+Objective = Callable[..., Dict[str, float]]
+Descriptor = Tuple[str, Tuple[int, ...], str]
+
+
+class SharedArray:
+    """
+    NumPy array copied once into a shared memory block, so worker processes map the same pages
+    instead of each unpickling their own copy.
+    """
+
+    def __init__(self, array: np.ndarray):
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.array = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)
+        self.array[...] = array
+
+    @property
+    def descriptor(self) -> Descriptor:
+        return self._shm.name, self.array.shape, self.array.dtype.str
+
+    @staticmethod
+    def attach(descriptor: Descriptor) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+        """
+        :return: (shared memory handle, read-only array view) for a block created in another process.
+        """
+        name, shape, dtype = descriptor
+        # only the creating process should track (and eventually unlink) the block.
+        register, resource_tracker.register = (
+            resource_tracker.register,
+            lambda *args: None,
+        )
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        return shm, array
+
+    def release(self) -> None:
+        del self.array
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+_worker_state: Dict = {}
+
+
+def _init_worker(prices: Descriptor, dates: Descriptor, symbols: List[str]) -> None:
+    price_shm, price_values = SharedArray.attach(prices)
+    date_shm, date_values = SharedArray.attach(dates)
+    _worker_state["handles"] = (
+        price_shm,
+        date_shm,
+    )  # keep the mappings alive for the life of the worker.
+    _worker_state["close"] = pd.DataFrame(
+        price_values,
+        index=pd.DatetimeIndex(date_values.view("datetime64[ns]")),
+        columns=symbols,
+        copy=False,
+    )
+
+
+def _run_tasks(
+    objective: Objective, tasks: List[Tuple[Dict, int, slice, slice]]
+) -> List[Dict]:
+    close = _worker_state["close"]
+    rows = []
+    for params, fold, train, test in tasks:
+        row = {"fold": fold, **params}
+        for label, window in (("train", train), ("test", test)):
+            if window is None:
+                continue
+            metrics = objective(close, window.start, window.stop, **params)
+            row.update({f"{label}_{name}": value for name, value in metrics.items()})
+        rows.append(row)
+    return rows
+
+
+def parameter_grid(grid: Dict[str, Sequence]) -> List[Dict]:
+    """
+    :param grid: Dict[parameter name, values to try].
+    :return: every combination as a list of kwargs dicts.
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def walk_forward_splits(
+    n_dates: int,
+    train_size: int,
+    test_size: int,
+    anchored: bool = False,
+) -> List[Tuple[slice, slice]]:
+    """
+    :param n_dates: length of the price history.
+    :param train_size: bars in each (first) training window.
+    :param test_size: bars in each out-of-sample window that follows it.
+    :param anchored: if True training windows all start at bar 0 and grow, otherwise they roll forward.
+    :return: list of (train, test) row slices.
+    """
+    splits = []
+    start = 0
+    while start + train_size + test_size <= n_dates:
+        train = slice(0 if anchored else start, start + train_size)
+        splits.append((train, slice(train.stop, train.stop + test_size)))
+        start += test_size
+    return splits
+
+
+class ParameterSweep:
+    """
+    Fans an objective out over a parameter grid (x walk-forward folds) on a ProcessPoolExecutor. Prices are placed
+    in shared memory once and mapped by every worker; results stream back as tasks complete.
+    """
+
+    def __init__(
+        self,
+        objective: Objective,
+        grid: Dict[str, Sequence],
+        close: pd.DataFrame,
+        splits: Optional[List[Tuple[slice, slice]]] = None,
+        max_workers: Optional[int] = None,
+        tasks_per_chunk: Optional[int] = None,
+    ):
+        """
+        :param objective: top-level (picklable) function - see Objective.
+        :param grid: Dict[parameter name, values to try].
+        :param close: (dates x symbols) close prices.
+        :param splits: optional walk-forward (train, test) slices; default is a single pass over all dates.
+        :param max_workers: worker processes (default os.cpu_count()).
+        :param tasks_per_chunk: parameter sets sent to a worker at a time (default ~4 chunks per worker).
+        """
+        self.objective = objective
+        self.params = parameter_grid(grid)
+        self.close = close
+        self.splits = splits or [(None, slice(0, len(close.index)))]
+        self.max_workers = max_workers or os.cpu_count()
+        self.tasks_per_chunk = tasks_per_chunk
+
+    def _chunks(self) -> List[List[Tuple[Dict, int, slice, slice]]]:
+        tasks = [
+            (params, fold, train, test)
+            for fold, (train, test) in enumerate(self.splits)
+            for params in self.params
+        ]
+        size = self.tasks_per_chunk or max(1, len(tasks) // (self.max_workers * 4))
+        return [tasks[i : i + size] for i in range(0, len(tasks), size)]
+
+    @timed
+    def run(
+        self,
+        on_result: Optional[Callable[[Dict], None]] = None,
+        results_path: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        :param on_result: optional callback invoked with each result row as soon as it arrives.
+        :param results_path: optional csv file that result rows are appended to as they arrive.
+        :return: results table - one row per (parameter set, fold).
+        """
+        prices = SharedArray(self.close.to_numpy(dtype=np.float64))
+        dates = SharedArray(
+            pd.DatetimeIndex(self.close.index)
+            .tz_localize(None)
+            .to_numpy(dtype="datetime64[ns]")
+            .view(np.int64)
+        )
+        results = []
+        writer, results_file = None, None
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(
+                    prices.descriptor,
+                    dates.descriptor,
+                    list(self.close.columns),
+                ),
+            ) as executor:
+                futures = [
+                    executor.submit(_run_tasks, self.objective, chunk)
+                    for chunk in self._chunks()
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    for row in future.result():
+                        results.append(row)
+                        if on_result:
+                            on_result(row)
+                        if results_path:
+                            if writer is None:
+                                results_file = open(results_path, "w", newline="")
+                                writer = csv.DictWriter(
+                                    results_file, fieldnames=list(row)
+                                )
+                                writer.writeheader()
+                            writer.writerow(row)
+                            results_file.flush()
+        finally:
+            if results_file:
+                results_file.close()
+            prices.release()
+            dates.release()
+        logger.success(
+            f"Swept {len(self.params)} parameter sets x {len(self.splits)} folds."
+        )
+        return (
+            pd.DataFrame(results)
+            .sort_values(["fold", *self.params[0]])
+            .reset_index(drop=True)
+        )
+
+    def __repr__(self):
+        return "ParameterSweep<objective, params, close, splits, max_workers>"
+
+
+def walk_forward_summary(
+    results: pd.DataFrame, metric: str, maximize: bool = True
+) -> pd.DataFrame:
+    """
+    Pick the best parameters on each fold's training window and report how they did out of sample.
+    :param results: table returned by ParameterSweep.run with walk-forward splits.
+    :param metric: objective metric name (without the train_/test_ prefix).
+    :param maximize: whether larger values of metric are better.
+    :return: one row per fold with the chosen parameters and their train/test metrics.
+    """
+    ranked = results.sort_values(f"train_{metric}", ascending=not maximize)
+    return (
+        ranked.groupby("fold", sort=True)
+        .head(1)
+        .sort_values("fold")
+        .reset_index(drop=True)
+    )
+
+
+def sma_trend_objective(
+    close: pd.DataFrame,
+    start: int,
+    end: int,
+    window: int = 50,
+    rebalance_every: int = 21,
+    top_n: int = 20,
+) -> Dict[str, float]:
+    """
+    Example objective: every rebalance_every bars, hold the top_n symbols trading furthest above their
+    window-day SMA in equal weight.
+    :return: total return, annualized volatility and max drawdown over rows [start, end).
+    """
+    history = close.iloc[:end]
+    sma = PanelIndicators.sma(history.to_numpy(), window=window)
+    strength = np.nan_to_num(history.to_numpy() / sma - 1, nan=-np.inf)
+    rebalance_rows = np.arange(start, end, rebalance_every)
+    picks = np.argsort(-strength[rebalance_rows], axis=1)[:, :top_n]
+    weights = np.zeros((len(rebalance_rows), close.shape[1]))
+    np.put_along_axis(weights, picks, 1.0 / top_n, axis=1)
+    window_close = history.iloc[start:end]
+    result = WeightBacktester(window_close).run(
+        pd.DataFrame(weights, index=close.index[rebalance_rows], columns=close.columns)
+    )
+    returns = result.percent_returns()
+    return {
+        "total_return": float(result.equity.iloc[-1] / result.equity.iloc[0] - 1),
+        "volatility": float(returns.std() * np.sqrt(252)),
+        "max_drawdown": float(result.max_drawdown()),
+    }
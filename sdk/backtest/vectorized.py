@@ -0,0 +1,177 @@
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.factors.technical_indicators import Metrics
+from sdk.misc.utils import currency
+
+
+class WeightBacktestResult:
+    def __init__(
+        self,
+        equity: pd.Series,
+        cash: pd.Series,
+        turnover: pd.Series,
+        holdings: pd.DataFrame,
+    ):
+        """
+        :param equity: daily portfolio value.
+        :param cash: daily uninvested cash.
+        :param turnover: traded fraction of equity (sum of |weight changes|) on each rebalance date.
+        :param holdings: (fractional) shares held of each symbol from each rebalance date.
+        """
+        self.equity = equity
+        self.cash = cash
+        self.turnover = turnover
+        self.holdings = holdings
+
+    def percent_returns(self, interval: str = "daily") -> pd.Series:
+        return Metrics.percent_returns(self.equity, interval=interval)
+
+    def max_drawdown(self) -> float:
+        return Metrics.max_drawdown(self.equity)
+
+    def __str__(self):
+        return (
+            f"[WeightBacktest] {self.equity.index[0].date()} -> {self.equity.index[-1].date()} | "
+            f"final value {currency(self.equity.iloc[-1])} | "
+            f"max drawdown {self.max_drawdown():.2%} | "
+            f"{len(self.turnover)} rebalances (mean turnover {self.turnover.mean():.2%})"
+        )
+
+    def __repr__(self):
+        return "WeightBacktestResult<equity, cash, turnover, holdings>"
+
+
+class WeightBacktester:
+    """
+    Vectorized backtest for 'target weights on rebalance dates' strategies. Between rebalances each position drifts
+    with its price; on a rebalance date the book is reset to the target weights (whatever isn't allocated sits in
+    cash) and cost_bps is charged on the turnover. Everything is computed with whole-array NumPy operations, and
+    the per-schedule price ratios are cached so sweeping many weight matrices over the same dates is cheap.
+    """
+
+    def __init__(
+        self,
+        close: pd.DataFrame,
+        initial_cash: float = 1_00_000.00,
+        cost_bps: float = 0.0,
+    ):
+        """
+        :param close: (dates x symbols) close prices.
+        :param initial_cash: starting portfolio value.
+        :param cost_bps: transaction cost in basis points of traded value.
+        """
+        self.dates = close.index
+        self.symbols = close.columns
+        self.prices = close.ffill().to_numpy(dtype=np.float64)
+        self.initial_cash = initial_cash
+        self.cost = cost_bps / 10_000
+        self._schedules: Dict[Tuple[int, ...], Tuple[np.ndarray, ...]] = {}
+
+    def _schedule(self, rebalance_rows: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        :return: (segment of each day, prices on rebalance days, daily price relative to the segment's
+        rebalance day, price relative on each rebalance day to the previous one)
+        """
+        key = tuple(rebalance_rows)
+        if key not in self._schedules:
+            segment = (
+                np.searchsorted(
+                    rebalance_rows, np.arange(len(self.dates)), side="right"
+                )
+                - 1
+            )
+            rebalance_prices = self.prices[rebalance_rows]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                relative = self.prices / rebalance_prices[np.maximum(segment, 0)]
+                step = rebalance_prices[1:] / rebalance_prices[:-1]
+            self._schedules[key] = (
+                segment,
+                rebalance_prices,
+                np.nan_to_num(relative, nan=0.0, posinf=0.0),
+                np.nan_to_num(step, nan=0.0, posinf=0.0),
+            )
+        return self._schedules[key]
+
+    def _align_dates(self, dates: pd.Index) -> pd.DatetimeIndex:
+        """
+        :return: dates in the timezone of the price history (searchsorted can't compare naive and aware dates).
+        """
+        dates = pd.DatetimeIndex(dates)
+        tz = getattr(self.dates, "tz", None)
+        if tz is None:
+            return dates.tz_localize(None) if dates.tz is not None else dates
+        return dates.tz_localize(tz) if dates.tz is None else dates.tz_convert(tz)
+
+    def run(self, weights: pd.DataFrame) -> WeightBacktestResult:
+        """
+        :param weights: (rebalance dates x symbols) target weights (fractions of equity, rows summing to <= 1).
+        Rebalance dates that aren't trading days execute on the next trading day. Naive dates are taken to be in
+        the price history's timezone.
+        :return: WeightBacktestResult.
+        """
+        weights = weights.set_axis(self._align_dates(weights.index), axis=0)
+        weights = weights.reindex(columns=self.symbols, fill_value=0.0).sort_index()
+        rebalance_rows = np.searchsorted(self.dates, weights.index, side="left")
+        if rebalance_rows.max(initial=0) >= len(self.dates) or len(
+            np.unique(rebalance_rows)
+        ) != len(rebalance_rows):
+            raise ValueError(
+                "Rebalance dates must map to distinct trading days within the price history."
+            )
+        segment, rebalance_prices, relative, step = self._schedule(rebalance_rows)
+        w = np.nan_to_num(weights.to_numpy(dtype=np.float64))
+        unpriced = np.isnan(rebalance_prices) & (w != 0)
+        if unpriced.any():
+            logger.warning(
+                f"Dropping {int(unpriced.sum())} weights on symbols without a price on their rebalance date."
+            )
+            w[unpriced] = 0.0
+        cash_weight = 1.0 - w.sum(axis=1)
+
+        # growth of each segment's book from its rebalance day to the next one, and the weights it has drifted to.
+        drifted_value = (w[:-1] * step).sum(axis=1) + cash_weight[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drifted = (w[:-1] * step) / drifted_value[:, None]
+        turnover = np.abs(w).sum(axis=1)
+        turnover[1:] = np.abs(w[1:] - np.nan_to_num(drifted)).sum(axis=1)
+        growth = np.concatenate(([1.0], drifted_value)) * (1.0 - self.cost * turnover)
+        book_value = self.initial_cash * np.cumprod(growth)
+
+        active = segment >= 0
+        seg = segment[active]
+        daily_value = (w[seg] * relative[active]).sum(axis=1) + cash_weight[seg]
+        equity = np.full(len(self.dates), self.initial_cash, dtype=np.float64)
+        equity[active] = book_value[seg] * daily_value
+        cash = np.full(len(self.dates), self.initial_cash, dtype=np.float64)
+        cash[active] = book_value[seg] * cash_weight[seg]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            holdings = np.nan_to_num(w * book_value[:, None] / rebalance_prices)
+
+        rebalance_dates = self.dates[rebalance_rows]
+        return WeightBacktestResult(
+            equity=pd.Series(equity, index=self.dates, name="equity"),
+            cash=pd.Series(cash, index=self.dates, name="cash"),
+            turnover=pd.Series(turnover, index=rebalance_dates, name="turnover"),
+            holdings=pd.DataFrame(
+                holdings, index=rebalance_dates, columns=self.symbols
+            ),
+        )
+
+    def __repr__(self):
+        return "WeightBacktester<dates, symbols, prices, initial_cash, cost>"
+
+
+def run_weight_backtest(
+    weights: pd.DataFrame,
+    close: pd.DataFrame,
+    initial_cash: float = 1_00_000.00,
+    cost_bps: float = 0.0,
+) -> WeightBacktestResult:
+    """
+    One-off convenience wrapper around WeightBacktester(close, ...).run(weights).
+    """
+    return WeightBacktester(close, initial_cash=initial_cash, cost_bps=cost_bps).run(
+        weights
+    )
@@ -0,0 +1,111 @@
+"""
+Latency of the dashboard api under concurrent clients, served from a snapshot of synthetic portfolios / prices.
+Each simulated client requests random dashboard endpoints with a pause between requests (--think-ms 0 gives a
+closed loop, which on few cores mostly measures queueing behind the GIL); a fraction revalidate with If-None-Match.
+Run from the repo root:  python -m sdk.benchmarks.bench_api --clients 32 --requests 200
+"""
+
+import argparse
+import concurrent.futures
+import tempfile
+import time
+from timeit import default_timer as timer
+from typing import List
+import numpy as np
+import pandas as pd
+from api import create_app
+from sdk.analytics.dashboard import build_dashboard_snapshot
+from sdk.benchmarks.bench_panel_indicators import random_walk_panel
+from sdk.entities.asset import Holding
+from sdk.entities.portfolio import Portfolio
+from sdk.entities.transaction import MarketBuy
+
+
+def synthetic_portfolios(
+    close: pd.DataFrame, n_portfolios: int, n_holdings: int, seed: int = 0
+) -> List[Portfolio]:
+    rng = np.random.default_rng(seed)
+    portfolios = []
+    for i in range(n_portfolios):
+        symbols = rng.choice(close.columns, n_holdings, replace=False)
+        rows = np.sort(rng.integers(0, len(close.index) - 1, n_holdings))
+        transactions = [
+            MarketBuy(
+                date=close.index[row].to_pydatetime(),
+                symbol=symbol,
+                price=float(close[symbol].iloc[row]),
+                qty=10,
+            )
+            for symbol, row in zip(symbols, rows)
+        ]
+        portfolios.append(
+            Portfolio(
+                f"Bench{i}",
+                free_cash=1_000_000.0 - sum(t.market_value for t in transactions),
+                holdings=[
+                    Holding(symbol=t.symbol, qty_owned=t.qty, date_purchased=t.date)
+                    for t in transactions
+                ],
+                transaction_history=transactions,
+                load_local=False,
+            )
+        )
+    return portfolios
+
+
+def bench(args) -> dict:
+    close = random_walk_panel(args.dates, args.symbols)["Close"]
+    portfolios = synthetic_portfolios(close, args.portfolios, args.holdings)
+    with tempfile.TemporaryDirectory() as path:
+        start = timer()
+        build_dashboard_snapshot(portfolios, close=close, path=path)
+        build_s = timer() - start
+        app = create_app({"DASHBOARD_SNAPSHOT_PATH": path})
+        urls = ["/api/portfolios"] + [
+            f"/api/portfolios/{p.name}/{view}"
+            for p in portfolios
+            for view in ("holdings", "equity")
+        ]
+        urls += [f"/api/indicators/{s}" for s in close.columns[: args.holdings]]
+
+        def client(seed: int) -> List[float]:
+            rng = np.random.default_rng(seed)
+            etags = {}
+            latencies = []
+            with app.test_client() as http:
+                for url in rng.choice(urls, args.requests):
+                    headers = {"Accept-Encoding": "gzip"}
+                    if url in etags and rng.random() < args.revalidate:
+                        headers["If-None-Match"] = etags[url]
+                    started = timer()
+                    response = http.get(url, headers=headers)
+                    response.get_data()
+                    latencies.append(timer() - started)
+                    assert response.status_code in (200, 304), response.status
+                    etags[url] = response.headers["ETag"]
+                    time.sleep(rng.exponential(args.think_ms / 1_000))
+            return latencies
+
+        with concurrent.futures.ThreadPoolExecutor(args.clients) as executor:
+            latencies = np.concatenate(list(executor.map(client, range(args.clients))))
+    return {
+        "build_s": round(build_s, 2),
+        "requests": len(latencies),
+        "p50_ms": round(np.percentile(latencies, 50) * 1_000, 2),
+        "p99_ms": round(np.percentile(latencies, 99) * 1_000, 2),
+        "max_ms": round(latencies.max() * 1_000, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dates", type=int, default=2_520)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--portfolios", type=int, default=20)
+    parser.add_argument("--holdings", type=int, default=25)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--revalidate", type=float, default=0.5)
+    parser.add_argument("--think-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    print(pd.DataFrame([bench(args)]).to_string(index=False))
@@ -0,0 +1,102 @@
+"""
+Point-in-time fundamentals on a synthetic universe: bulk ingestion into the Fundamental table (throwaway SQLite
+file), loading it back, and the vectorized as-of join + valuation ratios against a per-symbol pd.merge_asof loop.
+Run from the repo root:  python -m sdk.benchmarks.bench_fundamentals --years 20 --symbols 500
+"""
+
+import argparse
+import os
+import tempfile
+from timeit import default_timer as timer
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.benchmarks.bench_panel_indicators import random_walk_panel
+from sdk.data import models
+from sdk.factors.fundamental_analysis import (
+    VALUATION_FIELDS,
+    PointInTimeFundamentals,
+    valuation_ratios,
+)
+
+
+def quarterly_fundamentals(close: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    :return: long frame of one filing per symbol and quarter (random 20-60 day reporting delay) for every
+    VALUATION_FIELDS field.
+    """
+    rng = np.random.default_rng(seed)
+    days = close.index.tz_localize(None)
+    quarter_ends = pd.date_range(days[0], days[-1], freq="QE")
+    frames = []
+    for field in VALUATION_FIELDS:
+        n = len(quarter_ends) * len(close.columns)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": np.repeat(close.columns, len(quarter_ends)),
+                    "as_of_date": np.tile(quarter_ends, len(close.columns))
+                    + pd.to_timedelta(rng.integers(20, 60, n), unit="D"),
+                    "field": field,
+                    "value": rng.lognormal(1.0, 0.5, n),
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def merge_asof_ratio(close: pd.DataFrame, fundamentals: pd.DataFrame) -> np.ndarray:
+    """
+    Reference P/E: one pd.merge_asof per symbol (lag 1: strictly after as_of_date).
+    """
+    dates = pd.DataFrame({"date": close.index.tz_localize(None).astype("M8[ns]")})
+    eps = fundamentals[fundamentals["field"] == "eps"].astype({"as_of_date": "M8[ns]"})
+    pe = np.full(close.shape, np.nan)
+    for col, (symbol, rows) in enumerate(eps.groupby("symbol", sort=False)):
+        merged = pd.merge_asof(
+            dates,
+            rows.sort_values("as_of_date"),
+            left_on="date",
+            right_on="as_of_date",
+            allow_exact_matches=False,
+        )
+        column = close.columns.get_loc(symbol)
+        pe[:, column] = close.iloc[:, column].to_numpy() / merged["value"].to_numpy()
+    return pe
+
+
+def bench(years: int, n_symbols: int) -> list:
+    close = random_walk_panel(n_dates=252 * years, n_symbols=n_symbols)["Close"]
+    fundamentals = quarterly_fundamentals(close)
+    rows = []
+
+    def step(name, func):
+        start = timer()
+        result = func()
+        rows.append({"step": name, "seconds": round(timer() - start, 4)})
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models.db.init(os.path.join(tmp, "fundamentals.db"))
+        models.create_table(models.FundamentalModel)
+        step(
+            f"ingest {len(fundamentals)} values",
+            lambda: models.insert_into_fundamental_table(fundamentals),
+        )
+        store = step("load from table", lambda: PointInTimeFundamentals.from_db())
+        models.db.close()
+    ratios = step("as-of join + ratios", lambda: valuation_ratios(close, store))
+    reference = step(
+        "merge_asof per symbol (pe)", lambda: merge_asof_ratio(close, fundamentals)
+    )
+    assert np.allclose(ratios["pe"].to_numpy(), reference, equal_nan=True)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--symbols", type=int, default=500)
+    args = parser.parse_args()
+    logger.remove()
+    print(pd.DataFrame(bench(args.years, args.symbols)).to_string(index=False))
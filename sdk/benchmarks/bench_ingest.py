@@ -0,0 +1,128 @@
+"""
+Ingestion throughput against the local fake quote server: the old pattern (default thread pool, a new session per
+download, no retries, everything collected in memory and inserted at the end) vs IngestionPipeline at a few
+concurrency levels, with injected 429/503s. Writes go to a throwaway database and store.
+Run from the repo root:  python -m sdk.benchmarks.bench_ingest --symbols 500 --workers 8 32
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+from timeit import default_timer as timer
+from typing import List
+import pandas as pd
+from loguru import logger
+from sdk.benchmarks.fake_quote_server import quote_body, start_fake_quote_server
+from sdk.data import models
+from sdk.data.ingest import (
+    IngestionPipeline,
+    RetryPolicy,
+    http_quote_fetcher,
+    store_writer,
+)
+from sdk.data.request_data import make_session
+from sdk.data.storage import ParquetStore
+from sdk.misc.utils import use_threadpool_exec
+
+
+def symbol_universe(n: int) -> List[str]:
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return [
+        letters[i // 676 % 26] + letters[i // 26 % 26] + letters[i % 26] + "X"
+        for i in range(n)
+    ]
+
+
+def baseline(url: str, symbols: List[str], writer) -> dict:
+    fetch = http_quote_fetcher(url)
+
+    def download(symbol: str):
+        try:
+            return fetch(symbol, make_session(pool_size=1))
+        except Exception:
+            return None
+
+    start = timer()
+    results = [r for r in use_threadpool_exec(download, symbols) if r]
+    rows = writer(results)
+    return {
+        "mode": "threadpool, session per call",
+        "workers": min(32, (os.cpu_count() or 1) + 4),
+        "fetched": len(results),
+        "failed": len(symbols) - len(results),
+        "retries": 0,
+        "rows_written": rows,
+        "elapsed_s": round(timer() - start, 2),
+    }
+
+
+def pipeline(url: str, symbols: List[str], writer, workers: int, rate: float) -> dict:
+    metrics = IngestionPipeline(
+        fetch=http_quote_fetcher(url),
+        write=writer,
+        max_workers=workers,
+        rate_limit=rate or None,
+        retry=RetryPolicy(base_delay=0.05, max_delay=1.0),
+        batch_size=50,
+    ).run(symbols)
+    summary = metrics.as_dict()
+    return {
+        "mode": "pipeline",
+        "workers": workers,
+        **{
+            k: summary[k]
+            for k in (
+                "fetched",
+                "failed",
+                "retries",
+                "rows_written",
+                "elapsed_s",
+                "p50_ms",
+                "p95_ms",
+            )
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=252)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.03)
+    parser.add_argument("--throttle-rate", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--rate", type=float, default=0, help="requests/s (0: off)")
+    args = parser.parse_args()
+    logger.remove()
+
+    server = start_fake_quote_server(
+        latency=args.latency_ms / 1_000,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        n_bars=args.bars,
+    )
+    symbols = symbol_universe(args.symbols)
+    for symbol in symbols:
+        quote_body(symbol, args.bars)  # pre-render responses so the server stays cheap.
+    tmp = tempfile.mkdtemp()
+    results = []
+    try:
+        for i, mode in enumerate(["baseline", *args.workers]):
+            models.db.init(os.path.join(tmp, f"bench_{i}.db"))
+            models.create_table(models.CompanyModel, models.PriceBarModel)
+            writer = store_writer(
+                store=ParquetStore(os.path.join(tmp, f"store_{i}")), price_bars=True
+            )
+            if mode == "baseline":
+                results.append(baseline(server.url, symbols, writer))
+            else:
+                results.append(pipeline(server.url, symbols, writer, mode, args.rate))
+            models.db.close_all()
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+    results = pd.DataFrame(results)
+    results["symbols_per_s"] = (results["fetched"] / results["elapsed_s"]).round(1)
+    print(results.to_string(index=False))
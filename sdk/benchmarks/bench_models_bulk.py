@@ -0,0 +1,132 @@
+"""
+Rows/second of the old row-by-row get_or_create()/save() writes vs. the chunked insert_many().on_conflict() upserts
+in sdk.data.models. Runs against a throwaway SQLite file, never the configured database.
+Run from the repo root:  python -m sdk.benchmarks.bench_models_bulk --rows 500 20000
+"""
+
+import argparse
+import os
+import string
+import tempfile
+from datetime import datetime, timedelta
+from timeit import default_timer as timer
+from typing import Callable, List
+import pandas as pd
+from loguru import logger
+from sdk.data import models
+from sdk.entities.asset import Company
+from sdk.entities.transaction import MarketBuy, MarketSell, Transaction
+
+TABLES = [models.CompanyModel, models.TransactionModel]
+
+
+def _symbol(i: int) -> str:
+    letters = string.ascii_uppercase
+    symbol = ""
+    while True:
+        symbol = letters[i % 26] + symbol
+        i = i // 26 - 1
+        if i < 0:
+            return symbol
+
+
+def synthetic_companies(n: int) -> List[Company]:
+    return [
+        Company(
+            symbol=_symbol(i),
+            company_name=f"Company {i}",
+            sector=f"Sector {i % 11}",
+            industry=f"Industry {i % 70}",
+            business_summary="Synthetic company used for benchmarking.",
+            country="United States",
+            employee_count=float(1_000 + i),
+            market_cap=1e9 + i,
+            float_shares=1e8 + i,
+            is_esg_populated=bool(i % 2),
+        )
+        for i in range(n)
+    ]
+
+
+def synthetic_transactions(n: int) -> List[Transaction]:
+    start = datetime(2020, 1, 1)
+    return [
+        (MarketBuy if i % 3 else MarketSell)(
+            date=start + timedelta(seconds=i),
+            symbol=_symbol(i % 500),
+            price=100.0,
+            qty=1 + i % 10,
+        )
+        for i in range(n)
+    ]
+
+
+def row_by_row_companies(*companies: Company) -> None:
+    """The previous insert_into_company_table write path."""
+    with models.db.atomic():
+        for company in companies:
+            model, _ = models.CompanyModel.get_or_create(**vars(company))
+            model.save()
+
+
+def row_by_row_transactions(*transactions: Transaction, portfolio: str) -> None:
+    """The previous insert_into_transactions_table write path (without mutating the transactions)."""
+    with models.db.atomic():
+        for transaction in transactions:
+            row = {k: v for k, v in vars(transaction).items() if k != "market_value"}
+            model, _ = models.TransactionModel.get_or_create(**row, portfolio=portfolio)
+            model.save()
+
+
+def _rate(write: Callable, rows: list, **kwargs) -> float:
+    models.db.drop_tables(TABLES)
+    models.db.create_tables(TABLES)
+    start = timer()
+    write(*rows, **kwargs)
+    return len(rows) / (timer() - start)
+
+
+def bench(n_rows: int) -> pd.DataFrame:
+    companies = synthetic_companies(n_rows)
+    transactions = synthetic_transactions(n_rows)
+    results = []
+    for table, rows, before, after, kwargs in (
+        (
+            "company",
+            companies,
+            row_by_row_companies,
+            models.insert_into_company_table,
+            {},
+        ),
+        (
+            "transaction",
+            transactions,
+            row_by_row_transactions,
+            models.insert_into_transactions_table,
+            {"portfolio": "bench"},
+        ),
+    ):
+        before_rate = _rate(before, rows, **kwargs)
+        after_rate = _rate(after, rows, **kwargs)
+        results.append(
+            {
+                "table": table,
+                "rows": n_rows,
+                "row_by_row_rows_per_s": round(before_rate),
+                "bulk_rows_per_s": round(after_rate),
+                "speedup": round(after_rate / before_rate, 1),
+            }
+        )
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 20_000])
+    args = parser.parse_args()
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp:
+        models.db.init(os.path.join(tmp, "bench.db"))
+        results = pd.concat([bench(n) for n in args.rows], ignore_index=True)
+        models.db.close()
+    print(results.to_string(index=False))
@@ -0,0 +1,109 @@
+"""
+Per-symbol Metrics/TechnicalIndicators loops vs. the PanelIndicators engine on synthetic data.
+Run from the repo root:  python -m sdk.benchmarks.bench_panel_indicators --symbols 500 5000
+"""
+
+import argparse
+from timeit import default_timer as timer
+from typing import Callable, Dict
+import numpy as np
+import pandas as pd
+from sdk.factors.panel_indicators import PanelIndicators
+from sdk.factors.technical_indicators import Metrics, TechnicalIndicators
+
+
+def random_walk_panel(
+    n_dates: int, n_symbols: int, seed: int = 0
+) -> Dict[str, pd.DataFrame]:
+    """
+    :return: Dict[field, (dates x symbols) frame] of synthetic OHLCV data.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2022-12-30", periods=n_dates, tz="America/New_York")
+    symbols = [f"S{i:04d}" for i in range(n_symbols)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_dates, n_symbols)), axis=0))
+    spread = np.abs(rng.normal(0, 0.01, (n_dates, n_symbols)))
+    fields = {
+        "Close": close,
+        "High": close * (1 + spread),
+        "Low": close * (1 - spread),
+        "Volume": rng.integers(100_000, 10_000_000, (n_dates, n_symbols)).astype(
+            np.float64
+        ),
+    }
+    return {f: pd.DataFrame(v, index=dates, columns=symbols) for f, v in fields.items()}
+
+
+def _time(func: Callable) -> float:
+    start = timer()
+    func()
+    return timer() - start
+
+
+def bench(n_dates: int, n_symbols: int) -> pd.DataFrame:
+    panel = random_walk_panel(n_dates, n_symbols)
+    close, high, low, volume = (
+        panel["Close"],
+        panel["High"],
+        panel["Low"],
+        panel["Volume"],
+    )
+    returns = PanelIndicators.percent_returns(close)
+    frames = {
+        s: pd.DataFrame(
+            {"High": high[s], "Low": low[s], "Close": close[s], "Volume": volume[s]}
+        )
+        for s in close.columns
+    }
+    cases = {
+        "percent_returns": (
+            lambda: [Metrics.percent_returns(close[s]) for s in close.columns],
+            lambda: PanelIndicators.percent_returns(close),
+        ),
+        "sma": (
+            lambda: [Metrics.sma(close[s]) for s in close.columns],
+            lambda: PanelIndicators.sma(close),
+        ),
+        "ema": (
+            lambda: [Metrics.ema(close[s]) for s in close.columns],
+            lambda: PanelIndicators.ema(close),
+        ),
+        "rolling_std": (
+            lambda: [Metrics.rolling_std(returns[s]) for s in close.columns],
+            lambda: PanelIndicators.rolling_std(returns),
+        ),
+        "obv": (
+            lambda: [TechnicalIndicators.obv(frames[s]) for s in close.columns],
+            lambda: PanelIndicators.obv(close, volume),
+        ),
+        "ad_line": (
+            lambda: [TechnicalIndicators.ad_line(frames[s]) for s in close.columns],
+            lambda: PanelIndicators.ad_line(high, low, close, volume),
+        ),
+        "atr": (
+            lambda: [TechnicalIndicators.atr(frames[s]) for s in close.columns],
+            lambda: PanelIndicators.atr(high, low, close),
+        ),
+    }
+    rows = []
+    for name, (per_symbol, batched) in cases.items():
+        loop_s, panel_s = _time(per_symbol), _time(batched)
+        rows.append(
+            {
+                "indicator": name,
+                "symbols": n_symbols,
+                "per_symbol_s": round(loop_s, 4),
+                "panel_s": round(panel_s, 4),
+                "speedup": round(loop_s / panel_s, 1),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dates", type=int, default=2_520)
+    parser.add_argument("--symbols", type=int, nargs="+", default=[500, 5_000])
+    args = parser.parse_args()
+    results = pd.concat([bench(args.dates, n) for n in args.symbols], ignore_index=True)
+    print(results.to_string(index=False))
@@ -0,0 +1,69 @@
+"""
+Multi-symbol date-range queries against the PriceBarModel table on a synthetic universe (throwaway SQLite file).
+Run from the repo root:  python -m sdk.benchmarks.bench_price_bars --symbols 500 --years 20
+"""
+
+import argparse
+import os
+import tempfile
+from timeit import default_timer as timer
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.benchmarks.bench_panel_indicators import random_walk_panel
+from sdk.data import models
+
+
+def bench(n_symbols: int, n_years: int, repeats: int = 20) -> pd.DataFrame:
+    panel = random_walk_panel(252 * n_years, n_symbols)
+    fields = [field for field in models.PRICE_BAR_FIELDS if field in panel]
+    market_data = {
+        symbol: pd.DataFrame({field: panel[field][symbol] for field in fields})
+        for symbol in panel["Close"].columns
+    }
+    start = timer()
+    n_bars = models.insert_into_price_bar_table(market_data)
+    load_s = timer() - start
+
+    dates = panel["Close"].index
+    rng = np.random.default_rng(0)
+    rows = [{"query": "bulk load", "bars": n_bars, "seconds": round(load_s, 2)}]
+    for n_query_symbols, n_days in (
+        (1, len(dates)),
+        (50, 252),
+        (50, 252 * 5),
+        (500, 252),
+    ):
+        timings = []
+        for _ in range(repeats):
+            symbols = list(
+                rng.choice(panel["Close"].columns, n_query_symbols, replace=False)
+            )
+            first = int(rng.integers(0, len(dates) - n_days + 1))
+            start = timer()
+            result = models.fetch_price_panel(
+                symbols, dates[first], dates[first + n_days - 1]
+            )
+            timings.append(timer() - start)
+        rows.append(
+            {
+                "query": f"{n_query_symbols} symbols x {n_days} days",
+                "bars": result.size,
+                "seconds": round(float(np.median(timings)), 4),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    args = parser.parse_args()
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp:
+        models.db.init(os.path.join(tmp, "bench.db"))
+        models.db.create_tables([models.PriceBarModel])
+        results = bench(args.symbols, args.years)
+        models.db.close()
+    print(results.to_string(index=False))
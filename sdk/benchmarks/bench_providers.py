@@ -0,0 +1,80 @@
+"""
+Offline load test of the data path on a synthetic universe: generating history, the initial refresh into a fresh
+store, then replaying sessions one at a time through the incremental refresh job.
+Run from the repo root:  python -m sdk.benchmarks.bench_providers --symbols 10000 --years 1 --sessions 5
+"""
+
+import argparse
+import tempfile
+from timeit import default_timer as timer
+import pandas as pd
+from loguru import logger
+from sdk.data.providers import ReplayProvider, SyntheticProvider
+from sdk.data.refresh import refresh_universe
+from sdk.data.storage import CsvStore, ParquetStore
+
+
+def bench(n_symbols: int, years: int, sessions: int, backend: str) -> list:
+    provider = SyntheticProvider(
+        n_symbols=n_symbols,
+        start_date=pd.Timestamp("2022-12-30") - pd.DateOffset(years=years),
+        end_date="2022-12-30",
+    )
+    rows = []
+    start = timer()
+    provider.history(provider.symbols)
+    elapsed = timer() - start
+    rows.append(
+        {"step": "generate history", "seconds": elapsed, "per_s": n_symbols / elapsed}
+    )
+
+    replay = ReplayProvider(provider, provider.dates[-1 - sessions])
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ParquetStore(tmp) if backend == "parquet" else CsvStore(tmp)
+        start = timer()
+        refresh_universe(
+            provider.symbols, store=store, provider=replay, today=replay.clock.date()
+        )
+        elapsed = timer() - start
+        rows.append(
+            {
+                "step": "initial refresh",
+                "seconds": elapsed,
+                "per_s": n_symbols / elapsed,
+            }
+        )
+        for _ in range(sessions):
+            replay.advance()
+            start = timer()
+            appended = refresh_universe(
+                provider.symbols,
+                store=store,
+                provider=replay,
+                today=replay.clock.date(),
+            )
+            elapsed = timer() - start
+            assert sum(appended.values()) == n_symbols
+            rows.append(
+                {
+                    "step": f"refresh {replay.clock.date()}",
+                    "seconds": elapsed,
+                    "per_s": n_symbols / elapsed,
+                }
+            )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=2_000)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--backend", choices=("parquet", "csv"), default="parquet")
+    args = parser.parse_args()
+    logger.remove()
+    results = pd.DataFrame(bench(args.symbols, args.years, args.sessions, args.backend))
+    print(
+        results.round(2)
+        .rename(columns={"per_s": "symbols_per_s"})
+        .to_string(index=False)
+    )
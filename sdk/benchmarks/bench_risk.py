@@ -0,0 +1,78 @@
+"""
+Risk analytics on a large synthetic universe: seeding rolling / EWMA covariances from the full history, the O(N^2)
+incremental daily update against recomputing from history, and VaR / risk contributions of an equal weight book.
+Run from the repo root:  python -m sdk.benchmarks.bench_risk --years 20 --symbols 500
+"""
+
+import argparse
+from timeit import default_timer as timer
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.analytics.risk import (
+    EWMACovariance,
+    PortfolioRisk,
+    RollingCovariance,
+    returns_panel,
+)
+from sdk.benchmarks.bench_panel_indicators import random_walk_panel
+
+
+def timed_ms(func, repeat: int = 1) -> float:
+    start = timer()
+    for _ in range(repeat):
+        func()
+    return (timer() - start) / repeat * 1_000
+
+
+def bench(years: int, n_symbols: int, window: int, halflife: float) -> list:
+    returns = returns_panel(
+        random_walk_panel(n_dates=252 * years + 1, n_symbols=n_symbols)["Close"]
+    )
+    history, today = returns.iloc[:-1], returns.iloc[-1]
+    rolling = RollingCovariance.from_returns(history, window=window)
+    ewma = EWMACovariance.from_returns(history, halflife=halflife)
+    weights = pd.Series(1 / n_symbols, index=returns.columns)
+    return [
+        {
+            "step": "rolling: seed from history",
+            "ms": timed_ms(lambda: RollingCovariance.from_returns(history, window)),
+        },
+        {
+            "step": "rolling: daily update",
+            "ms": timed_ms(lambda: rolling.update(today), 50),
+        },
+        {
+            "step": "rolling: recompute (np.cov)",
+            "ms": timed_ms(
+                lambda: np.cov(returns.iloc[-window:].to_numpy(), rowvar=False)
+            ),
+        },
+        {
+            "step": "ewma: seed from history",
+            "ms": timed_ms(lambda: EWMACovariance.from_returns(history, halflife)),
+        },
+        {"step": "ewma: daily update", "ms": timed_ms(lambda: ewma.update(today), 50)},
+        {
+            "step": "var + contributions",
+            "ms": timed_ms(
+                lambda: (lambda risk: (risk.summary(), risk.contributions()))(
+                    PortfolioRisk(
+                        weights, returns.iloc[-window:], covariance=ewma.values
+                    )
+                )
+            ),
+        },
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--window", type=int, default=252)
+    parser.add_argument("--halflife", type=float, default=63)
+    args = parser.parse_args()
+    logger.remove()
+    rows = bench(args.years, args.symbols, args.window, args.halflife)
+    print(pd.DataFrame(rows).round(3).to_string(index=False))
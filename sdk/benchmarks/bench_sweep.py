@@ -0,0 +1,46 @@
+"""
+Wall time of a walk-forward ParameterSweep as the process pool grows - should fall close to 1 / workers.
+Run from the repo root:  python -m sdk.benchmarks.bench_sweep --workers 1 2 4 8
+"""
+
+import argparse
+import os
+from timeit import default_timer as timer
+import pandas as pd
+from sdk.backtest.sweep import ParameterSweep, sma_trend_objective, walk_forward_splits
+from sdk.benchmarks.bench_panel_indicators import random_walk_panel
+
+GRID = {
+    "window": [20, 50, 100, 150, 200],
+    "rebalance_every": [5, 10, 21, 42],
+    "top_n": [10, 20, 50],
+}
+
+
+def bench(n_dates: int, n_symbols: int, workers: int) -> dict:
+    close = random_walk_panel(n_dates, n_symbols)["Close"]
+    sweep = ParameterSweep(
+        sma_trend_objective,
+        GRID,
+        close,
+        splits=walk_forward_splits(n_dates, train_size=756, test_size=252),
+        max_workers=workers,
+    )
+    start = timer()
+    results = sweep.run()
+    return {
+        "workers": workers,
+        "tasks": len(results),
+        "wall_s": round(timer() - start, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dates", type=int, default=2_520)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count()])
+    args = parser.parse_args()
+    results = pd.DataFrame([bench(args.dates, args.symbols, w) for w in args.workers])
+    results["speedup"] = (results["wall_s"].iloc[0] / results["wall_s"]).round(2)
+    print(results.to_string(index=False))
@@ -0,0 +1,70 @@
+"""
+Company screening: a list comprehension over Company objects (the old PortfolioBuilder filters) vs the bitset
+screens of CompanyUniverse, on deterministic synthetic companies.
+Run from the repo root:  python -m sdk.benchmarks.bench_universe --symbols 500 5000
+"""
+
+import argparse
+from timeit import default_timer as timer
+from typing import Callable
+import pandas as pd
+from loguru import logger
+from sdk.data.providers import SyntheticProvider
+from sdk.data.universe import CompanyUniverse
+
+
+def per_call_us(func: Callable, repeat: int) -> float:
+    func()
+    start = timer()
+    for _ in range(repeat):
+        func()
+    return (timer() - start) / repeat * 1e6
+
+
+def bench(n_symbols: int, repeat: int) -> list:
+    provider = SyntheticProvider(n_symbols=n_symbols)
+    companies = provider.companies(provider.symbols)
+    start = timer()
+    universe = CompanyUniverse(companies)
+    build_ms = (timer() - start) * 1_000
+    sector = universe.unique("sector")[0]
+
+    def scan():
+        return [
+            c.symbol
+            for c in companies
+            if c.sector == sector
+            and c.country == "United States"
+            and c.market_cap is not None
+            and c.market_cap >= 10e9
+        ]
+
+    def indexed():
+        return universe.screen(
+            sector=sector, country="United States", market_cap=(10e9, None)
+        )
+
+    def indexed_symbols():
+        return universe.select(indexed())
+
+    assert scan() == indexed_symbols()
+    return [
+        {
+            "symbols": n_symbols,
+            "matches": universe.count(indexed()),
+            "build_ms": round(build_ms, 2),
+            "scan_us": per_call_us(scan, repeat),
+            "screen_us": per_call_us(indexed, repeat),
+            "screen_and_select_us": per_call_us(indexed_symbols, repeat),
+        }
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, nargs="+", default=[500, 5_000])
+    parser.add_argument("--repeat", type=int, default=2_000)
+    args = parser.parse_args()
+    logger.remove()
+    rows = [row for n in args.symbols for row in bench(n, args.repeat)]
+    print(pd.DataFrame(rows).round(1).to_string(index=False))
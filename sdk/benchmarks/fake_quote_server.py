@@ -0,0 +1,167 @@
+"""
+Local stand-in for the quote provider: serves GET /quote/<SYMBOL> in the format read by ingest.http_quote_fetcher,
+with deterministic synthetic metadata and daily bars, configurable latency and injected 429 / 503 failures.
+Run from the repo root:  python -m sdk.benchmarks.fake_quote_server --port 8765 --latency-ms 50 --error-rate 0.05
+"""
+
+import argparse
+import functools
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+SECTORS = ("Technology", "Healthcare", "Financial Services", "Energy", "Utilities")
+
+
+def quote_payload(symbol: str, n_bars: int) -> dict:
+    """
+    :return: deterministic metadata and n_bars of daily OHLCV for symbol.
+    """
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    dates = pd.bdate_range(end="2022-12-30", periods=n_bars, tz="America/New_York")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+    spread = np.abs(rng.normal(0, 0.01, n_bars))
+    sector = SECTORS[rng.integers(len(SECTORS))]
+    return {
+        "metadata": {
+            "symbol": symbol,
+            "longName": f"{symbol} Holdings Inc.",
+            "sector": sector,
+            "industry": f"{sector} Services",
+            "longBusinessSummary": f"Synthetic company {symbol}.",
+            "country": "United States",
+            "fullTimeEmployees": int(rng.integers(100, 100_000)),
+            "marketCap": float(rng.uniform(1e9, 1e12)),
+            "floatShares": float(rng.uniform(1e7, 1e10)),
+            "isEsgPopulated": False,
+        },
+        "bars": {
+            "Date": [d.isoformat() for d in dates],
+            "Open": np.round(close * (1 + rng.normal(0, 0.005, n_bars)), 4).tolist(),
+            "High": np.round(close * (1 + spread), 4).tolist(),
+            "Low": np.round(close * (1 - spread), 4).tolist(),
+            "Close": np.round(close, 4).tolist(),
+            "Volume": rng.integers(100_000, 10_000_000, n_bars).tolist(),
+            "Dividends": [0.0] * n_bars,
+            "Stock Splits": [0.0] * n_bars,
+        },
+    }
+
+
+@functools.lru_cache(maxsize=20_000)
+def quote_body(symbol: str, n_bars: int) -> bytes:
+    # the server should cost next to nothing next to the client it is benchmarking.
+    return json.dumps(quote_payload(symbol, n_bars)).encode()
+
+
+class FakeQuoteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        latency: float = 0.05,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        n_bars: int = 252,
+        seed: int = 0,
+        symbol_statuses: Optional[Dict[str, int]] = None,
+    ):
+        """
+        :param latency: seconds each response is delayed (network + provider time).
+        :param error_rate: fraction of requests answered 503.
+        :param throttle_rate: fraction of requests answered 429.
+        :param n_bars: daily bars per symbol.
+        :param symbol_statuses: symbol -> status every request for it is answered with (e.g. {"BAD": 403}).
+        """
+        super().__init__(address, _QuoteHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.n_bars = n_bars
+        self.symbol_statuses = symbol_statuses or {}
+        self.requests = 0
+        self.statuses: Counter = Counter()  # responses sent, by status.
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> float:
+        with self._lock:
+            self.requests += 1
+            return self._rng.random()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _QuoteHandler(BaseHTTPRequestHandler):
+    # keep-alive, so the pipeline's pooled connections are reused.
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server: FakeQuoteServer = self.server
+        time.sleep(server.latency)
+        draw = server.draw()
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "quote":
+            return self._send(404, {"error": "not found"})
+        if parts[1].upper() in server.symbol_statuses:
+            return self._send(
+                server.symbol_statuses[parts[1].upper()], {"error": "forced"}
+            )
+        if draw < server.throttle_rate:
+            return self._send(429, {"error": "too many requests"})
+        if draw < server.throttle_rate + server.error_rate:
+            return self._send(503, {"error": "unavailable"})
+        self._send(200, quote_body(parts[1].upper(), server.n_bars))
+
+    def _send(self, status: int, payload) -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        with self.server._lock:
+            self.server.statuses[status] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def start_fake_quote_server(port: int = 0, **kwargs) -> FakeQuoteServer:
+    """
+    :param port: port to listen on (0 picks a free one).
+    :param kwargs: passed to FakeQuoteServer.
+    :return: running server (serving from a daemon thread) - call shutdown() when done.
+    """
+    server = FakeQuoteServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--bars", type=int, default=252)
+    args = parser.parse_args()
+    server = FakeQuoteServer(
+        ("127.0.0.1", args.port),
+        latency=args.latency_ms / 1_000,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        n_bars=args.bars,
+    )
+    print(f"Serving fake quotes on {server.url}/quote/<SYMBOL>")
+    server.serve_forever()
@@ -0,0 +1,562 @@
+"""
+Reproducible benchmark suite on synthetic data: csv loading, every Metrics / TechnicalIndicators method, models
+insert/fetch throughput and portfolio valuation. Reports ops/sec, p50/p95 latency per call and peak traced memory,
+and saves everything to JSON so runs can be compared for regressions.
+Run from the repo root:
+    python -m sdk.benchmarks.suite                                   # full suite -> sdk/benchmarks/results/
+    python -m sdk.benchmarks.suite --groups indicators --sizes 1000  # subset
+    python -m sdk.benchmarks.suite --baseline results/old.json       # run, then compare against an earlier run
+    python -m sdk.benchmarks.suite --compare old.json new.json       # compare two saved runs
+"""
+
+import argparse
+import contextlib
+import inspect
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from timeit import default_timer as timer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.analytics.valuation import PortfolioValuation
+from sdk.benchmarks.bench_models_bulk import (
+    synthetic_companies,
+    synthetic_transactions,
+)
+from sdk.benchmarks.bench_panel_indicators import random_walk_panel
+from sdk.data import models, request_data
+from sdk.data.request_data import load_ticker_data_csv
+from sdk.data.storage import MARKET_TZ, CsvStore
+from sdk.entities.asset import Holding, Stock
+from sdk.entities.portfolio import Portfolio
+from sdk.entities.transaction import MarketBuy
+from sdk.factors.technical_indicators import Metrics, TechnicalIndicators
+
+module_path = pathlib.Path(__file__).parent.resolve()
+RESULTS_PATH = os.path.join(module_path, "results")
+
+GROUPS = ("csv", "indicators", "models", "valuation")
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_DB_ROWS = (1_000, 10_000)
+DEFAULT_HOLDINGS = (10, 100, 1_000)
+
+
+class BenchmarkCase:
+    def __init__(
+        self,
+        group: str,
+        name: str,
+        func: Callable,
+        params: Optional[Dict] = None,
+        ops: int = 1,
+    ):
+        """
+        :param group: suite group (csv, indicators, models, valuation).
+        :param name: what is being measured.
+        :param func: zero-argument callable - one call is one sample.
+        :param params: size parameters, part of the case's identity when comparing runs.
+        :param ops: items processed per call (rows, bars, ...) - ops/sec counts these.
+        """
+        self.group = group
+        self.name = name
+        self.func = func
+        self.params = params or {}
+        self.ops = ops
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.group}/{self.name}[{params}]"
+
+    def __repr__(self):
+        return "BenchmarkCase<group, name, func, params, ops>"
+
+
+def run_case(
+    case: BenchmarkCase,
+    min_time: float = 0.5,
+    min_calls: int = 5,
+    max_calls: int = 10_000,
+    warmup: int = 1,
+) -> Dict:
+    """
+    Time single calls until both min_time and min_calls are reached (or max_calls), then make one more call under
+    tracemalloc for peak memory - kept out of the timed calls, since tracing slows allocation-heavy code down.
+    :return: result row for the case.
+    """
+    for _ in range(warmup):
+        case.func()
+    latencies = []
+    started = timer()
+    while len(latencies) < max_calls and (
+        len(latencies) < min_calls or timer() - started < min_time
+    ):
+        start = timer()
+        case.func()
+        latencies.append(timer() - start)
+    latencies = np.array(latencies)
+    tracemalloc.start()
+    try:
+        case.func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "key": case.key,
+        "group": case.group,
+        "name": case.name,
+        "params": case.params,
+        "calls": len(latencies),
+        "ops_per_call": case.ops,
+        "ops_per_sec": float(case.ops * len(latencies) / latencies.sum()),
+        "mean_ms": float(latencies.mean() * 1_000),
+        "p50_ms": float(np.percentile(latencies, 50) * 1_000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1_000),
+        "peak_mem_kb": round(peak / 1_024, 1),
+    }
+
+
+def synthetic_bars(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    """
+    :return: n_bars of minute OHLCV (minute bars so 100k bars stay within one DST period).
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(
+        "2022-03-14 09:30", periods=n_bars, freq="min", tz=MARKET_TZ, name="Date"
+    )
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+    spread = np.abs(rng.normal(0, 0.001, n_bars))
+    return pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 0.0005, n_bars)),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Volume": rng.integers(1_000, 100_000, n_bars).astype(np.float64),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+
+
+@contextlib.contextmanager
+def csv_cases(sizes: Sequence[int], **_) -> Iterator[List[BenchmarkCase]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CsvStore(tmp)
+        symbols = {n: f"B{i}" for i, n in enumerate(sizes)}
+        for n, symbol in symbols.items():
+            store.save(symbol, synthetic_bars(n))
+        # load_ticker_data_csv reads from TICKER_DATA_PATH - point it at the synthetic files for the duration.
+        ticker_data_path = request_data.TICKER_DATA_PATH
+        request_data.TICKER_DATA_PATH = tmp
+        try:
+            yield [
+                BenchmarkCase(
+                    "csv",
+                    "load_ticker_data_csv",
+                    lambda symbol=symbol: load_ticker_data_csv(symbol),
+                    {"bars": n},
+                    ops=n,
+                )
+                for n, symbol in symbols.items()
+            ]
+        finally:
+            request_data.TICKER_DATA_PATH = ticker_data_path
+
+
+# first parameter name of each indicator method -> input it takes.
+_INDICATOR_INPUTS = {
+    "prices_or_values": lambda bars: bars["Close"],
+    "pct_returns": lambda bars: bars["Close"].pct_change().fillna(0),
+    "prices_and_volume": lambda bars: bars[["Close", "Volume"]],
+    "hlcv_price_data": lambda bars: bars[["High", "Low", "Close", "Volume"]],
+    "hlc_price_data": lambda bars: bars[["High", "Low", "Close"]],
+}
+
+
+def indicator_methods() -> List[Callable]:
+    """
+    :return: every public Metrics / TechnicalIndicators classmethod.
+    """
+    return [
+        getattr(cls, name)
+        for cls in (Metrics, TechnicalIndicators)
+        for name, member in vars(cls).items()
+        if isinstance(member, classmethod) and not name.startswith("_")
+    ]
+
+
+@contextlib.contextmanager
+def indicator_cases(sizes: Sequence[int], **_) -> Iterator[List[BenchmarkCase]]:
+    cases = []
+    for n in sizes:
+        bars = synthetic_bars(
+            n
+        )  # no attrs['symbol'], so the indicator cache is bypassed.
+        for method in indicator_methods():
+            first = next(iter(inspect.signature(method).parameters))
+            data = _INDICATOR_INPUTS[first](bars)
+            cases.append(
+                BenchmarkCase(
+                    "indicators",
+                    method.__qualname__,
+                    lambda method=method, data=data: method(data),
+                    {"bars": n},
+                    ops=n,
+                )
+            )
+    yield cases
+
+
+@contextlib.contextmanager
+def models_cases(db_rows: Sequence[int], **_) -> Iterator[List[BenchmarkCase]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        models.db.init(os.path.join(tmp, "bench.db"))
+        models.create_table(
+            models.CompanyModel, models.TransactionModel, models.PriceBarModel
+        )
+        cases = []
+        for n in db_rows:
+            companies = synthetic_companies(n)
+            transactions = synthetic_transactions(n)
+            panel = random_walk_panel(252, max(1, n // 252), seed=n)
+            bars = {
+                symbol: pd.DataFrame(
+                    {field: panel[field][symbol] for field in ("Close", "High", "Low")}
+                )
+                for symbol in panel["Close"].columns
+            }
+            n_bars = sum(len(frame.index) for frame in bars.values())
+            portfolio = f"bench_{n}"
+            cases += [
+                BenchmarkCase(
+                    "models",
+                    "insert_into_company_table",
+                    lambda companies=companies: models.insert_into_company_table(
+                        *companies
+                    ),
+                    {"rows": n},
+                    ops=n,
+                ),
+                BenchmarkCase(
+                    "models",
+                    "fetch_from_company_table",
+                    lambda companies=companies: models.fetch_from_company_table(
+                        *[c.symbol for c in companies]
+                    ),
+                    {"rows": n},
+                    ops=n,
+                ),
+                BenchmarkCase(
+                    "models",
+                    "insert_into_transactions_table",
+                    lambda t=transactions, p=portfolio: models.insert_into_transactions_table(
+                        *t, portfolio=p
+                    ),
+                    {"rows": n},
+                    ops=n,
+                ),
+                BenchmarkCase(
+                    "models",
+                    "fetch_from_transactions_table",
+                    lambda p=portfolio: models.fetch_from_transactions_table(
+                        portfolio=p
+                    ),
+                    {"rows": n},
+                    ops=n,
+                ),
+                BenchmarkCase(
+                    "models",
+                    "insert_into_price_bar_table",
+                    lambda bars=bars: models.insert_into_price_bar_table(bars),
+                    {"rows": n_bars},
+                    ops=n_bars,
+                ),
+                BenchmarkCase(
+                    "models",
+                    "fetch_price_panel",
+                    lambda symbols=list(bars): models.fetch_price_panel(symbols),
+                    {"rows": n_bars},
+                    ops=n_bars,
+                ),
+            ]
+        try:
+            yield cases
+        finally:
+            models.db.close_all()
+
+
+def synthetic_portfolio(close: pd.DataFrame, seed: int = 0) -> Portfolio:
+    """
+    :return: portfolio holding every column of close, each bought once on a random date.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(close.index), len(close.columns))
+    transactions = sorted(
+        (
+            MarketBuy(
+                date=close.index[row].to_pydatetime(),
+                symbol=symbol,
+                price=float(close[symbol].iloc[row]),
+                qty=10,
+            )
+            for symbol, row in zip(close.columns, rows)
+        ),
+        key=lambda t: t.date,
+    )
+    holdings = [
+        Holding(
+            symbol=t.symbol,
+            stock=Stock(
+                t.symbol,
+                market_data=close[[t.symbol]].rename(columns={t.symbol: "Close"}),
+            ),
+            qty_owned=t.qty,
+            date_purchased=t.date,
+        )
+        for t in transactions
+    ]
+    return Portfolio(
+        f"bench_{len(holdings)}",
+        free_cash=sum(t.market_value for t in transactions),
+        holdings=holdings,
+        transaction_history=transactions,
+        load_local=False,
+    )
+
+
+@contextlib.contextmanager
+def valuation_cases(holdings: Sequence[int], **_) -> Iterator[List[BenchmarkCase]]:
+    cases = []
+    for n in holdings:
+        close = random_walk_panel(2_520, n, seed=n)["Close"]
+        portfolio = synthetic_portfolio(close)
+        dates = close.index[::21]
+        cases += [
+            BenchmarkCase(
+                "valuation",
+                "Portfolio.get_total_value",
+                portfolio.get_total_value,
+                {"holdings": n},
+                ops=n,
+            ),
+            BenchmarkCase(
+                "valuation",
+                "Portfolio.get_values_of_holdings",
+                lambda p=portfolio, dates=dates: p.get_values_of_holdings(dates),
+                {"holdings": n, "dates": len(dates)},
+                ops=n * len(dates),
+            ),
+            BenchmarkCase(
+                "valuation",
+                "PortfolioValuation.from_portfolio",
+                lambda p=portfolio, close=close: PortfolioValuation.from_portfolio(
+                    p, close=close
+                ).equity,
+                {"holdings": n, "dates": len(close.index)},
+                ops=n * len(close.index),
+            ),
+        ]
+    yield cases
+
+
+GROUP_CASES = {
+    "csv": csv_cases,
+    "indicators": indicator_cases,
+    "models": models_cases,
+    "valuation": valuation_cases,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=module_path,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    groups: Sequence[str] = GROUPS,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    db_rows: Sequence[int] = DEFAULT_DB_ROWS,
+    holdings: Sequence[int] = DEFAULT_HOLDINGS,
+    match: Optional[str] = None,
+    min_time: float = 0.5,
+) -> Dict:
+    """
+    :param groups: suite groups to run.
+    :param sizes: bar counts for the csv and indicator groups.
+    :param db_rows: row counts for the models group.
+    :param holdings: holding counts for the valuation group.
+    :param match: optional substring a case key must contain.
+    :param min_time: seconds of timed calls per case (at least 5 calls).
+    :return: {"meta": run metadata, "results": result rows}.
+    """
+    results = []
+    for group in groups:
+        with GROUP_CASES[group](
+            sizes=sizes, db_rows=db_rows, holdings=holdings
+        ) as cases:
+            for case in cases:
+                if match and match not in case.key:
+                    continue
+                try:
+                    result = run_case(case, min_time=min_time)
+                except Exception as err:
+                    # keep going - a broken case is recorded (and skipped when comparing) rather than ending the run.
+                    logger.warning(f"{case.key} failed: {err!r}")
+                    results.append({"key": case.key, "error": repr(err)})
+                    continue
+                print(
+                    f"{case.key:<70} {result['ops_per_sec']:>14,.0f} ops/s "
+                    f"p50 {result['p50_ms']:>9.3f}ms p95 {result['p95_ms']:>9.3f}ms "
+                    f"peak {result['peak_mem_kb']:>10,.0f}KiB"
+                )
+                results.append(result)
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "min_time": min_time,
+        },
+        "results": results,
+    }
+
+
+def save_results(run: Dict, path: Optional[str] = None) -> str:
+    """
+    :param path: output file (default results/<timestamp>_<commit>.json next to this module).
+    :return: path written.
+    """
+    if path is None:
+        os.makedirs(RESULTS_PATH, exist_ok=True)
+        stamp = run["meta"]["created"].replace(":", "").replace("-", "")
+        path = os.path.join(
+            RESULTS_PATH, f"{stamp}_{run['meta']['commit'] or 'nocommit'}.json"
+        )
+    with open(path, "w") as out:
+        json.dump(run, out, indent=1)
+    return path
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.10) -> pd.DataFrame:
+    """
+    :param baseline: earlier run (as saved by save_results).
+    :param current: run to check.
+    :param threshold: relative p50 slowdown reported as a regression (0.10 = 10% slower).
+    :return: one row per case present in both runs, slowest changes first.
+    """
+    base = {row["key"]: row for row in baseline["results"]}
+    rows = []
+    for row in current["results"]:
+        before = base.get(row["key"])
+        if before is None or "error" in before or "error" in row:
+            continue
+        change = row["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        rows.append(
+            {
+                "case": row["key"],
+                "base_p50_ms": round(before["p50_ms"], 3),
+                "p50_ms": round(row["p50_ms"], 3),
+                "p50_change": f"{change:+.1%}",
+                "peak_mem_change": (
+                    f"{row['peak_mem_kb'] / before['peak_mem_kb'] - 1:+.1%}"
+                    if before["peak_mem_kb"]
+                    else "n/a"
+                ),
+                "regression": change > threshold,
+                "_change": change,
+            }
+        )
+    if not rows:
+        return pd.DataFrame(rows)
+    return (
+        pd.DataFrame(rows)
+        .sort_values("_change", ascending=False)
+        .drop(columns="_change")
+        .reset_index(drop=True)
+    )
+
+
+def _load(path: str) -> Dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def _report(comparison: pd.DataFrame, fail: bool) -> None:
+    if comparison.empty:
+        print("No cases in common.")
+        return
+    print(comparison.to_string(index=False))
+    regressions = int(comparison["regression"].sum())
+    print(f"{regressions} regression(s) in {len(comparison)} cases.")
+    if fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--db-rows", type=int, nargs="+", default=list(DEFAULT_DB_ROWS))
+    parser.add_argument(
+        "--holdings", type=int, nargs="+", default=list(DEFAULT_HOLDINGS)
+    )
+    parser.add_argument("--match", help="only run cases whose key contains this")
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument(
+        "--output", help="results file (default sdk/benchmarks/results/)"
+    )
+    parser.add_argument("--baseline", help="saved run to compare this run against")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    if args.compare:
+        _report(
+            compare(_load(args.compare[0]), _load(args.compare[1]), args.threshold),
+            args.fail_on_regression,
+        )
+        sys.exit(0)
+    run = run_suite(
+        args.groups,
+        args.sizes,
+        args.db_rows,
+        args.holdings,
+        match=args.match,
+        min_time=args.min_time,
+    )
+    print(f"Saved results to {save_results(run, args.output)}")
+    if args.baseline:
+        _report(
+            compare(_load(args.baseline), run, args.threshold), args.fail_on_regression
+        )
+    failed = [row["key"] for row in run["results"] if "error" in row]
+    if failed:
+        print(f"{len(failed)} case(s) failed: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,183 @@
+import concurrent.futures
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+from loguru import logger
+from playhouse.pool import PooledSqliteDatabase
+
+# WAL lets readers run alongside the writer; the rest trades a little durability on power loss for bulk speed.
+DB_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 30_000,  # ms a connection waits on another process' lock before 'database is locked'
+    "cache_size": -64 * 1_024,  # KiB
+    "mmap_size": 256 * 1_024 * 1_024,
+    "temp_store": "memory",
+}
+
+
+class ManagedSqliteDatabase(PooledSqliteDatabase):
+    """
+    Pooled SQLite database for concurrent use. Peewee keeps one connection per thread; read_scope() checks a
+    connection out of the pool for the duration of a block, and write_scope() additionally serializes writers
+    within the process behind one lock and an IMMEDIATE transaction (so writers queue up instead of failing with
+    'database is locked' half way through). WAL mode keeps readers unblocked while a write is in progress.
+    """
+
+    def __init__(
+        self,
+        database: Optional[str],
+        max_connections: int = 32,
+        wait_timeout: float = 30.0,
+        **kwargs,
+    ):
+        """
+        :param database: path to the SQLite file.
+        :param max_connections: pooled connections (roughly: threads using the database at once).
+        :param wait_timeout: seconds a thread waits for a free pooled connection.
+        :param kwargs: passed through to SqliteDatabase (e.g. pragmas).
+        """
+        kwargs.setdefault("pragmas", DB_PRAGMAS)
+        # pooled connections are handed to whichever thread asks next.
+        kwargs.setdefault("check_same_thread", False)
+        super().__init__(
+            database, max_connections=max_connections, timeout=wait_timeout, **kwargs
+        )
+        self.write_lock = threading.RLock()
+        self._write_queue: Optional[WriteQueue] = None
+
+    def init(self, database: Optional[str], **kwargs) -> None:
+        """
+        Point the database at another file. Idle pooled connections are to the old file, so they are closed
+        rather than handed out again.
+        """
+        if hasattr(self, "deferred"):  # set by the first init, from __init__.
+            self.close_all()
+        super().init(database, **kwargs)
+
+    @contextmanager
+    def read_scope(self) -> Iterator["ManagedSqliteDatabase"]:
+        """
+        Hold a pooled connection for the block, returning it to the pool afterwards unless the thread already
+        had one open (so scopes nest).
+        """
+        if not self.is_closed():
+            yield self
+            return
+        self.connect()
+        try:
+            yield self
+        finally:
+            self.close()
+
+    @contextmanager
+    def write_scope(self) -> Iterator["ManagedSqliteDatabase"]:
+        """
+        Run the block as one transaction, serialized with every other write_scope in this process. The
+        transaction takes SQLite's write lock up front (BEGIN IMMEDIATE), so it either waits for other processes'
+        writers (busy_timeout) or proceeds - it can't deadlock upgrading from a read. Nested scopes are savepoints.
+        """
+        with self.write_lock, self.read_scope(), self.atomic(lock_type="IMMEDIATE"):
+            yield self
+
+    @property
+    def write_queue(self) -> "WriteQueue":
+        """
+        :return: this database's background WriteQueue (started on first use).
+        """
+        with self.write_lock:
+            if self._write_queue is None or not self._write_queue.is_alive():
+                self._write_queue = WriteQueue(self)
+        return self._write_queue
+
+    def __repr__(self):
+        return (
+            "ManagedSqliteDatabase<database, max_connections, write_lock, write_queue>"
+        )
+
+
+class WriteQueue:
+    """
+    Single background writer: other threads submit write jobs and carry on; the writer thread drains the queue
+    in batches, running each batch inside one write_scope (each job in its own savepoint, so one failing job
+    doesn't roll back the rest of the batch).
+    """
+
+    def __init__(self, database: ManagedSqliteDatabase, max_batch: int = 256):
+        self.database = database
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="db-write-queue", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, func: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """
+        :param func: write job, e.g. models.insert_into_transactions_table.
+        :return: Future resolving to func's return value once committed.
+        """
+        future = concurrent.futures.Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < self.max_batch and jobs[-1] is not None:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = jobs[-1] is None
+            jobs = [job for job in jobs if job is not None]
+            try:
+                if jobs:
+                    self._write(jobs)
+            finally:
+                for _ in range(len(jobs) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, jobs) -> None:
+        results = []
+        try:
+            with self.database.write_scope():
+                for future, func, args, kwargs in jobs:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self.database.atomic():
+                            results.append((future, func(*args, **kwargs), None))
+                    except Exception as err:
+                        results.append((future, None, err))
+        except Exception as err:
+            # the commit itself failed - nothing in the batch was written.
+            logger.warning(f"Write batch of {len(jobs)} jobs failed: {err}")
+            results = [(future, None, err) for future, *_ in jobs if future.running()]
+        for future, result, err in results:
+            if err is not None:
+                future.set_exception(err)
+            else:
+                future.set_result(result)
+
+    def flush(self) -> None:
+        """
+        Block until every job submitted so far has been committed (or failed).
+        """
+        self._queue.join()
+
+    def close(self) -> None:
+        """
+        Commit outstanding jobs and stop the writer thread.
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def __repr__(self):
+        return "WriteQueue<database, max_batch>"
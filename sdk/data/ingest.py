@@ -0,0 +1,476 @@
+import concurrent.futures
+import random
+import threading
+import time
+from timeit import default_timer as timer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+from loguru import logger
+from sdk.entities.asset import Company
+from sdk.misc.utils import normalize_symbol, timed
+from sdk.data import models
+from sdk.data.request_data import make_session
+from sdk.data.storage import MarketDataStore, get_store, normalize_market_data
+
+# fetch(symbol, session) -> {"symbol", "metadata", "market_data"}, or None when the provider has nothing for symbol.
+Fetcher = Callable[[str, requests.Session], Optional[Dict]]
+# write(batch of fetch results) -> rows written.
+Writer = Callable[[List[Dict]], int]
+
+COMPANY_METADATA_FIELDS = {
+    "symbol": "symbol",
+    "company_name": "longName",
+    "sector": "sector",
+    "industry": "industry",
+    "business_summary": "longBusinessSummary",
+    "country": "country",
+    "employee_count": "fullTimeEmployees",
+    "market_cap": "marketCap",
+    "float_shares": "floatShares",
+    "is_esg_populated": "isEsgPopulated",
+}
+
+
+class RetryableError(Exception):
+    """
+    Raised by fetchers for failures worth retrying (e.g. the provider returned an empty throttled response).
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: requests spend one token each, tokens refill at rate per second up to capacity,
+    so bursts of up to capacity requests go out at once and the long-run rate never exceeds rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        :param rate: tokens added per second.
+        :param capacity: bucket size (default one second's worth of tokens).
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive (got {rate}).")
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until tokens are available and spend them.
+        :return: seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def __repr__(self):
+        return "TokenBucket<rate, capacity>"
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: attempt n sleeps uniform(0, min(max_delay, base_delay * 2 ** n)), so
+    clients throttled together don't all retry together.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        retry_statuses: Sequence[int] = (429, 500, 502, 503, 504),
+    ):
+        """
+        :param max_attempts: attempts per symbol, including the first.
+        :param base_delay: seconds - cap of the first backoff.
+        :param max_delay: seconds - cap of any backoff.
+        :param retry_statuses: HTTP statuses worth retrying.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = set(retry_statuses)
+
+    def should_retry(self, err: Exception) -> bool:
+        if isinstance(err, requests.HTTPError):
+            return (
+                err.response is not None
+                and err.response.status_code in self.retry_statuses
+            )
+        return isinstance(
+            err, (RetryableError, requests.ConnectionError, requests.Timeout)
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        :param attempt: 0-based number of the attempt that just failed.
+        :return: seconds to sleep before the next attempt.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def __repr__(self):
+        return "RetryPolicy<max_attempts, base_delay, max_delay, retry_statuses>"
+
+
+class IngestMetrics:
+    """
+    Thread-safe counters for an ingestion run.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.fetched = 0
+        self.skipped = 0
+        self.failed = 0
+        self.retries = 0
+        self.rows_written = 0
+        self.batches_written = 0
+        self.throttled_s = 0.0
+        self.fetch_latencies: List[float] = []
+        self.started = timer()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, field: str, amount: float = 1) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def record_fetch(self, latency: float) -> None:
+        with self._lock:
+            self.fetch_latencies.append(latency)
+
+    @property
+    def done(self) -> int:
+        return self.fetched + self.skipped + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or timer()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """
+        :return: symbols completed per second.
+        """
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def latency_percentiles(self, *percentiles: float) -> Dict[str, float]:
+        """
+        :return: Dict['p<n>', seconds] of per-request fetch latency.
+        """
+        with self._lock:
+            latencies = np.array(self.fetch_latencies)
+        percentiles = percentiles or (50, 95, 99)
+        if not len(latencies):
+            return {f"p{p:g}": float("nan") for p in percentiles}
+        return {
+            f"p{p:g}": float(v)
+            for p, v in zip(percentiles, np.percentile(latencies, percentiles))
+        }
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "symbols": self.total,
+            "fetched": self.fetched,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "elapsed_s": round(self.elapsed, 3),
+            "symbols_per_s": round(self.throughput, 1),
+            "throttled_s": round(self.throttled_s, 3),
+            **{
+                f"{name}_ms": round(value * 1_000, 2)
+                for name, value in self.latency_percentiles().items()
+            },
+        }
+
+    def __str__(self):
+        return (
+            f"[Ingest] {self.done}/{self.total} symbols in {self.elapsed:.1f}s "
+            f"({self.throughput:.1f}/s) | {self.failed} failed, {self.skipped} empty, {self.retries} retries | "
+            f"{self.rows_written} rows written in {self.batches_written} batches"
+        )
+
+    def __repr__(self):
+        return "IngestMetrics<total, fetched, skipped, failed, retries, rows_written, fetch_latencies>"
+
+
+class IngestionPipeline:
+    """
+    Fetches symbols on a bounded thread pool sharing one keep-alive session, throttled by a token bucket and
+    retried with jittered backoff, while results are written in batches as they arrive (so memory stays bounded
+    by the batch size and writes overlap with the downloads still in flight).
+    """
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        write: Writer,
+        max_workers: int = 8,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        batch_size: int = 100,
+        session: Optional[requests.Session] = None,
+        progress_every: float = 5.0,
+    ):
+        """
+        :param fetch: see Fetcher (e.g. yfinance_fetcher(), http_quote_fetcher(url)).
+        :param write: see Writer (e.g. store_writer()).
+        :param max_workers: concurrent requests.
+        :param rate_limit: optional fetch attempts per second across all workers.
+        :param burst: token bucket capacity (default one second of rate_limit).
+        :param retry: RetryPolicy (default RetryPolicy()).
+        :param batch_size: results handed to write at a time.
+        :param session: shared session (default a new session pooling max_workers connections).
+        :param progress_every: seconds between progress log lines.
+        """
+        self.fetch = fetch
+        self.write = write
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.retry = retry or RetryPolicy()
+        self.batch_size = batch_size
+        self.session = session or make_session(pool_size=max_workers)
+        self.progress_every = progress_every
+
+    def _fetch(self, symbol: str, metrics: IngestMetrics) -> Optional[Dict]:
+        for attempt in range(self.retry.max_attempts):
+            if self.bucket:
+                metrics.record("throttled_s", self.bucket.acquire())
+            started = timer()
+            try:
+                result = self.fetch(symbol, self.session)
+            except Exception as err:
+                if (
+                    attempt + 1 >= self.retry.max_attempts
+                    or not self.retry.should_retry(err)
+                ):
+                    raise
+                metrics.record("retries")
+                time.sleep(self.retry.backoff(attempt))
+                continue
+            metrics.record_fetch(timer() - started)
+            return result
+
+    def _flush(self, batch: List[Dict], metrics: IngestMetrics) -> None:
+        if not batch:
+            return
+        try:
+            metrics.record("rows_written", self.write(batch))
+            metrics.record("batches_written")
+        except Exception as err:
+            logger.warning(f"Failed to write batch of {len(batch)} results: {err}")
+            metrics.record("failed", len(batch))
+            metrics.record("fetched", -len(batch))
+        batch.clear()
+
+    @timed
+    def run(self, symbols: Iterable[str]) -> IngestMetrics:
+        """
+        :param symbols: symbols to ingest.
+        :return: IngestMetrics for the run.
+        """
+        symbols = list(dict.fromkeys(normalize_symbol(s) for s in symbols))
+        metrics = IngestMetrics(len(symbols))
+        pending = iter(symbols)
+        batch = []
+        last_progress = timer()
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+            in_flight = {}
+
+            def submit(n: int) -> None:
+                for symbol in pending:
+                    in_flight[executor.submit(self._fetch, symbol, metrics)] = symbol
+                    n -= 1
+                    if n <= 0:
+                        return
+
+            # keep a couple of tasks queued per worker so no worker idles while results are being written.
+            submit(self.max_workers * 2)
+            while in_flight:
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                # refill first, so the downloads continue while this round's results are written.
+                submit(len(done))
+                for future in done:
+                    symbol = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as err:
+                        logger.warning(f"Failed to ingest {symbol}: {err}")
+                        metrics.record("failed")
+                        continue
+                    if not result:
+                        metrics.record("skipped")
+                        continue
+                    metrics.record("fetched")
+                    batch.append(result)
+                    if len(batch) >= self.batch_size:
+                        self._flush(batch, metrics)
+                if timer() - last_progress >= self.progress_every:
+                    last_progress = timer()
+                    logger.info(metrics)
+            self._flush(batch, metrics)
+        metrics.finished = timer()
+        logger.success(metrics)
+        return metrics
+
+    def __repr__(self):
+        return "IngestionPipeline<fetch, write, max_workers, bucket, retry, batch_size, session>"
+
+
+def yfinance_fetcher(
+    include_metadata: bool = True,
+    include_market_data: bool = True,
+    period: str = "max",
+    interval: str = "1d",
+) -> Fetcher:
+    """
+    :return: Fetcher downloading company metadata and/or market data from Yahoo Finance.
+    """
+
+    def fetch(symbol: str, session: requests.Session) -> Optional[Dict]:
+        ticker = yf.Ticker(symbol, session=session)
+        metadata = ticker.info if include_metadata else None
+        if include_metadata and (not metadata or metadata.get("longName") is None):
+            logger.warning(f"Metadata missing for symbol download {symbol}")
+            return None
+        market_data = (
+            ticker.history(period=period, interval=interval)
+            if include_market_data
+            else None
+        )
+        return {"symbol": symbol, "metadata": metadata, "market_data": market_data}
+
+    return fetch
+
+
+def http_quote_fetcher(base_url: str, timeout: float = 10.0) -> Fetcher:
+    """
+    :param base_url: quote service serving GET <base_url>/quote/<SYMBOL> as
+    {"metadata": {...}, "bars": {"Date": [...], "Open": [...], ...}} (e.g. sdk/benchmarks/fake_quote_server.py).
+    :param timeout: seconds per request.
+    :return: Fetcher for a JSON quote service.
+    """
+    base_url = base_url.rstrip("/")
+
+    def fetch(symbol: str, session: requests.Session) -> Optional[Dict]:
+        response = session.get(f"{base_url}/quote/{symbol}", timeout=timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        payload = response.json()
+        bars = payload.get("bars")
+        market_data = (
+            normalize_market_data(pd.DataFrame(bars).set_index("Date"))
+            if bars
+            else None
+        )
+        return {
+            "symbol": symbol,
+            "metadata": payload.get("metadata"),
+            "market_data": market_data,
+        }
+
+    return fetch
+
+
+def company_from_metadata(metadata: Dict) -> Optional[Company]:
+    """
+    :param metadata: Yahoo Finance style info dict.
+    :return: Company, or None when a required field is missing.
+    """
+    try:
+        return Company(
+            **{field: metadata[key] for field, key in COMPANY_METADATA_FIELDS.items()}
+        )
+    except KeyError as err:
+        logger.warning(f"Missing metadata {err} for {metadata.get('symbol')}")
+        return None
+
+
+def store_writer(
+    store: Optional[MarketDataStore] = None,
+    companies: bool = True,
+    market_data: bool = True,
+    price_bars: bool = False,
+) -> Writer:
+    """
+    :param store: market data store for downloaded bars (default the configured store).
+    :param companies: upsert company metadata into the Company table.
+    :param market_data: save bars to the market data store.
+    :param price_bars: also upsert bars into the PriceBar table.
+    :return: Writer persisting a batch of fetch results with one bulk upsert per table.
+    """
+    store = store or get_store()
+
+    def write(batch: List[Dict]) -> int:
+        rows = 0
+        if companies:
+            found = [
+                company_from_metadata(result["metadata"])
+                for result in batch
+                if result.get("metadata")
+            ]
+            counts = models.insert_into_company_table(*filter(None, found))
+            rows += counts["inserted"] + counts["updated"]
+        frames = {
+            result["symbol"]: result["market_data"]
+            for result in batch
+            if result.get("market_data") is not None
+            and len(result["market_data"].index)
+        }
+        if market_data:
+            for symbol, frame in frames.items():
+                store.save(symbol, frame)
+                rows += len(frame.index)
+        if price_bars and frames:
+            rows += models.insert_into_price_bar_table(frames)
+        return rows
+
+    return write
+
+
+@timed
+def ingest_companies(
+    symbols: Iterable[str],
+    max_workers: int = 8,
+    rate_limit: Optional[float] = 4.0,
+    batch_size: int = 50,
+) -> IngestMetrics:
+    """
+    Download metadata and full market history for symbols from Yahoo Finance into the Company table and the
+    market data store.
+    :param symbols: symbols to ingest.
+    :param max_workers: concurrent requests.
+    :param rate_limit: fetch attempts per second (None to disable).
+    :param batch_size: results written at a time.
+    :return: IngestMetrics.
+    """
+    return IngestionPipeline(
+        fetch=yfinance_fetcher(),
+        write=store_writer(),
+        max_workers=max_workers,
+        rate_limit=rate_limit,
+        batch_size=batch_size,
+    ).run(symbols)
@@ -1,26 +1,40 @@
 from peewee import *
 from loguru import logger
-from typing import List, Type, Optional
-from functools import partial
+from typing import Callable, Dict, List, Type, Optional
 from datetime import datetime
+import functools
 import os
 import pathlib
+import threading
+import numpy as np
+import pandas as pd
+from sdk.misc.enums import Direction, OrderType
 from sdk.misc.utils import (
     load_cfg,
     timed,
-    use_threadpool_exec,
     normalize_symbol,
     currency,
 )
 from sdk.entities.asset import Company, Holding
-from sdk.entities.transaction import Transaction
-from sdk.data.request_data import download_index_constituents, download_ticker_data
-
+from sdk.entities.transaction import MarketBuy, MarketSell, Transaction
+from sdk.data.database import ManagedSqliteDatabase
+from sdk.data.request_data import download_index_constituents
+from sdk.data.storage import (
+    MARKET_TZ,
+    DateLike,
+    MarketDataStore,
+    get_store,
+    to_market_timestamp,
+)
 
 module_path = pathlib.Path(__file__).parent.resolve()
 cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
 db_path = os.path.join(module_path, cfg["BASE_DB_PATH_DUMMY"])
-db = SqliteDatabase(db_path)
+db = ManagedSqliteDatabase(db_path)
+# bound parameters per statement on SQLite builds older than 3.32 - bulk writes stay under it.
+SQLITE_MAX_VARIABLES = 999
+# bumped on every company write from this process, so in-memory indexes of the table know to reload.
+company_table_version = 0
 
 
 class CompanyModel(Model):
@@ -40,17 +54,19 @@ class CompanyModel(Model):
 
 
 class HoldingModel(Model):
-    symbol = CharField(primary_key=True)
+    symbol = CharField()
     qty_owned = IntegerField()
     date_purchased = DateField()
     portfolio = CharField()
 
     class Meta:
         database = db
+        primary_key = CompositeKey("portfolio", "symbol")
 
 
 class TransactionModel(Model):
-    date = DateTimeField(primary_key=True)
+    id = AutoField()
+    date = DateTimeField()
     symbol = CharField()
     direction = CharField()
     order_type = CharField()
@@ -60,91 +76,260 @@ class TransactionModel(Model):
 
     class Meta:
         database = db
+        indexes = (
+            # unique, so re-saving a portfolio's history upserts rather than duplicates it.
+            (("portfolio", "symbol", "date", "direction"), True),
+            (("portfolio", "date"), False),
+        )
 
 
 class PortfolioModel(Model):
-    date = DateTimeField(primary_key=True)
+    date = DateTimeField()
     portfolio = CharField()
     value = DoubleField()
 
     class Meta:
         database = db
+        primary_key = CompositeKey("portfolio", "date")
+
+
+class PriceBarModel(Model):
+    symbol = CharField()
+    date = DateField()
+    open = DoubleField(null=True)
+    high = DoubleField(null=True)
+    low = DoubleField(null=True)
+    close = DoubleField(null=True)
+    volume = DoubleField(null=True)
+    dividends = DoubleField(null=True)
+    stock_splits = DoubleField(null=True)
+
+    class Meta:
+        database = db
+        # clustered on (symbol, date), so a symbol's date range is one contiguous b-tree scan.
+        primary_key = CompositeKey("symbol", "date")
+        without_rowid = True
+        indexes = ((("date", "symbol"), False),)
+
+
+class FundamentalModel(Model):
+    symbol = CharField()
+    as_of_date = DateField()  # date the value became public (not the fiscal period end).
+    field = CharField()
+    value = DoubleField(null=True)
+
+    class Meta:
+        database = db
+        # clustered on (symbol, field, date), so a symbol's history of one field is one contiguous b-tree scan.
+        primary_key = CompositeKey("symbol", "field", "as_of_date")
+        without_rowid = True
+        indexes = ((("field", "as_of_date"), False),)
+
+
+PRICE_BAR_FIELDS = {
+    "Open": PriceBarModel.open,
+    "High": PriceBarModel.high,
+    "Low": PriceBarModel.low,
+    "Close": PriceBarModel.close,
+    "Volume": PriceBarModel.volume,
+    "Dividends": PriceBarModel.dividends,
+    "Stock Splits": PriceBarModel.stock_splits,
+}
 
 
 def create_table(*models: Type[Model]):
     """
-    Create database tables
+    Create database tables (history tables left on an old schema are migrated first).
     :param models: (positional) CompanyModel, HoldingModel, TransactionModel, PortfolioModel - tables to be created.
     :return: None
     """
-    with db:
+    ensure_history_schema()
+    with db.write_scope():
         db.create_tables(models)
         logger.success(f"Tables ready for {models}")
 
 
-@timed
-def insert_into_company_table(*companies: Company):
+# databases (by path) whose history tables have been checked against the current schema in this process.
+_migrated_databases = set()
+_migration_lock = threading.Lock()
+
+
+def ensure_history_schema() -> None:
     """
-    :param companies: (positional) Company objects to be inserted into the Company table.
+    Migrate the history tables of the bound database on first use in this process (see migrate_history_tables),
+    so code reading or writing them never runs against the old schema.
     :return: None
     """
-    with db.atomic():
-        for company in companies:
-            model, created = CompanyModel.get_or_create(**vars(company))
-            model.save()
-            if created:
-                logger.success(
-                    f"Inserted into Company: {company.company_name} ({company.symbol})"
-                )
-            else:
-                logger.warning(
-                    f"Company {company.company_name} ({company.symbol}) already present in table."
-                )
-    logger.debug(f"Inserted {len(companies)} companies into company table.")
+    if db.database in _migrated_databases:
+        return
+    with _migration_lock:
+        if db.database not in _migrated_databases:
+            migrate_history_tables()
+            _migrated_databases.add(db.database)
+
+
+def _history_table(func: Callable) -> Callable:
+    """
+    (decorator) Run ensure_history_schema before a function using the Transaction / Holding / Portfolio tables.
+    """
+
+    @functools.wraps(func)
+    def wrapper_history_table(*args, **kwargs):
+        ensure_history_schema()
+        return func(*args, **kwargs)
+
+    return wrapper_history_table
+
+
+def _bulk_upsert(
+    model: Type[Model],
+    rows: List[dict],
+    conflict_target: List[Field],
+    preserve: List[Field],
+    batch_size: int = 500,
+) -> Dict[str, int]:
+    """
+    Upsert rows in chunks of one INSERT ... ON CONFLICT DO UPDATE statement each, inside a single transaction.
+    :param model: table to write to.
+    :param rows: column -> value dicts; later rows win over earlier rows with the same key.
+    :param conflict_target: fields forming the row's unique key.
+    :param preserve: fields overwritten with the incoming values when the key already exists.
+    :param batch_size: rows per statement (capped so a statement stays within SQLite's bound-variable limit).
+    :return: Dict with counts of rows inserted and updated.
+    """
+    key_names = [field.name for field in conflict_target]
+    unique_rows = {tuple(row[name] for name in key_names): row for row in rows}
+    if not unique_rows:
+        return {"inserted": 0, "updated": 0}
+    n_columns = len(next(iter(unique_rows.values())))
+    batch_size = max(1, min(batch_size, SQLITE_MAX_VARIABLES // n_columns))
+    keys = [
+        tuple(field.db_value(value) for field, value in zip(conflict_target, key))
+        for key in unique_rows
+    ]
+    rows = list(unique_rows.values())
+    updated = 0
+    with db.write_scope():
+        for i in range(0, len(rows), batch_size):
+            # look up only this chunk's keys (an index probe each) to split inserts from updates.
+            updated += (
+                model.select()
+                .where(Tuple(*conflict_target).in_(keys[i : i + batch_size]))
+                .count()
+            )
+            model.insert_many(rows[i : i + batch_size]).on_conflict(
+                conflict_target=conflict_target, preserve=preserve
+            ).execute()
+    return {"inserted": len(rows) - updated, "updated": updated}
+
+
+@timed
+def insert_into_company_table(
+    *companies: Company, batch_size: int = 500
+) -> Dict[str, int]:
+    """
+    :param companies: (positional) Company objects to be inserted into (or updated in) the Company table.
+    :param batch_size: (kwarg) rows written per SQL statement.
+    :return: Dict with counts of rows inserted and updated.
+    """
+    global company_table_version
+    counts = _bulk_upsert(
+        CompanyModel,
+        [vars(company) for company in companies],
+        conflict_target=[CompanyModel.symbol],
+        preserve=[
+            field
+            for field in CompanyModel._meta.sorted_fields
+            if field is not CompanyModel.symbol
+        ],
+        batch_size=batch_size,
+    )
+    company_table_version += 1
+    logger.success(
+        f"Company table: inserted {counts['inserted']}, updated {counts['updated']} companies."
+    )
+    return counts
 
 
 @timed
-def insert_into_holdings_table(*holdings: Holding, portfolio: str):
+@_history_table
+def insert_into_holdings_table(
+    *holdings: Holding, portfolio: str, batch_size: int = 500
+) -> Dict[str, int]:
     """
     :param portfolio: (kwarg) associated portfolio.
-    :param holdings: (positional) Holding objects to be inserted into the Holding table.
-    :return: None
+    :param holdings: (positional) Holding objects to be inserted into the Holding table (existing holdings have
+    their quantity updated).
+    :param batch_size: (kwarg) rows written per SQL statement.
+    :return: Dict with counts of rows inserted and updated.
     """
-    with db.atomic():
-        for holding in holdings:
-            model, created = HoldingModel.get_or_create(
-                symbol=holding.stock.symbol,
-                qty_owned=holding.qty_owned,
-                date_purchased=holding.date_purchased,
-                portfolio=portfolio,
-            )
-            if not created:
-                model.update(qty_owned=holding.qty_owned)
-            model.save()
-            logger.success(f"Inserted or updated Holding: {holding}")
+    counts = _bulk_upsert(
+        HoldingModel,
+        [
+            {
+                "symbol": holding.symbol,
+                "qty_owned": holding.qty_owned,
+                "date_purchased": holding.date_purchased,
+                "portfolio": portfolio,
+            }
+            for holding in holdings
+        ],
+        conflict_target=[HoldingModel.portfolio, HoldingModel.symbol],
+        preserve=[HoldingModel.qty_owned],
+        batch_size=batch_size,
+    )
+    logger.success(
+        f"Holding table ({portfolio}): inserted {counts['inserted']}, updated {counts['updated']} holdings."
+    )
+    return counts
 
 
 @timed
-def insert_into_transactions_table(*transactions: Transaction, portfolio: str):
+@_history_table
+def insert_into_transactions_table(
+    *transactions: Transaction, portfolio: str, batch_size: int = 500
+) -> Dict[str, int]:
     """
     :param portfolio: (kwarg) associated portfolio.
     :param transactions: (positional) Transaction objects to be inserted into the Transaction table.
-    :return: None
+    :param batch_size: (kwarg) rows written per SQL statement.
+    :return: Dict with counts of rows inserted and updated.
     """
-    with db.atomic():
-        for transaction in transactions:
-            del transaction.market_value
-            model, _ = TransactionModel.get_or_create(
-                **vars(transaction), portfolio=portfolio
-            )
-            model.save()
-            logger.success(
-                f"Inserted into Transaction: "
-                f"{transaction.symbol}: {transaction.order_type} {transaction.direction}"
-            )
+    counts = _bulk_upsert(
+        TransactionModel,
+        [
+            {
+                "date": transaction.date,
+                "symbol": transaction.symbol,
+                "direction": transaction.direction.value,
+                "order_type": transaction.order_type.value,
+                "price": transaction.price,
+                "qty": transaction.qty,
+                "portfolio": portfolio,
+            }
+            for transaction in transactions
+        ],
+        conflict_target=[
+            TransactionModel.portfolio,
+            TransactionModel.symbol,
+            TransactionModel.date,
+            TransactionModel.direction,
+        ],
+        preserve=[
+            TransactionModel.order_type,
+            TransactionModel.price,
+            TransactionModel.qty,
+        ],
+        batch_size=batch_size,
+    )
+    logger.success(
+        f"Transaction table ({portfolio}): inserted {counts['inserted']}, updated {counts['updated']} transactions."
+    )
+    return counts
 
 
 @timed
+@_history_table
 def insert_into_portfolio_table(
     portfolio: str, value: float, timestamp: datetime = datetime.now()
 ):
@@ -154,7 +339,7 @@ def insert_into_portfolio_table(
     :param timestamp: (kwarg) timestamp of when value was entered into the db.
     :return: None
     """
-    with db:
+    with db.write_scope():
         model, _ = PortfolioModel.get_or_create(
             date=timestamp, portfolio=portfolio, value=value
         )
@@ -171,146 +356,472 @@ def fetch_from_company_table(*symbols: str, every: bool = False) -> List[Company
     :param every: (kwarg) set to True for all companies in the table.
     :return: a list of Company objects returned from query.
     """
-    with db.atomic():
-        companies = []
-        symbols = map(normalize_symbol, symbols)
-        if every:
-            companies.append(CompanyModel.select().get())
-        else:
-            for symbol in symbols:
-                try:
-                    company = CompanyModel.get(CompanyModel.symbol == symbol)
-                except DoesNotExist as err:
-                    logger.warning(err)
-                    continue
-                companies.append(company)
-    return [Company(**company.__data__) for company in companies]
+    query = CompanyModel.select()
+    if not every:
+        symbols = [normalize_symbol(symbol) for symbol in symbols]
+        query = query.where(CompanyModel.symbol << symbols)
+    with db.read_scope():
+        companies = [Company(**company) for company in query.dicts()]
+    if not every and len(companies) < len(set(symbols)):
+        found = {company.symbol for company in companies}
+        logger.warning(f"No company metadata for {sorted(set(symbols) - found)}.")
+    return companies
 
 
 @timed
+@_history_table
 def fetch_from_holdings_table(portfolio: str) -> List[Holding]:
     """
     :param portfolio: (kwarg) portfolio name associated with the desired holdings.
     :return: a list of Holding objects returned from query.
     """
-    with db:
-        holdings_query = HoldingModel.select().where(
-            HoldingModel.portfolio == portfolio
+    query = (
+        HoldingModel.select(
+            HoldingModel.symbol, HoldingModel.qty_owned, HoldingModel.date_purchased
         )
-        holdings = [
-            Holding(
-                symbol=holding.symbol,
-                qty_owned=holding.qty_owned,
-                date_purchased=holding.date_purchased,
-            )
-            for holding in holdings_query
-        ]
-    return holdings
+        .where(HoldingModel.portfolio == portfolio)
+        .tuples()
+    )
+    with db.read_scope():
+        rows = list(query)
+    return [
+        Holding(symbol=symbol, qty_owned=qty_owned, date_purchased=date_purchased)
+        for symbol, qty_owned, date_purchased in rows
+    ]
+
+
+_TRANSACTION_TYPES = {
+    (Direction.Buy.value, OrderType.Market.value): MarketBuy,
+    (Direction.Sell.value, OrderType.Market.value): MarketSell,
+}
+
+
+def _history_query(
+    query: Select,
+    date_field: Field,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: Optional[int],
+    offset: int,
+) -> Select:
+    """
+    Apply an inclusive date range and limit/offset pagination, ordered oldest first.
+    """
+    if start_date is not None:
+        query = query.where(date_field >= start_date)
+    if end_date is not None:
+        query = query.where(date_field <= end_date)
+    query = query.order_by(date_field)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.offset(offset) if offset else query
 
 
 @timed
+@_history_table
 def fetch_from_transactions_table(
-    *symbols: str, portfolio: str, every: bool = False
+    *symbols: str,
+    portfolio: str,
+    every: bool = False,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
 ) -> List[Transaction]:
     """
     :param symbols: (positional) symbols to retrieve associated Transaction objects.
-    :param portfolio: (kwarg) portfolio name associated with the desired holdings.
-    :param every: (kwarg) set to True for all holdings associated with given portfolio.
-    :return: a list of Holding objects returned from query.
+    :param portfolio: (kwarg) portfolio name associated with the desired transactions.
+    :param every: (kwarg) set to True for every transaction in the portfolio (also the default when no symbols
+    are given).
+    :param start_date: (kwarg) earliest transaction date (inclusive).
+    :param end_date: (kwarg) latest transaction date (inclusive).
+    :param limit: (kwarg) page size - default: no limit.
+    :param offset: (kwarg) number of transactions to skip.
+    :return: a list of MarketBuy / MarketSell objects in date order, from a single indexed query.
     """
-    with db:
-        transactions = []
-        if every:
-            transactions.append(
-                TransactionModel.select().get(TransactionModel.portfolio == portfolio)
+    query = TransactionModel.select(
+        TransactionModel.date,
+        TransactionModel.symbol,
+        TransactionModel.direction,
+        TransactionModel.order_type,
+        TransactionModel.price,
+        TransactionModel.qty,
+    ).where(TransactionModel.portfolio == portfolio)
+    if symbols and not every:
+        query = query.where(
+            TransactionModel.symbol << [normalize_symbol(symbol) for symbol in symbols]
+        )
+    query = _history_query(
+        query, TransactionModel.date, start_date, end_date, limit, offset
+    ).order_by(TransactionModel.date, TransactionModel.id)
+    with db.read_scope():
+        rows = list(query.tuples())
+    transactions = []
+    for date, symbol, direction, order_type, price, qty in rows:
+        transaction_type = _TRANSACTION_TYPES.get((direction, order_type))
+        if transaction_type is None:
+            logger.warning(
+                f"Skipping unsupported transaction type: {order_type} {direction} ({symbol} <{date}>)"
             )
-        else:
-            for symbol in symbols:
-                transaction = TransactionModel.get(
-                    TransactionModel.symbol == symbol
-                    and TransactionModel.portfolio == portfolio
-                )
-                transactions.append(transaction)
-    return [Transaction(**transaction.__data__) for transaction in transactions]
+            continue
+        transactions.append(
+            transaction_type(date=date, symbol=symbol, price=price, qty=qty)
+        )
+    return transactions
 
 
 @timed
+@_history_table
 def fetch_from_portfolio_table(
-    portfolio: str, timestamp: Optional[datetime] = None
-) -> List:
+    portfolio: str,
+    timestamp: Optional[datetime] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[tuple]:
     """
     :param portfolio: (kwarg) name of portfolio to retrieve history for.
     :param timestamp: optional argument to retrieve portfolio value on a given date/time.
-    :return: List of portfolio values enumerated by date.
+    :param start_date: (kwarg) earliest valuation date (inclusive).
+    :param end_date: (kwarg) latest valuation date (inclusive).
+    :param limit: (kwarg) page size - default: no limit.
+    :param offset: (kwarg) number of values to skip.
+    :return: List of (date, value) tuples in date order.
+    """
+    query = PortfolioModel.select(PortfolioModel.date, PortfolioModel.value).where(
+        PortfolioModel.portfolio == portfolio
+    )
+    if timestamp is not None:
+        query = query.where(PortfolioModel.date == timestamp)
+    query = _history_query(
+        query, PortfolioModel.date, start_date, end_date, limit, offset
+    )
+    with db.read_scope():
+        return list(query.tuples())
+
+
+@timed
+@_history_table
+def fetch_portfolio_names() -> List[str]:
+    """
+    :return: sorted names of every portfolio with holdings, transactions or value history in the db.
+    """
+    query = (
+        HoldingModel.select(HoldingModel.portfolio)
+        | TransactionModel.select(TransactionModel.portfolio)
+        | PortfolioModel.select(PortfolioModel.portfolio)
+    )
+    with db.read_scope():
+        return sorted(name for name, in query.tuples())
+
+
+def migrate_history_tables() -> None:
+    """
+    Rebuild Transaction / Holding / Portfolio tables created with the old single-column primary keys (date, symbol,
+    date) into the current schema, keeping their rows. Enum reprs written by old versions (e.g. 'Direction.Buy') are
+    converted to enum values. Tables already on the current schema are left alone.
+    :return: None
+    """
+    rebuilds = {
+        TransactionModel: (
+            "date, symbol, "
+            "upper(replace(direction, 'Direction.', '')), "
+            "upper(replace(order_type, 'OrderType.', '')), "
+            "price, qty, portfolio",
+            "date, symbol, direction, order_type, price, qty, portfolio",
+        ),
+        HoldingModel: (
+            "symbol, qty_owned, date_purchased, portfolio",
+            "symbol, qty_owned, date_purchased, portfolio",
+        ),
+        PortfolioModel: ("date, portfolio, value", "date, portfolio, value"),
+    }
+    with db.write_scope():
+        for model, (select_columns, insert_columns) in rebuilds.items():
+            table = model._meta.table_name
+            if not db.table_exists(table):
+                continue
+            primary_key = [
+                field.column_name for field in model._meta.get_primary_keys()
+            ]
+            if sorted(db.get_primary_keys(table)) == sorted(primary_key):
+                continue
+            db.execute_sql(f'ALTER TABLE "{table}" RENAME TO "{table}_old"')
+            # indexes move with the renamed table and would keep create_tables from building the model's own
+            # (same names), leaving the new table unindexed once the old one is dropped.
+            for index in db.get_indexes(f"{table}_old"):
+                if index.sql:  # skip SQLite's internal autoindexes, which cannot be dropped.
+                    db.execute_sql(f'DROP INDEX "{index.name}"')
+            db.create_tables([model])
+            db.execute_sql(
+                f'INSERT OR REPLACE INTO "{table}" ({insert_columns}) '
+                f'SELECT {select_columns} FROM "{table}_old"'
+            )
+            db.execute_sql(f'DROP TABLE "{table}_old"')
+            logger.success(f"Migrated table {table} to the current schema.")
+
+
+@timed
+def insert_into_price_bar_table(market_data: Dict[str, pd.DataFrame]) -> int:
     """
-    with db:
-        value_history = []
-        if not timestamp:
-            value_history.append(
-                PortfolioModel.select().get(PortfolioModel.portfolio == portfolio)
+    :param market_data: Dict[symbol, OHLCV frame indexed by date] (e.g. from MarketDataStore.load_many).
+    :return: number of bars written (existing (symbol, date) bars are overwritten).
+    """
+    columns = [PriceBarModel.symbol, PriceBarModel.date, *PRICE_BAR_FIELDS.values()]
+    # one prepared single-row statement run through executemany - building a multi-row insert_many statement
+    # in peewee costs more per row than SQLite takes to write it.
+    sql, _ = (
+        PriceBarModel.insert({column: None for column in columns})
+        .on_conflict_replace()
+        .sql()
+    )
+    n_bars = 0
+    with db.write_scope():
+        cursor = db.cursor()
+        for symbol, bars in market_data.items():
+            days = np.datetime_as_string(
+                bars.index.tz_localize(None).to_numpy(dtype="datetime64[D]")
             )
-        else:
-            value_history.append(
-                PortfolioModel.select().get(
-                    PortfolioModel.portfolio == portfolio
-                    and PortfolioModel.date == timestamp
-                )
+            # SQLite binds NaN as NULL, so missing values need no special casing.
+            values = bars.reindex(columns=list(PRICE_BAR_FIELDS)).to_numpy(np.float64)
+            cursor.executemany(
+                sql,
+                (
+                    (symbol, day, *bar)
+                    for day, bar in zip(days.tolist(), values.tolist())
+                ),
             )
-    return value_history
+            n_bars += len(days)
+    logger.success(
+        f"Price bar table: wrote {n_bars} bars for {len(market_data)} symbols."
+    )
+    return n_bars
+
+
+def load_price_bars_from_store(
+    symbols: Optional[List[str]] = None, store: Optional[MarketDataStore] = None
+) -> int:
+    """
+    Bulk load (or re-sync) the price bar table from the local market data store.
+    :param symbols: tickers to load (default: every symbol in the store).
+    :param store: MarketDataStore to read from (default: configured backend).
+    :return: number of bars written.
+    """
+    store = store or get_store()
+    symbols = symbols if symbols is not None else store.symbols()
+    n_bars = 0
+    for i in range(0, len(symbols), 50):  # bounded memory on large universes
+        n_bars += insert_into_price_bar_table(store.load_many(symbols[i : i + 50]))
+    return n_bars
+
+
+def _price_bar_query(
+    symbols: List[str],
+    start_date: Optional[DateLike],
+    end_date: Optional[DateLike],
+    *fields: Field,
+):
+    query = PriceBarModel.select(*fields).where(
+        PriceBarModel.symbol << [normalize_symbol(symbol) for symbol in symbols]
+    )
+    if start_date is not None:
+        query = query.where(
+            PriceBarModel.date >= to_market_timestamp(start_date).strftime("%Y-%m-%d")
+        )
+    if end_date is not None:
+        query = query.where(
+            PriceBarModel.date <= to_market_timestamp(end_date).strftime("%Y-%m-%d")
+        )
+    return query
+
+
+def _market_dates(days: np.ndarray) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(pd.to_datetime(days, format="%Y-%m-%d")).tz_localize(
+        MARKET_TZ
+    )
+
+
+def fetch_price_panel(
+    symbols: List[str],
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    field: str = "Close",
+) -> pd.DataFrame:
+    """
+    :param symbols: tickers to retrieve.
+    :param start_date: first date (inclusive), default: earliest bar.
+    :param end_date: last date (inclusive), default: latest bar.
+    :param field: one of PRICE_BAR_FIELDS, e.g. Close.
+    :return: wide (dates x symbols) frame from a single SQL query - NaN where a symbol has no bar.
+    """
+    if field not in PRICE_BAR_FIELDS:
+        raise ValueError(f"Unknown price field: ({field})")
+    query = _price_bar_query(
+        symbols,
+        start_date,
+        end_date,
+        PriceBarModel.symbol,
+        PriceBarModel.date,
+        PRICE_BAR_FIELDS[field],
+    )
+    with db.read_scope():
+        rows = db.execute(query).fetchall()
+    columns = [normalize_symbol(symbol) for symbol in symbols]
+    if not rows:
+        return pd.DataFrame(columns=columns, dtype=np.float64)
+    row_symbols, days, values = zip(*rows)
+    # factorize first, so only the few thousand distinct dates are parsed, not every row's.
+    day_codes, unique_days = pd.factorize(np.asarray(days, dtype=object), sort=True)
+    column_index = {symbol: i for i, symbol in enumerate(columns)}
+    symbol_codes = np.fromiter(
+        map(column_index.__getitem__, row_symbols), dtype=np.intp, count=len(rows)
+    )
+    panel = np.full((len(unique_days), len(columns)), np.nan)
+    panel[day_codes, symbol_codes] = np.asarray(values, dtype=np.float64)
+    return pd.DataFrame(panel, index=_market_dates(unique_days), columns=columns)
+
+
+def fetch_price_bars(
+    symbol: str,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+) -> pd.DataFrame:
+    """
+    :param symbol: ticker to retrieve.
+    :param start_date: first date (inclusive), default: earliest bar.
+    :param end_date: last date (inclusive), default: latest bar.
+    :return: OHLCV frame for symbol, shaped like MarketDataStore.load.
+    """
+    query = _price_bar_query(
+        [symbol], start_date, end_date, PriceBarModel.date, *PRICE_BAR_FIELDS.values()
+    ).order_by(PriceBarModel.date)
+    with db.read_scope():
+        rows = db.execute(query).fetchall()
+    days = np.asarray([row[0] for row in rows])
+    market_data = pd.DataFrame(
+        [row[1:] for row in rows], columns=list(PRICE_BAR_FIELDS), dtype=np.float64
+    )
+    market_data.index = _market_dates(days).rename("Date")
+    return market_data
+
+
+@timed
+def insert_into_fundamental_table(fundamentals: pd.DataFrame) -> int:
+    """
+    :param fundamentals: long frame with symbol, as_of_date, field and value columns (one row per reported value).
+    :return: number of values written (existing (symbol, field, as_of_date) values are overwritten).
+    """
+    missing = {"symbol", "as_of_date", "field", "value"} - set(fundamentals.columns)
+    if missing:
+        raise ValueError(f"Fundamentals are missing columns: {sorted(missing)}")
+    columns = [
+        FundamentalModel.symbol,
+        FundamentalModel.as_of_date,
+        FundamentalModel.field,
+        FundamentalModel.value,
+    ]
+    # same single-row executemany statement as the price bar table.
+    sql, _ = (
+        FundamentalModel.insert({column: None for column in columns})
+        .on_conflict_replace()
+        .sql()
+    )
+    days = np.datetime_as_string(
+        pd.to_datetime(fundamentals["as_of_date"]).to_numpy(dtype="datetime64[D]")
+    )
+    with db.write_scope():
+        db.cursor().executemany(
+            sql,
+            zip(
+                map(normalize_symbol, fundamentals["symbol"].tolist()),
+                days.tolist(),
+                fundamentals["field"].tolist(),
+                fundamentals["value"].to_numpy(np.float64).tolist(),
+            ),
+        )
+    logger.success(
+        f"Fundamental table: wrote {len(days)} values for "
+        f"{fundamentals['symbol'].nunique()} symbols."
+    )
+    return len(days)
+
+
+def fetch_fundamentals(
+    symbols: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None,
+    end_date: Optional[DateLike] = None,
+) -> pd.DataFrame:
+    """
+    :param symbols: tickers to retrieve (default: every symbol in the table).
+    :param fields: fields to retrieve, e.g. eps (default: every field).
+    :param end_date: last as_of_date (inclusive), default: latest value.
+    :return: long frame (symbol, as_of_date, field, value) from a single SQL query, sorted by symbol, field and date.
+    """
+    query = FundamentalModel.select(
+        FundamentalModel.symbol,
+        FundamentalModel.as_of_date,
+        FundamentalModel.field,
+        FundamentalModel.value,
+    ).order_by(
+        FundamentalModel.symbol, FundamentalModel.field, FundamentalModel.as_of_date
+    )
+    if symbols is not None:
+        query = query.where(
+            FundamentalModel.symbol << [normalize_symbol(symbol) for symbol in symbols]
+        )
+    if fields is not None:
+        query = query.where(FundamentalModel.field << list(fields))
+    if end_date is not None:
+        query = query.where(
+            FundamentalModel.as_of_date
+            <= to_market_timestamp(end_date).strftime("%Y-%m-%d")
+        )
+    with db.read_scope():
+        rows = db.execute(query).fetchall()
+    fundamentals = pd.DataFrame(
+        rows, columns=["symbol", "as_of_date", "field", "value"]
+    ).astype({"value": np.float64})
+    day_codes, unique_days = pd.factorize(
+        fundamentals["as_of_date"].to_numpy(dtype=object), sort=True
+    )
+    fundamentals["as_of_date"] = pd.to_datetime(
+        np.asarray(unique_days, dtype=str), format="%Y-%m-%d"
+    )[day_codes]
+    return fundamentals
 
 
 def get_unique_sectors_and_industries():
     """
-    :return: Dict containing two lists, one for all unique company sectors, and one for unique industries.
+    :return: Dict containing two lists, one for all unique company sectors, and one for unique industries
+    (served from the shared in-memory company index).
     """
-    with db:
-        unique_sectors = []
-        models_sector = CompanyModel.select(CompanyModel.sector).distinct()
-        for model in models_sector:
-            unique_sectors.append(model.sector)
-        unique_industries = []
-        models_industry = CompanyModel.select(CompanyModel.industry).distinct()
-        for model in models_industry:
-            unique_industries.append(model.industry)
-    return {"unique_sectors": unique_sectors, "unique_industries": unique_industries}
+    from sdk.data.universe import get_universe  # the index is built from this module's tables.
+
+    universe = get_universe()
+    return {
+        "unique_sectors": universe.unique("sector"),
+        "unique_industries": universe.unique("industry"),
+    }
 
 
 if __name__ == "__main__":
     """This file can be run directly to set up company table with company metadata"""
-    create_table(CompanyModel, TransactionModel, HoldingModel, PortfolioModel)
+    create_table(
+        CompanyModel,
+        TransactionModel,
+        HoldingModel,
+        PortfolioModel,
+        PriceBarModel,
+        FundamentalModel,
+    )
 
     def populate_company_table_with_defaults():
         """Populate the Company table / model with company data (pulled from snp500 constituents list)."""
+        from sdk.data.ingest import ingest_companies
+
         snp_constituents = download_index_constituents(...)
-        map_download = partial(download_ticker_data, include_metadata=True)
-        all_stock_data = use_threadpool_exec(
-            func=map_download, iterable=snp_constituents
-        )
-        all_stock_data = list(
-            filter(None, all_stock_data)
-        )  # Filter out any downloads that returned nothing
-        comps = []
-        for stock in all_stock_data:
-            try:
-                metadata = stock["metadata"]
-                kwargs = {
-                    "symbol": metadata["symbol"],
-                    "company_name": metadata["longName"],
-                    "sector": metadata["sector"],
-                    "industry": metadata["industry"],
-                    "business_summary": metadata["longBusinessSummary"],
-                    "country": metadata["country"],
-                    "employee_count": metadata["fullTimeEmployees"],
-                    "market_cap": metadata["marketCap"],
-                    "float_shares": metadata["floatShares"],
-                    "is_esg_populated": metadata["isEsgPopulated"],
-                }
-                comp: Company = Company(**kwargs)
-                comps.append(comp)
-            except KeyError as e:
-                logger.warning(e)
-                continue
-        insert_into_company_table(*comps)
+        ingest_companies(snp_constituents)
 
     # aapl = fetch_from_company_table("aapl")
     # aapl = aapl[0]
@@ -0,0 +1,233 @@
+import json
+import os
+import pathlib
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.misc.utils import load_cfg, normalize_symbol, timed
+from sdk.data.storage import MARKET_TZ, MarketDataStore, get_store, to_market_timestamp
+
+PANEL_FIELDS = ("Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits")
+
+module_path = pathlib.Path(__file__).parent.resolve()
+cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
+PRICE_PANEL_PATH = os.path.join(module_path, cfg["PRICE_PANEL_PATH"])
+
+_VALUES_FILE = "values.npy"
+_DATES_FILE = "dates.npy"
+_META_FILE = "meta.json"
+
+
+class PricePanel:
+    """
+    Dense (dates x symbols x fields) array of market data for a whole universe, backed by a memory-mapped .npy
+    file so that every process opening the same panel shares one page-cached copy.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        dates: pd.DatetimeIndex,
+        symbols: Sequence[str],
+        fields: Sequence[str] = PANEL_FIELDS,
+        first_rows: Optional[np.ndarray] = None,
+        last_rows: Optional[np.ndarray] = None,
+    ):
+        if values.shape != (len(dates), len(symbols), len(fields)):
+            raise ValueError(
+                f"Panel shape {values.shape} does not match "
+                f"({len(dates)} dates, {len(symbols)} symbols, {len(fields)} fields)."
+            )
+        self.values = values
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.fields = list(fields)
+        self.symbol_index: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        self.field_index: Dict[str, int] = {f: i for i, f in enumerate(self.fields)}
+        self.date_index: Dict[pd.Timestamp, int] = {d: i for i, d in enumerate(dates)}
+        self.first_rows = (
+            first_rows
+            if first_rows is not None
+            else np.zeros(len(self.symbols), dtype=np.int64)
+        )
+        self.last_rows = (
+            last_rows
+            if last_rows is not None
+            else np.full(len(self.symbols), len(dates) - 1, dtype=np.int64)
+        )
+
+    @classmethod
+    @timed
+    def build(
+        cls,
+        symbols: Optional[Iterable[str]] = None,
+        store: Optional[MarketDataStore] = None,
+        path: str = PRICE_PANEL_PATH,
+        dtype: str = "float64",
+    ) -> "PricePanel":
+        """
+        Write a panel for the given symbols from the market data store, then map it back read-only.
+        :param symbols: tickers to include (default every symbol in the store).
+        :param store: market data store to read from (default configured store).
+        :param path: directory the panel files are written to.
+        :param dtype: float32 or float64 values.
+        :return: PricePanel opened from path.
+        """
+        store = store or get_store()
+        symbols = [normalize_symbol(s) for s in symbols] if symbols else store.symbols()
+        frames = store.load_many(symbols)
+        symbols = list(frames)
+        dates = pd.DatetimeIndex([], tz=MARKET_TZ)
+        for market_data in frames.values():
+            dates = dates.union(market_data.index)
+        os.makedirs(path, exist_ok=True)
+        tmp_values = os.path.join(path, f"{_VALUES_FILE}.tmp")
+        values = np.lib.format.open_memmap(
+            tmp_values,
+            mode="w+",
+            dtype=dtype,
+            shape=(len(dates), len(symbols), len(PANEL_FIELDS)),
+        )
+        values[:] = np.nan
+        first_rows = np.zeros(len(symbols), dtype=np.int64)
+        last_rows = np.zeros(len(symbols), dtype=np.int64)
+        for col, symbol in enumerate(symbols):
+            market_data = frames[symbol]
+            rows = dates.get_indexer(market_data.index)
+            values[rows, col, :] = market_data.reindex(columns=PANEL_FIELDS).to_numpy(
+                dtype=dtype
+            )
+            first_rows[col], last_rows[col] = (
+                (rows[0], rows[-1]) if len(rows) else (0, -1)
+            )
+        values.flush()
+        del values
+        np.save(
+            os.path.join(path, f"{_DATES_FILE}.tmp.npy"),
+            dates.tz_convert("UTC").tz_localize(None).to_numpy(dtype="datetime64[ns]"),
+        )
+        with open(os.path.join(path, f"{_META_FILE}.tmp"), "w") as meta:
+            json.dump(
+                {
+                    "symbols": symbols,
+                    "fields": list(PANEL_FIELDS),
+                    "first_rows": first_rows.tolist(),
+                    "last_rows": last_rows.tolist(),
+                },
+                meta,
+            )
+        # swap files in only once they are complete; processes with the old panel mapped keep their view.
+        os.replace(
+            os.path.join(path, f"{_DATES_FILE}.tmp.npy"),
+            os.path.join(path, _DATES_FILE),
+        )
+        os.replace(
+            os.path.join(path, f"{_META_FILE}.tmp"), os.path.join(path, _META_FILE)
+        )
+        os.replace(tmp_values, os.path.join(path, _VALUES_FILE))
+        logger.success(
+            f"Built price panel ({len(dates)} dates x {len(symbols)} symbols) at {path}"
+        )
+        return cls.open(path)
+
+    @classmethod
+    def from_fields(cls, fields: Dict[str, pd.DataFrame]) -> "PricePanel":
+        """
+        Build an in-memory (not memory-mapped) panel from wide frames, e.g. synthetic data for backtests.
+        :param fields: Dict[field, (dates x symbols) frame] - all frames share the same index and columns.
+        :return: PricePanel.
+        """
+        frames = list(fields.values())
+        values = np.stack(
+            [frame.to_numpy(dtype=np.float64) for frame in frames], axis=-1
+        )
+        return cls(
+            values=values,
+            dates=pd.DatetimeIndex(frames[0].index),
+            symbols=[normalize_symbol(s) for s in frames[0].columns],
+            fields=list(fields),
+        )
+
+    @classmethod
+    def open(cls, path: str = PRICE_PANEL_PATH, mode: str = "r") -> "PricePanel":
+        """
+        :param path: directory holding a panel written by PricePanel.build.
+        :param mode: numpy memmap mode ('r' read-only, 'r+' writable).
+        :return: PricePanel whose values are memory-mapped from disk.
+        """
+        values = np.load(os.path.join(path, _VALUES_FILE), mmap_mode=mode)
+        dates = pd.DatetimeIndex(np.load(os.path.join(path, _DATES_FILE))).tz_localize(
+            "UTC"
+        )
+        with open(os.path.join(path, _META_FILE), "r") as meta:
+            meta = json.load(meta)
+        return cls(
+            values=values,
+            dates=dates.tz_convert(MARKET_TZ).rename("Date"),
+            symbols=meta["symbols"],
+            fields=meta["fields"],
+            first_rows=np.asarray(meta["first_rows"], dtype=np.int64),
+            last_rows=np.asarray(meta["last_rows"], dtype=np.int64),
+        )
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.symbol_index
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """
+        :param symbol: stock ticker.
+        :return: (dates x fields) market data for symbol as a zero-copy view into the panel,
+        trimmed to the rows between the symbol's first and last stored bar.
+        """
+        col = self.symbol_index[normalize_symbol(symbol)]
+        rows = slice(self.first_rows[col], self.last_rows[col] + 1)
+        return pd.DataFrame(
+            self.values[rows, col, :],
+            index=self.dates[rows],
+            columns=self.fields,
+            copy=False,
+        )
+
+    def field(
+        self, field: str = "Close", symbols: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        :param field: e.g. Close.
+        :param symbols: optional subset of symbols (selecting a subset copies).
+        :return: wide (dates x symbols) frame of a single field.
+        """
+        values = self.values[:, :, self.field_index[field]]
+        columns = self.symbols
+        if symbols is not None:
+            columns = [normalize_symbol(s) for s in symbols]
+            values = values[:, [self.symbol_index[s] for s in columns]]
+        return pd.DataFrame(values, index=self.dates, columns=columns, copy=False)
+
+    def row(self, d) -> int:
+        """
+        :param d: date of a bar in the panel.
+        :return: row index of d.
+        """
+        return self.date_index[to_market_timestamp(d)]
+
+    def __repr__(self):
+        return "PricePanel<values[dates, symbols, fields], dates, symbols, fields>"
+
+
+_shared_panel: Optional[PricePanel] = None
+
+
+def get_panel(path: str = PRICE_PANEL_PATH) -> Optional[PricePanel]:
+    """
+    :return: the process-wide read-only panel, or None if no panel has been built yet.
+    """
+    global _shared_panel
+    if _shared_panel is None and os.path.exists(os.path.join(path, _VALUES_FILE)):
+        _shared_panel = PricePanel.open(path)
+    return _shared_panel
+
+
+if __name__ == "__main__":
+    """Run directly (e.g. from the nightly job) to rebuild the shared panel from the market data store."""
+    PricePanel.build()
@@ -0,0 +1,392 @@
+import functools
+import os
+import pathlib
+import string
+import zlib
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from sdk.misc.utils import load_cfg, normalize_symbol
+from sdk.data.request_data import (
+    download_index_constituents,
+    download_multiple_ticker_data,
+)
+from sdk.data.storage import (
+    MARKET_TZ,
+    DateLike,
+    MarketDataStore,
+    get_store,
+    normalize_market_data,
+    to_market_timestamp,
+)
+
+module_path = pathlib.Path(__file__).parent.resolve()
+cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
+
+MARKET_DATA_COLUMNS = (
+    "Open",
+    "High",
+    "Low",
+    "Close",
+    "Volume",
+    "Dividends",
+    "Stock Splits",
+)
+SYNTHETIC_SECTORS = {
+    "Technology": ("Software", "Semiconductors"),
+    "Healthcare": ("Biotechnology", "Medical Devices"),
+    "Financial Services": ("Banks", "Insurance"),
+    "Energy": ("Oil & Gas", "Renewables"),
+    "Utilities": ("Electric Utilities", "Water Utilities"),
+    "Consumer Cyclical": ("Retail", "Automobiles"),
+}
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of daily OHLCV bars (and the universe / company records that go with them). Frames are returned in the
+    store's shape: tz-aware exchange-time 'Date' index and MARKET_DATA_COLUMNS.
+    """
+
+    @abstractmethod
+    def history(
+        self,
+        symbols: Sequence[str],
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        :param symbols: tickers to fetch.
+        :param start_date: optional first date (inclusive) - default the full history.
+        :param end_date: optional last date (inclusive) - default the latest bar.
+        :return: Dict[symbol, market data] (symbols without bars in the range are left out).
+        """
+
+    def load(
+        self,
+        symbol: str,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+    ) -> pd.DataFrame:
+        """
+        :return: market data for a single symbol (empty frame if the provider has none).
+        """
+        symbol = normalize_symbol(symbol)
+        market_data = self.history([symbol], start_date, end_date).get(symbol)
+        if market_data is None:
+            return pd.DataFrame(
+                columns=list(MARKET_DATA_COLUMNS),
+                index=pd.DatetimeIndex([], tz=MARKET_TZ, name="Date"),
+            )
+        return market_data
+
+    def universe(self, index_url: Optional[str] = None) -> List[str]:
+        """
+        :param index_url: page listing an index's constituents (e.g. StockPool.SNP500.value).
+        :return: symbols to pick from.
+        """
+        return download_index_constituents(index_url=index_url)
+
+    def companies(self, symbols: Iterable[str]) -> list:
+        """
+        :return: Company records for symbols (default: from the Company table).
+        """
+        from sdk.data import models  # models imports the entities, which use providers.
+
+        return models.fetch_from_company_table(*symbols)
+
+    def __repr__(self):
+        return f"{type(self).__name__}<>"
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Live Yahoo Finance downloads - one batched request per batch_size symbols.
+    """
+
+    def __init__(self, batch_size: int = 100):
+        self.batch_size = batch_size
+
+    def history(
+        self,
+        symbols: Sequence[str],
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        symbols = [normalize_symbol(s) for s in symbols]
+        start = to_market_timestamp(start_date).date() if start_date else None
+        # yfinance treats end as exclusive.
+        end = (
+            to_market_timestamp(end_date).date() + timedelta(days=1)
+            if end_date
+            else None
+        )
+        frames = {}
+        for i in range(0, len(symbols), self.batch_size):
+            batch = symbols[i : i + self.batch_size]
+            ticker_data = download_multiple_ticker_data(
+                *batch,
+                start_date=start,
+                end_date=end,
+                period=None if start else "max",
+            )
+            downloaded = set(ticker_data.columns.get_level_values(0))
+            for symbol in batch:
+                if symbol not in downloaded:
+                    continue
+                market_data = ticker_data[symbol].dropna(how="all")
+                if not market_data.empty:
+                    frames[symbol] = normalize_market_data(market_data.copy())
+        return frames
+
+    def __repr__(self):
+        return "YFinanceProvider<batch_size>"
+
+
+class StoreProvider(MarketDataProvider):
+    """
+    Serves whatever is in a local market data store - offline, and exactly as the nightly job stored it.
+    """
+
+    def __init__(self, store: Optional[MarketDataStore] = None):
+        """
+        :param store: market data store to read (default the configured store).
+        """
+        self.store = store or get_store()
+
+    def history(
+        self,
+        symbols: Sequence[str],
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        frames = self.store.load_many(
+            [s for s in symbols if self.store.exists(s)], start_date, end_date
+        )
+        return {symbol: data for symbol, data in frames.items() if len(data.index)}
+
+    def universe(self, index_url: Optional[str] = None) -> List[str]:
+        """
+        :return: every stored symbol (index_url is ignored - the store is the universe).
+        """
+        return self.store.symbols()
+
+    def __repr__(self):
+        return "StoreProvider<store>"
+
+
+def synthetic_symbols(n_symbols: int) -> List[str]:
+    """
+    :return: n_symbols distinct 4-letter tickers (AAAA, AAAB, ...), valid for up to 26^4 symbols.
+    """
+    letters = np.array(list(string.ascii_uppercase))
+    codes = np.arange(n_symbols)[:, None] // 26 ** np.arange(3, -1, -1) % 26
+    return ["".join(row) for row in letters[codes]]
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Deterministic random-walk OHLCV for universes of any size. Each symbol's bars depend only on (seed, symbol), so
+    every request - any subset, order or date range - sees the same history, and runs are reproducible.
+    """
+
+    def __init__(
+        self,
+        n_symbols: int = 500,
+        start_date: DateLike = "2013-01-02",
+        end_date: DateLike = "2022-12-30",
+        seed: int = 0,
+        symbols: Optional[Sequence[str]] = None,
+    ):
+        """
+        :param n_symbols: universe size (ignored if symbols is given).
+        :param start_date: first session.
+        :param end_date: last session.
+        :param seed: changes every symbol's history.
+        :param symbols: optional explicit universe.
+        """
+        self.symbols = (
+            [normalize_symbol(s) for s in symbols]
+            if symbols is not None
+            else synthetic_symbols(n_symbols)
+        )
+        self._symbol_set = set(self.symbols)
+        self.dates = pd.bdate_range(
+            to_market_timestamp(start_date).date(),
+            to_market_timestamp(end_date).date(),
+            tz=MARKET_TZ,
+            name="Date",
+        )
+        self.seed = seed
+        self._columns = pd.Index(MARKET_DATA_COLUMNS)
+
+    def _rng(self, symbol: str) -> np.random.Generator:
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+
+    def bars(self, symbol: str, rows: slice = slice(None)) -> pd.DataFrame:
+        """
+        :param rows: optional slice of self.dates to return (the full history is always generated, so every slice
+        agrees with it).
+        :return: the symbol's synthetic history.
+        """
+        rng = self._rng(symbol)
+        n = len(self.dates)
+        drift, volatility = rng.normal(0.0003, 0.0003), rng.uniform(0.01, 0.03)
+        close = rng.uniform(10, 500) * np.exp(
+            np.cumsum(rng.normal(drift, volatility, n))
+        )
+        open_ = np.concatenate(([close[0]], close[:-1])) * np.exp(
+            rng.normal(0, volatility / 4, n)
+        )
+        spread = np.abs(rng.normal(0, volatility / 2, n))
+        dividends = np.zeros(n)
+        dividends[rng.integers(60, 63) :: 63] = np.round(close[0] * 0.004, 2)
+        values = np.column_stack(
+            (
+                open_,
+                np.maximum(open_, close) * (1 + spread),
+                np.minimum(open_, close) * (1 - spread),
+                close,
+                rng.lognormal(13, 1, n).round(),
+                dividends,
+                np.zeros(n),
+            )
+        )
+        return pd.DataFrame(
+            values[rows], index=self.dates[rows], columns=self._columns, copy=False
+        )
+
+    def history(
+        self,
+        symbols: Sequence[str],
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        rows = slice(
+            (
+                self.dates.searchsorted(to_market_timestamp(start_date))
+                if start_date
+                else 0
+            ),
+            (
+                self.dates.searchsorted(to_market_timestamp(end_date), side="right")
+                if end_date
+                else len(self.dates)
+            ),
+        )
+        if rows.start >= rows.stop:
+            return {}
+        frames = {}
+        for symbol in symbols:
+            symbol = normalize_symbol(symbol)
+            if symbol in self._symbol_set:
+                frames[symbol] = self.bars(symbol, rows)
+        return frames
+
+    def universe(self, index_url: Optional[str] = None) -> List[str]:
+        return list(self.symbols)
+
+    def companies(self, symbols: Iterable[str]) -> list:
+        """
+        :return: deterministic synthetic Company records (no db needed).
+        """
+        from sdk.entities.asset import Company
+
+        sectors = list(SYNTHETIC_SECTORS)
+        companies = []
+        for symbol in symbols:
+            symbol = normalize_symbol(symbol)
+            if symbol not in self._symbol_set:
+                continue
+            rng = self._rng(symbol)
+            sector = sectors[rng.integers(len(sectors))]
+            companies.append(
+                Company(
+                    symbol=symbol,
+                    company_name=f"{symbol} Corp.",
+                    sector=sector,
+                    industry=SYNTHETIC_SECTORS[sector][rng.integers(2)],
+                    business_summary=f"Synthetic {sector.lower()} company.",
+                    country="United States",
+                    employee_count=int(rng.integers(100, 200_000)),
+                    market_cap=float(rng.lognormal(23, 1.5)),
+                    float_shares=float(rng.lognormal(19, 1)),
+                    is_esg_populated=False,
+                )
+            )
+        return companies
+
+    def __repr__(self):
+        return "SyntheticProvider<symbols, dates, seed>"
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Replays another provider's history one session at a time: only bars up to the replay clock are visible, and
+    advance() moves the clock - e.g. to drive the refresh job through days of new bars offline.
+    """
+
+    def __init__(self, source: MarketDataProvider, clock: DateLike):
+        """
+        :param source: provider holding the full history (e.g. SyntheticProvider, StoreProvider).
+        :param clock: last visible session.
+        """
+        self.source = source
+        self.clock = to_market_timestamp(clock).normalize()
+
+    def advance(self, sessions: int = 1) -> pd.Timestamp:
+        """
+        :return: the new clock, sessions business days later.
+        """
+        self.clock = self.clock + pd.offsets.BDay(sessions)
+        return self.clock
+
+    def history(
+        self,
+        symbols: Sequence[str],
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        end = (
+            self.clock
+            if end_date is None
+            else min(self.clock, to_market_timestamp(end_date))
+        )
+        if start_date is not None and to_market_timestamp(start_date) > end:
+            return {}
+        return self.source.history(symbols, start_date, end)
+
+    def universe(self, index_url: Optional[str] = None) -> List[str]:
+        return self.source.universe(index_url)
+
+    def companies(self, symbols: Iterable[str]) -> list:
+        return self.source.companies(symbols)
+
+    def __repr__(self):
+        return "ReplayProvider<source, clock>"
+
+
+def get_provider(name: Optional[str] = None) -> MarketDataProvider:
+    """
+    :param name: 'yfinance', 'store' or 'synthetic' (defaults to MARKET_DATA_PROVIDER in config.json).
+    :return: the configured provider (one shared instance per name).
+    """
+    return _get_provider(name or cfg.get("MARKET_DATA_PROVIDER", "yfinance"))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_provider(name: str) -> MarketDataProvider:
+    if name == "yfinance":
+        return YFinanceProvider()
+    if name == "store":
+        return StoreProvider()
+    if name == "synthetic":
+        return SyntheticProvider(
+            n_symbols=cfg.get("SYNTHETIC_UNIVERSE_SIZE", 500),
+            seed=cfg.get("SYNTHETIC_SEED", 0),
+        )
+    raise ValueError(
+        f"Market data provider '{name}' invalid - Options: ('yfinance', 'store', 'synthetic')"
+    )
@@ -0,0 +1,109 @@
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.misc.utils import normalize_symbol, timed
+from sdk.data.providers import MarketDataProvider, get_provider
+from sdk.data.storage import MarketDataStore, get_store, normalize_market_data
+
+
+def _pending_start_dates(
+    symbols: Iterable[str], store: MarketDataStore, today: date
+) -> Dict[Optional[date], List[str]]:
+    """
+    :return: symbols that need new bars, grouped by the first date to fetch (None for symbols with no data).
+    """
+    groups = defaultdict(list)
+    for symbol in symbols:
+        last_date = store.last_date(symbol)
+        if last_date is None:
+            groups[None].append(symbol)
+            continue
+        start_date = last_date.date() + timedelta(days=1)
+        if np.busday_count(start_date, today + timedelta(days=1)) == 0:
+            continue  # no session has closed since the last stored bar.
+        groups[start_date].append(symbol)
+    return groups
+
+
+def _append_new_rows(
+    store: MarketDataStore, symbol: str, market_data: Optional[pd.DataFrame]
+) -> int:
+    """
+    :param market_data: bars returned by the provider for symbol (None if it returned nothing).
+    :return: number of bars appended for symbol.
+    """
+    if market_data is None:
+        return 0
+    market_data = market_data.dropna(how="all")
+    if market_data.empty:
+        return 0
+    market_data = normalize_market_data(market_data.copy())
+    last_date = store.last_date(symbol)
+    if last_date is not None:
+        market_data = market_data[market_data.index > last_date]
+        if market_data.empty:
+            return 0
+    store.save(symbol, market_data, append=last_date is not None)
+    return len(market_data.index)
+
+
+@timed
+def refresh_universe(
+    symbols: Optional[Iterable[str]] = None,
+    store: Optional[MarketDataStore] = None,
+    batch_size: int = 100,
+    provider: Optional[MarketDataProvider] = None,
+    today: Optional[date] = None,
+) -> Dict[str, int]:
+    """
+    Bring stored market data up to date with one batched download per group of symbols sharing a start date,
+    appending only the new bars.
+    :param symbols: tickers to refresh (default every symbol in the store).
+    :param store: market data store to update (default configured store).
+    :param batch_size: max number of symbols per download call.
+    :param provider: where new bars come from (default configured provider, see MARKET_DATA_PROVIDER).
+    :param today: date to refresh up to (default date.today() - e.g. a ReplayProvider's clock when replaying).
+    :return: Dict[symbol, number of bars appended].
+    """
+    store = store or get_store()
+    provider = provider or get_provider()
+    symbols = [normalize_symbol(s) for s in symbols] if symbols else store.symbols()
+    groups = _pending_start_dates(symbols, store, today=today or date.today())
+    appended = {symbol: 0 for symbol in symbols}
+    downloads = 0
+    for start_date, group in groups.items():
+        for i in range(0, len(group), batch_size):
+            batch = group[i : i + batch_size]
+            frames = provider.history(batch, start_date=start_date, end_date=today)
+            downloads += 1
+            for symbol in batch:
+                try:
+                    appended[symbol] = _append_new_rows(
+                        store, symbol, frames.get(symbol)
+                    )
+                except (ValueError, KeyError, OSError) as err:
+                    logger.warning(f"Failed to append new bars for {symbol}: {err}")
+    logger.success(
+        f"Refreshed {len(symbols)} symbols with {downloads} batched downloads"
+        f" ({sum(appended.values())} new bars)."
+    )
+    return appended
+
+
+if __name__ == "__main__":
+    """Run directly (nightly) to refresh every stored symbol, rebuild the shared price panel if one exists, roll
+    the saved risk covariance forward by the new days, then precompute the dashboard snapshot served by the api.
+    """
+    from sdk.data.panel import PRICE_PANEL_PATH, PricePanel
+    from sdk.analytics.dashboard import build_dashboard_snapshot
+    from sdk.analytics.risk import refresh_covariance
+
+    refresh_universe()
+    if os.path.exists(PRICE_PANEL_PATH):
+        PricePanel.build()
+    refresh_covariance()
+    build_dashboard_snapshot()
@@ -1,5 +1,8 @@
 import yfinance as yf
+import requests
 import requests_cache
+import threading
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, List
 from datetime import date
 from loguru import logger
@@ -7,6 +10,7 @@ import pandas as pd
 import pathlib
 import os
 from sdk.misc.utils import load_cfg, normalize_symbol, timed
+from sdk.data.storage import CsvStore, get_store
 
 VALID_PERIODS = ("1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max")
 VALID_INTERVALS = (
@@ -28,6 +32,38 @@ module_path = pathlib.Path(__file__).parent.resolve()
 cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
 TICKER_DATA_PATH = os.path.join(module_path, cfg["TICKER_DATA_PATH"])
 
+_sessions: Dict[bool, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def make_session(
+    pool_size: int = 32, use_cache: bool = False, cache_name: str = "yfinance.cache"
+) -> requests.Session:
+    """
+    :param pool_size: keep-alive connections kept per host (match the number of threads sharing the session).
+    :param use_cache: cache responses with requests_cache.
+    :param cache_name: requests_cache backend name.
+    :return: new requests session.
+    """
+    session = (
+        requests_cache.CachedSession(cache_name) if use_cache else requests.Session()
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-agent"] = "algobot/1.0"
+    return session
+
+
+def get_session(use_cache: bool = True) -> requests.Session:
+    """
+    :return: process-wide shared session (one per cache setting), so downloads reuse connections and the cache.
+    """
+    with _sessions_lock:
+        if use_cache not in _sessions:
+            _sessions[use_cache] = make_session(use_cache=use_cache)
+        return _sessions[use_cache]
+
 
 @timed
 def download_multiple_ticker_data(
@@ -52,7 +88,7 @@ def download_multiple_ticker_data(
         raise ValueError(f"Period '{period}' invalid - Options: {VALID_PERIODS}")
     if interval not in VALID_INTERVALS:
         raise ValueError(f"Interval '{interval}' invalid - Options: {VALID_INTERVALS}")
-    symbols = map(normalize_symbol, symbols)
+    symbols = list(map(normalize_symbol, symbols))
     tickers_joined = " ".join(symbols)
     logger.debug(f"Fetching data for {len(symbols)} symbols.")
     ticker_data: pd.DataFrame = yf.download(
@@ -62,7 +98,14 @@ def download_multiple_ticker_data(
         group_by="ticker",
         period=period,
         interval=interval,
+        actions=True,
+        auto_adjust=True,  # match the adjusted prices yf.Ticker.history stores.
+        threads=True,
+        progress=False,
     )
+    if not isinstance(ticker_data.columns, pd.MultiIndex):
+        # a single ticker comes back without the (ticker, field) column level.
+        ticker_data.columns = pd.MultiIndex.from_product([symbols, ticker_data.columns])
     return ticker_data
 
 
@@ -85,7 +128,7 @@ def download_ticker_data(
     :param period: alternative to start&end date (e.g. 1d).
     :param interval: time between each record (e.g. for intraday data).
     :param include_metadata: include information about the company.
-    :param use_cache: use requests_cache to store api call.
+    :param use_cache: use the shared requests_cache session (otherwise the shared uncached session).
     :param append_data: append data to the corresponding data csv file.
     :return: Dict[metadata, market_data]
     """
@@ -95,13 +138,8 @@ def download_ticker_data(
         raise ValueError(f"Period '{period}' invalid - Options: {VALID_PERIODS}")
     if interval not in VALID_INTERVALS:
         raise ValueError(f"Interval '{interval}' invalid - Options: {VALID_INTERVALS}")
-    if use_cache:
-        session = requests_cache.CachedSession("yfinance.cache")
-        session.headers["User-agent"] = "algobot/1.0"
-    else:
-        session = None
     symbol = normalize_symbol(symbol)
-    stock_data = yf.Ticker(symbol, session=session)
+    stock_data = yf.Ticker(symbol, session=get_session(use_cache))
     metadata = stock_data.info if include_metadata else None
     if metadata and metadata.get("longName", None) is None:
         logger.warning(f"Metadata missing for symbol download {symbol}")
@@ -109,10 +147,10 @@ def download_ticker_data(
     market_data = stock_data.history(
         start=start_date, end=end_date, period=period, interval=interval
     )
-    if not os.path.exists(os.path.join(TICKER_DATA_PATH, f"{symbol}.csv")):
-        save_ticker_market_data_to_csv(symbol, market_data)
-    if append_data:
-        save_ticker_market_data_to_csv(symbol, market_data, append=True)
+    if not get_store().exists(symbol):
+        save_ticker_market_data(symbol, market_data)
+    elif append_data:
+        save_ticker_market_data(symbol, market_data, append=True)
     return {"metadata": metadata, "market_data": market_data}
 
 
@@ -128,6 +166,38 @@ def download_index_constituents(index_url: str) -> List[str]:
     return list(tickers)
 
 
+def save_ticker_market_data(
+    symbol: str, market_data: pd.DataFrame, append: bool = False
+) -> None:
+    """
+    Save downloaded market data for given ticker to the configured store (MARKET_DATA_BACKEND).
+    :param: symbol: corresponding stock ticker.
+    :param: market_data: data to save.
+    :param: append: if append, new data will be appended to the stored data.
+    :return: None.
+    """
+    get_store().save(symbol, market_data, append=append)
+
+
+def load_ticker_data(
+    symbol: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Load downloaded market data for given ticker from the configured store (MARKET_DATA_BACKEND).
+    :param symbol: corresponding stock ticker.
+    :param start_date: optional first date to load.
+    :param end_date: optional last date to load.
+    :param columns: optional subset of columns (e.g. ["Close"]).
+    :return: pd.DataFrame (market data).
+    """
+    return get_store().load(
+        symbol, start_date=start_date, end_date=end_date, columns=columns
+    )
+
+
 def save_ticker_market_data_to_csv(
     symbol: str, market_data: pd.DataFrame, append: bool = False
 ) -> None:
@@ -138,15 +208,7 @@ def save_ticker_market_data_to_csv(
     :param: append: if append, new data will be appended to the csv file.
     :return: None.
     """
-    symbol = normalize_symbol(symbol)
-    path = os.path.join(TICKER_DATA_PATH, f"{symbol}.csv")
-    if append:
-        market_data.to_csv(path_or_buf=path, mode="a", header=False)
-    else:
-        market_data.to_csv(path_or_buf=path)
-    logger.debug(
-        f"Saved market data ({len(market_data.index)} rows) for {symbol} to {path}"
-    )
+    CsvStore(root=TICKER_DATA_PATH).save(symbol, market_data, append=append)
 
 
 def load_ticker_data_csv(symbol: str) -> pd.DataFrame:
@@ -155,7 +217,4 @@ def load_ticker_data_csv(symbol: str) -> pd.DataFrame:
     :param symbol: corresponding stock ticker (will be name of csv).
     :return: pd.DataFrame (market data).
     """
-    symbol = normalize_symbol(symbol)
-    path = os.path.join(TICKER_DATA_PATH, f"{symbol}.csv")
-    market_data = pd.read_csv(filepath_or_buffer=path, index_col="Date")
-    return market_data
+    return CsvStore(root=TICKER_DATA_PATH).load(symbol)
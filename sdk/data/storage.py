@@ -0,0 +1,424 @@
+import argparse
+import functools
+import os
+import pathlib
+import shutil
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.misc.utils import load_cfg, normalize_symbol, timed
+
+MARKET_TZ = "America/New_York"
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Dividends", "Stock Splits")
+VALID_PRICE_DTYPES = ("float32", "float64")
+
+module_path = pathlib.Path(__file__).parent.resolve()
+cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
+
+DateLike = Union[date, datetime, str, pd.Timestamp]
+
+
+def to_market_timestamp(d: DateLike) -> pd.Timestamp:
+    """
+    :param d: date, datetime or date string.
+    :return: tz-aware (exchange time) timestamp for d.
+    """
+    ts = pd.Timestamp(d)
+    if ts.tzinfo is None:
+        return ts.tz_localize(MARKET_TZ)
+    return ts.tz_convert(MARKET_TZ)
+
+
+def to_day_ordinals(dates: Union[pd.DatetimeIndex, Iterable[DateLike]]) -> np.ndarray:
+    """
+    :param dates: tz-aware timestamps (converted to exchange time) or naive dates / date strings.
+    :return: int64 days since 1970-01-01 of each exchange-local date - cheap to sort and binary search.
+    """
+    if isinstance(dates, pd.DatetimeIndex):
+        index = dates
+    else:
+        dates = list(dates)
+        try:
+            index = pd.DatetimeIndex(dates)
+        except (TypeError, ValueError):  # mix of naive and tz-aware values
+            index = pd.DatetimeIndex([to_market_timestamp(d) for d in dates])
+    if index.tz is not None:
+        index = index.tz_convert(MARKET_TZ).tz_localize(None)
+    return (
+        index.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    )
+
+
+def normalize_market_data(market_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the 'Date' index (e.g. '2022-11-30 00:00:00-05:00' strings read back from csv) into a tz-aware
+    DatetimeIndex in exchange time, so every backend hands back identically shaped frames.
+    :param market_data: OHLCV data indexed by date.
+    :return: market data with a sorted DatetimeIndex named 'Date'.
+    """
+    index = market_data.index
+    if not isinstance(index, pd.DatetimeIndex):
+        try:
+            # offsets are always exchange-local, so parsing the wall-clock part is ~5x faster than a utc parse.
+            index = pd.to_datetime(
+                index.astype(str).str.slice(0, 19), format="%Y-%m-%d %H:%M:%S"
+            ).tz_localize(MARKET_TZ)
+        except (ValueError, TypeError):
+            index = pd.to_datetime(market_data.index, utc=True)
+    if index.tz is None:
+        index = index.tz_localize(MARKET_TZ)
+    market_data.index = index.tz_convert(MARKET_TZ).rename("Date")
+    if market_data.index.has_duplicates:
+        market_data = market_data[~market_data.index.duplicated(keep="last")]
+    if not market_data.index.is_monotonic_increasing:
+        market_data = market_data.sort_index()
+    return market_data
+
+
+class MarketDataStore(ABC):
+    """
+    Storage backend for per-symbol OHLCV market data.
+    """
+
+    @abstractmethod
+    def path(self, symbol: str) -> str:
+        """
+        :param symbol: stock ticker.
+        :return: location of the data backing the given symbol.
+        """
+
+    @abstractmethod
+    def load(
+        self,
+        symbol: str,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        :param symbol: stock ticker.
+        :param start_date: optional first date (inclusive) to load.
+        :param end_date: optional last date (inclusive) to load.
+        :param columns: optional subset of columns to load (e.g. ["Close"]).
+        :return: pd.DataFrame (market data) indexed by a tz-aware DatetimeIndex.
+        """
+
+    @abstractmethod
+    def save(
+        self, symbol: str, market_data: pd.DataFrame, append: bool = False
+    ) -> None:
+        """
+        :param symbol: stock ticker.
+        :param market_data: data to save.
+        :param append: if append, new rows are added after the stored data.
+        :return: None.
+        """
+
+    def exists(self, symbol: str) -> bool:
+        return os.path.exists(self.path(symbol))
+
+    def last_modified(self, symbol: str) -> datetime:
+        """
+        :return: time the symbol's data was last written.
+        """
+        return datetime.fromtimestamp(os.path.getmtime(self.path(symbol)))
+
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        """
+        :return: date of the most recent stored bar for symbol (None if nothing is stored).
+        """
+        if not self.exists(symbol):
+            return None
+        index = self.load(symbol, columns=[]).index
+        return index[-1] if len(index) else None
+
+    @abstractmethod
+    def symbols(self) -> List[str]:
+        """
+        :return: every symbol with data in this store.
+        """
+
+    @timed
+    def load_many(
+        self,
+        symbols: Iterable[str],
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        :param symbols: tickers to load (missing symbols are skipped with a warning).
+        :return: Dict[symbol, market data].
+        """
+        market_data = {}
+        for symbol in symbols:
+            symbol = normalize_symbol(symbol)
+            if not self.exists(symbol):
+                logger.warning(f"No stored market data for {symbol}.")
+                continue
+            market_data[symbol] = self.load(
+                symbol, start_date=start_date, end_date=end_date, columns=columns
+            )
+        return market_data
+
+
+class CsvStore(MarketDataStore):
+    """
+    One csv file per symbol (the original on-disk format).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{normalize_symbol(symbol)}.csv")
+
+    def load(
+        self,
+        symbol: str,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        usecols = ["Date", *columns] if columns is not None else None
+        market_data = pd.read_csv(
+            filepath_or_buffer=self.path(symbol), index_col="Date", usecols=usecols
+        )
+        market_data = normalize_market_data(market_data)
+        if start_date is not None or end_date is not None:
+            market_data = market_data.loc[
+                to_market_timestamp(start_date) if start_date is not None else None : (
+                    to_market_timestamp(end_date) if end_date is not None else None
+                )
+            ]
+        return market_data
+
+    def save(
+        self, symbol: str, market_data: pd.DataFrame, append: bool = False
+    ) -> None:
+        path = self.path(symbol)
+        header = None
+        if append and os.path.exists(path):
+            with open(path, "r") as csv:
+                header = csv.readline().strip().split(",")
+        # an empty file is rewritten whole, header included.
+        if header and header != [""]:
+            # append to a copy and swap it in, so readers never see a partially written row.
+            tmp_path = f"{path}.tmp"
+            shutil.copyfile(path, tmp_path)
+            market_data.reindex(columns=header[1:]).to_csv(
+                path_or_buf=tmp_path, mode="a", header=False
+            )
+            os.replace(tmp_path, path)
+        else:
+            market_data.to_csv(path_or_buf=path)
+        logger.debug(
+            f"Saved market data ({len(market_data.index)} rows) for {normalize_symbol(symbol)} to {path}"
+        )
+
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        if not self.exists(symbol):
+            return None
+        with open(self.path(symbol), "rb") as csv:
+            csv.seek(0, os.SEEK_END)
+            csv.seek(max(csv.tell() - 1024, 0))
+            lines = csv.read().decode().strip().splitlines()
+        # empty / whitespace-only file, or a header without rows.
+        if not lines or (len(lines) < 2 and lines[-1].startswith("Date")):
+            return None
+        return normalize_market_data(
+            pd.DataFrame(index=[lines[-1].split(",", 1)[0]])
+        ).index[-1]
+
+    def symbols(self) -> List[str]:
+        return sorted(
+            file[: -len(".csv")]
+            for file in os.listdir(self.root)
+            if file.endswith(".csv")
+        )
+
+
+class ParquetStore(MarketDataStore):
+    """
+    Columnar store partitioned by symbol (<root>/symbol=<SYMBOL>/data.parquet), with typed price columns,
+    row-group statistics for date-range predicate pushdown and column projection on read.
+    """
+
+    def __init__(
+        self, root: str, price_dtype: str = "float64", row_group_size: int = 2_520
+    ):
+        if price_dtype not in VALID_PRICE_DTYPES:
+            raise ValueError(
+                f"Price dtype '{price_dtype}' invalid - Options: {VALID_PRICE_DTYPES}"
+            )
+        self.root = root
+        self.price_dtype = price_dtype
+        self.row_group_size = row_group_size
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(
+            self.root, f"symbol={normalize_symbol(symbol)}", "data.parquet"
+        )
+
+    def load(
+        self,
+        symbol: str,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        import pyarrow.parquet as pq
+
+        filters = []
+        if start_date is not None:
+            filters.append(("Date", ">=", to_market_timestamp(start_date)))
+        if end_date is not None:
+            filters.append(("Date", "<=", to_market_timestamp(end_date)))
+        table = pq.read_table(
+            self.path(symbol),
+            columns=["Date", *columns] if columns is not None else None,
+            filters=filters or None,
+        )
+        market_data = table.to_pandas().set_index("Date")
+        market_data.index = market_data.index.tz_convert(MARKET_TZ)
+        return market_data
+
+    def save(
+        self, symbol: str, market_data: pd.DataFrame, append: bool = False
+    ) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        symbol = normalize_symbol(symbol)
+        market_data = self._typed(normalize_market_data(market_data.copy()))
+        if append and self.exists(symbol):
+            stored = self.load(symbol)
+            market_data = pd.concat([stored, market_data])
+            market_data = market_data[~market_data.index.duplicated(keep="last")]
+        path = self.path(symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(market_data.reset_index(), preserve_index=False)
+        # write next to the target then swap it in, so readers never see a half-written file.
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_size)
+        os.replace(tmp_path, path)
+        logger.debug(
+            f"Saved market data ({len(market_data.index)} rows) for {symbol} to {path}"
+        )
+
+    def symbols(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            partition.split("=", 1)[1]
+            for partition in os.listdir(self.root)
+            if partition.startswith("symbol=")
+        )
+
+    @timed
+    def load_universe(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        columns: Sequence[str] = ("Close",),
+    ) -> pd.DataFrame:
+        """
+        Read many symbols in a single dataset scan.
+        :param symbols: optional tickers to restrict the scan to (default every stored symbol).
+        :param start_date: optional first date (inclusive).
+        :param end_date: optional last date (inclusive).
+        :param columns: columns to project.
+        :return: long pd.DataFrame indexed by (symbol, Date).
+        """
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.root, format="parquet", partitioning="hive")
+        expression = None
+        if symbols is not None:
+            expression = ds.field("symbol").isin([normalize_symbol(s) for s in symbols])
+        for op, d in (("__ge__", start_date), ("__le__", end_date)):
+            if d is None:
+                continue
+            condition = getattr(ds.field("Date"), op)(to_market_timestamp(d))
+            expression = condition if expression is None else expression & condition
+        table = dataset.to_table(
+            columns=["symbol", "Date", *columns], filter=expression
+        )
+        market_data = table.to_pandas()
+        market_data["symbol"] = market_data["symbol"].astype(str)
+        market_data["Date"] = market_data["Date"].dt.tz_convert(MARKET_TZ)
+        return market_data.set_index(["symbol", "Date"]).sort_index()
+
+    def _typed(self, market_data: pd.DataFrame) -> pd.DataFrame:
+        dtypes = {col: self.price_dtype for col in PRICE_COLUMNS if col in market_data}
+        if "Volume" in market_data:
+            dtypes["Volume"] = (
+                "float64"  # yfinance leaves gaps (NaN) in volume for some symbols.
+            )
+        return market_data.astype(dtypes)
+
+
+def get_store(backend: Optional[str] = None) -> MarketDataStore:
+    """
+    :param backend: 'csv' or 'parquet' (defaults to MARKET_DATA_BACKEND in config.json). An empty parquet store is
+    filled from the csv ticker data directory on first use (see migrate_store).
+    :return: the configured market data store (one shared instance per backend).
+    """
+    return _get_store(backend or cfg.get("MARKET_DATA_BACKEND", "parquet"))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_store(backend: str) -> MarketDataStore:
+    if backend == "csv":
+        return CsvStore(root=os.path.join(module_path, cfg["TICKER_DATA_PATH"]))
+    if backend == "parquet":
+        store = ParquetStore(
+            root=os.path.join(module_path, cfg["PARQUET_DATA_PATH"]),
+            price_dtype=cfg.get("PARQUET_PRICE_DTYPE", "float64"),
+        )
+        if not store.symbols():
+            csv_store = _get_store("csv")
+            if csv_store.symbols():
+                logger.info(
+                    f"Parquet store {store.root} is empty - migrating the csv ticker data."
+                )
+                migrate_store(source=csv_store, target=store)
+        return store
+    raise ValueError(
+        f"Market data backend '{backend}' invalid - Options: ('csv', 'parquet')"
+    )
+
+
+@timed
+def migrate_store(source: MarketDataStore, target: MarketDataStore) -> int:
+    """
+    Copy every symbol from one store to another (e.g. the csv directory into a ParquetStore).
+    :param source: store to read from.
+    :param target: store to (over)write.
+    :return: number of symbols migrated.
+    """
+    migrated = 0
+    for symbol in source.symbols():
+        try:
+            target.save(symbol, source.load(symbol))
+        except (ValueError, KeyError, OSError) as err:
+            logger.warning(f"Skipping {symbol}: {err}")
+            continue
+        migrated += 1
+    logger.success(f"Migrated {migrated} symbols to {type(target).__name__}.")
+    return migrated
+
+
+if __name__ == "__main__":
+    """Run directly to migrate the csv ticker data directory into the parquet store."""
+    parser = argparse.ArgumentParser(description="Migrate csv ticker data to parquet.")
+    parser.add_argument("--dtype", choices=VALID_PRICE_DTYPES, default=None)
+    args = parser.parse_args()
+    parquet_store = get_store("parquet")
+    if args.dtype:
+        parquet_store.price_dtype = args.dtype
+    migrate_store(source=get_store("csv"), target=parquet_store)
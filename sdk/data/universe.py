@@ -0,0 +1,233 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from loguru import logger
+from sdk.data import models
+from sdk.entities.asset import Company
+from sdk.misc.utils import normalize_symbol, timed
+
+CATEGORY_FIELDS = ("sector", "industry", "country")
+NUMERIC_FIELDS = ("market_cap", "float_shares", "employee_count")
+
+# set bits per byte value, for counting bitset members without unpacking.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+Criterion = Union[str, Iterable[str], Tuple[Optional[float], Optional[float]]]
+
+
+class CompanyUniverse:
+    """
+    Column-oriented in-memory index of company metadata for screening. Sector / industry / country are dictionary
+    encoded, with an inverted index from each value to a bitset of the symbols having it; market cap, float shares
+    and employee count are float arrays (NaN when unknown). A screen is an AND of bitsets, so compound screens run
+    in microseconds and their results can be combined and reused - the universe itself is immutable.
+    Bitsets are np.packbits arrays over the universe's symbol order.
+    """
+
+    def __init__(self, companies: Iterable[Company]):
+        """
+        :param companies: Company records (a later record for the same symbol replaces an earlier one).
+        """
+        by_symbol = {normalize_symbol(company.symbol): company for company in companies}
+        self.companies: List[Company] = list(by_symbol.values())
+        self.symbols: List[str] = list(by_symbol)
+        self.symbol_index: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+
+        self.values: Dict[str, List[str]] = {}  # field -> code -> value
+        self.codes: Dict[str, np.ndarray] = {}  # field -> per-symbol code (-1: missing)
+        self.bitsets: Dict[str, Dict[str, np.ndarray]] = {}  # field -> value -> bitset
+        for field in CATEGORY_FIELDS:
+            raw = [getattr(company, field) for company in self.companies]
+            values = sorted({v for v in raw if v})
+            code_of = {v: code for code, v in enumerate(values)}
+            codes = np.fromiter(
+                (code_of.get(v, -1) if v else -1 for v in raw), dtype=np.int32, count=n
+            )
+            self.values[field] = values
+            self.codes[field] = codes
+            self.bitsets[field] = {
+                v: np.packbits(codes == code) for code, v in enumerate(values)
+            }
+
+        self.numeric: Dict[str, np.ndarray] = {
+            field: np.array(
+                [getattr(company, field) for company in self.companies],
+                dtype=np.float64,
+            )
+            for field in NUMERIC_FIELDS
+        }
+        self._all = np.packbits(np.ones(n, dtype=bool))
+        self._none = np.zeros_like(self._all)
+
+    @classmethod
+    @timed
+    def from_db(cls) -> "CompanyUniverse":
+        """
+        :return: index of every company in the Company table.
+        """
+        universe = cls(models.fetch_from_company_table(every=True))
+        logger.info(f"Indexed {len(universe)} companies.")
+        return universe
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.symbol_index
+
+    def all(self) -> np.ndarray:
+        """
+        :return: bitset of every symbol.
+        """
+        return self._all.copy()
+
+    def invert(self, bits: np.ndarray) -> np.ndarray:
+        """
+        :return: bitset of the symbols not in bits (padding bits stay clear).
+        """
+        return self._all & ~bits
+
+    def isin(self, symbols: Iterable[str]) -> np.ndarray:
+        """
+        :param symbols: tickers - those not in the universe are ignored.
+        :return: bitset of symbols.
+        """
+        mask = np.zeros(len(self.symbols), dtype=bool)
+        rows = [self.symbol_index.get(normalize_symbol(s)) for s in symbols]
+        mask[[row for row in rows if row is not None]] = True
+        return np.packbits(mask)
+
+    def where(self, field: str, *values: str) -> np.ndarray:
+        """
+        :param field: sector, industry or country.
+        :param values: accepted values (OR-ed) - unknown values match nothing.
+        :return: bitset of symbols whose field is one of values.
+        """
+        if field not in self.bitsets:
+            raise ValueError(
+                f"Cannot screen on {field!r}, expected one of {CATEGORY_FIELDS}."
+            )
+        index = self.bitsets[field]
+        bits = self._none
+        for value in values:
+            bits = bits | index.get(value, self._none)
+        return bits
+
+    def between(
+        self, field: str, low: Optional[float] = None, high: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        :param field: market_cap, float_shares or employee_count.
+        :param low: inclusive lower bound (None: unbounded).
+        :param high: inclusive upper bound (None: unbounded).
+        :return: bitset of symbols with a known field value within [low, high].
+        """
+        if field not in self.numeric:
+            raise ValueError(
+                f"Cannot screen on {field!r}, expected one of {NUMERIC_FIELDS}."
+            )
+        values = self.numeric[field]
+        mask = ~np.isnan(values)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return np.packbits(mask)
+
+    def screen(self, **criteria: Criterion) -> np.ndarray:
+        """
+        AND of per-field criteria, e.g. screen(sector="Technology", country="United States", market_cap=(10e9, None)).
+        :param criteria: category field -> value or iterable of values (OR-ed);
+        numeric field -> (low, high) inclusive bounds, None for unbounded.
+        :return: bitset of matching symbols.
+        """
+        bits = self._all
+        for field, criterion in criteria.items():
+            if field in self.numeric:
+                bits = bits & self.between(field, *criterion)
+            elif isinstance(criterion, str):
+                bits = bits & self.where(field, criterion)
+            else:
+                bits = bits & self.where(field, *criterion)
+        return bits
+
+    def rows(self, bits: np.ndarray) -> np.ndarray:
+        """
+        :return: positions (in symbol order) of the members of bits.
+        """
+        return np.flatnonzero(np.unpackbits(bits, count=len(self.symbols)))
+
+    def count(self, bits: np.ndarray) -> int:
+        """
+        :return: number of symbols in bits.
+        """
+        return int(_POPCOUNT[bits].sum())
+
+    def select(self, bits: np.ndarray) -> List[str]:
+        """
+        :return: symbols in bits.
+        """
+        return [self.symbols[row] for row in self.rows(bits)]
+
+    def select_companies(self, bits: np.ndarray) -> List[Company]:
+        """
+        :return: Company records of the symbols in bits.
+        """
+        return [self.companies[row] for row in self.rows(bits)]
+
+    def unique(self, field: str) -> List[str]:
+        """
+        :return: sorted distinct (non-empty) values of a category field.
+        """
+        return list(self.values[field])
+
+    def value_counts(
+        self, field: str, bits: Optional[np.ndarray] = None
+    ) -> Dict[str, int]:
+        """
+        :param field: sector, industry or country.
+        :param bits: optional bitset to count within (default: every symbol).
+        :return: number of symbols per value, largest first.
+        """
+        codes = self.codes[field]
+        if bits is not None:
+            codes = codes[self.rows(bits)]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.values[field]))
+        order = np.argsort(-counts, kind="stable")
+        return {self.values[field][i]: int(counts[i]) for i in order if counts[i]}
+
+    def __repr__(self):
+        return "CompanyUniverse<symbols, companies, values, codes, bitsets, numeric>"
+
+
+_shared_universe: Optional[CompanyUniverse] = None
+_shared_version = -1
+
+
+def get_universe(reload: bool = False) -> CompanyUniverse:
+    """
+    :param reload: rebuild the index from the Company table.
+    :return: the process-wide company index, loaded on first use and again after the Company table is written to
+    from this process.
+    """
+    global _shared_universe, _shared_version
+    version = models.company_table_version
+    if reload or _shared_universe is None or _shared_version != version:
+        _shared_universe = CompanyUniverse.from_db()
+        _shared_version = version
+    return _shared_universe
+
+
+def screen(**criteria: Criterion) -> List[str]:
+    """
+    :param criteria: see CompanyUniverse.screen.
+    :return: symbols in the shared universe matching every criterion.
+    """
+    universe = get_universe()
+    return universe.select(universe.screen(**criteria))
+
+
+if __name__ == "__main__":
+    universe = get_universe()
+    print(universe.value_counts("sector"))
+    print(screen(sector="Technology", country="United States", market_cap=(10e9, None)))
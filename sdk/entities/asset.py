@@ -1,22 +1,22 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Iterable, Optional, Tuple
+import numpy as np
 import pandas as pd
-import pathlib
-import os
 from loguru import logger
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 import textwrap
 from sdk.misc.enums import AssetType
 from sdk.misc.utils import (
     normalize_symbol,
     currency,
-    load_cfg,
     format_datetime_12h
 )
-from sdk.data.request_data import (
-    download_ticker_data,
-    load_ticker_data_csv,
-)
+from sdk.data.request_data import load_ticker_data
+from sdk.data.refresh import refresh_universe
+from sdk.data.storage import DateLike, get_store, to_day_ordinals
+from sdk.data.panel import PricePanel
+from sdk.data.providers import MarketDataProvider
+from sdk.factors.cache import next_version
 
 
 class Stock:
@@ -25,54 +25,110 @@ class Stock:
         symbol: str,
         company: Optional[Company] = None,
         market_data: Optional[pd.DataFrame] = None,
+        panel: Optional[PricePanel] = None,
+        provider: Optional[MarketDataProvider] = None,
     ):
+        """
+        :param panel: optional shared PricePanel - if the symbol is in it, market_data is a zero-copy view into it.
+        :param provider: optional MarketDataProvider to load (and refresh) market data from instead of the local
+        store, e.g. a SyntheticProvider for offline runs.
+        """
         self.asset_type = AssetType.Stock
         self.symbol = normalize_symbol(symbol)
         self.company = company
-        module_path = pathlib.Path(__file__).parent.resolve()
-        cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
-        ticker_data_path = os.path.join(module_path, "..", "data", cfg["TICKER_DATA_PATH"])
-        __path = os.path.join(ticker_data_path, f"{normalize_symbol(symbol)}.csv")
-        if market_data is None:
-            if not os.path.exists(__path):
-                self.__refresh_market_data(replace=True)
-            market_data = load_ticker_data_csv(symbol=symbol)
-        self.market_data = market_data
-        self.__market_data_path = __path
+        self._panel = panel
+        self._provider = provider
+        self._market_data = None
+        self._price_index: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        if market_data is not None:
+            self.market_data = market_data
         self.metrics = {}
 
-    def get_price(self, d: datetime.date = None) -> float:
+    @property
+    def market_data(self) -> pd.DataFrame:
         """
-        :return: stock price on date d. Most recent price is returned if d not supplied.
+        Loaded on first access (from the panel if the symbol is in it, else from the provider if one was given,
+        else from the local store - downloading it first if it isn't stored yet), so constructing a Stock is free.
         """
-        now = datetime.now()
-        #  check to see if local csv data needs to be updated.
-        data_lag = now - datetime.fromtimestamp(os.path.getmtime(self.__market_data_path))
-        if data_lag > timedelta(days=1):
-            self.__refresh_market_data()
-        if not d:
-            price = self.market_data["Close"].iloc[-1]
-        else:
-            price = self.market_data.loc[str(d) + " 00:00:00-05:00", 'Close']  # saved all the data with a timestamp :(
-        return price
-
-    def __refresh_market_data(self, replace: bool = False):
+        if self._market_data is None:
+            if self._panel is not None and self.symbol in self._panel:
+                self.market_data = self._panel.frame(self.symbol)
+            elif self._provider is not None:
+                self.market_data = self._provider.load(self.symbol)
+            else:
+                if not get_store().exists(self.symbol):
+                    refresh_universe([self.symbol])
+                self.market_data = load_ticker_data(symbol=self.symbol)
+        return self._market_data
+
+    @market_data.setter
+    def market_data(self, market_data: pd.DataFrame) -> None:
+        self._market_data = market_data
+        self._market_data.attrs["symbol"] = self.symbol  # lets indicator results be cached per symbol.
+        self._market_data.attrs["version"] = next_version()  # and keeps a reload from hitting old entries.
+        self._price_index = None
+
+    def _prices_by_day(self) -> Tuple[np.ndarray, np.ndarray]:
         """
-        :param replace: if no csv is found, or we just want to populate the csv file with entirely new data.
-        Update the ticker market data csv file if more than 1 day has elapsed since refresh
-        (assuming not intraday data).
+        :return: (sorted day ordinals, closes) of every bar with a close - built once per market data load.
         """
-        logger.debug(f"Refreshing data for {self.symbol}.")
-        if replace:
-            download_ticker_data(symbol=self.symbol)
-        else:
-            last_date = pd.to_datetime(
-                self.market_data.index[-1]
-            ).to_pydatetime() + timedelta(days=1)
-            download_ticker_data(
-                symbol=self.symbol, start_date=last_date, append_data=True
+        if self._price_index is None:
+            closes = self.market_data["Close"].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(closes)
+            self._price_index = (
+                to_day_ordinals(self.market_data.index)[valid],
+                closes[valid],
             )
-        self.market_data = load_ticker_data_csv(self.symbol)
+        return self._price_index
+
+    def get_price(self, d: Optional[DateLike] = None) -> float:
+        """
+        Served from local market data only - stale data is brought up to date by refresh()/the refresh job,
+        never from here.
+        :return: last close on or before date d (so weekends/holidays get the previous close). Most recent price
+        is returned if d not supplied.
+        """
+        days, closes = self._prices_by_day()
+        if not len(closes):
+            raise ValueError(f"No price data for {self.symbol}.")
+        if d is None:
+            return float(closes[-1])
+        i = np.searchsorted(days, to_day_ordinals([d])[0], side="right") - 1
+        if i < 0:
+            raise ValueError(f"No {self.symbol} price on or before {d}.")
+        return float(closes[i])
+
+    def get_prices(self, dates: Iterable[DateLike]) -> pd.Series:
+        """
+        Vectorized get_price: one binary search over the bars for all dates.
+        :param dates: dates to price (any order).
+        :return: last close on or before each date, indexed by dates (NaN before the first bar).
+        """
+        index = dates if isinstance(dates, pd.DatetimeIndex) else pd.DatetimeIndex(list(dates))
+        days, closes = self._prices_by_day()
+        i = np.searchsorted(days, to_day_ordinals(index), side="right") - 1
+        prices = np.full(len(i), np.nan)
+        prices[i >= 0] = closes[i[i >= 0]]
+        return pd.Series(prices, index=index, name=self.symbol)
+
+    def refresh(self) -> int:
+        """
+        Append any bars published since the last stored one, then reload market data.
+        :return: number of new bars.
+        """
+        logger.debug(f"Refreshing data for {self.symbol}.")
+        if self._provider is not None:
+            market_data = self.market_data
+            start_date = market_data.index[-1] if len(market_data.index) else None
+            new_bars = self._provider.load(self.symbol, start_date=start_date)
+            if start_date is not None:
+                new_bars = new_bars[new_bars.index > start_date]
+            if len(new_bars.index):
+                self.market_data = pd.concat([market_data, new_bars])
+            return len(new_bars.index)
+        appended = refresh_universe([self.symbol])[self.symbol]
+        self.market_data = load_ticker_data(self.symbol)
+        return appended
 
     def __str__(self):
         return (
@@ -100,9 +156,15 @@ class Holding:
         self.qty_owned = qty_owned
         self.date_purchased = date_purchased
 
-    def get_market_value(self, d: datetime.date) -> float:
+    def get_market_value(self, d: Optional[DateLike] = None) -> float:
         return self.stock.get_price(d=d) * self.qty_owned
 
+    def get_market_values(self, dates: Iterable[DateLike]) -> pd.Series:
+        """
+        :return: value of the current position on each of dates.
+        """
+        return self.stock.get_prices(dates) * self.qty_owned
+
     def __str__(self):
         return (
             f"[Holding] {self.stock.company.company_name} ({self.stock.symbol}) | {self.qty_owned} shares @ "
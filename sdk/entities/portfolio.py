@@ -1,14 +1,27 @@
 import random
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List, Union
+import numpy as np
+import pandas as pd
 from loguru import logger
 from datetime import date, datetime
 
 from sdk.data.request_data import download_index_constituents
-from sdk.entities.asset import Stock, Holding
+from sdk.entities.asset import Company, Stock, Holding
 from sdk.entities.transaction import Transaction, MarketBuy, MarketSell
 from sdk.misc.enums import StockPool
 from sdk.misc.utils import currency
 from sdk.data import models
+from sdk.data.panel import get_panel
+from sdk.data.providers import MarketDataProvider
+from sdk.data.storage import DateLike
+from sdk.data.universe import CompanyUniverse, Criterion, get_universe
+from sdk.analytics.valuation import PortfolioValuation
+from sdk.analytics.optimization import (
+    PortfolioOptimizer,
+    WeightConstraints,
+    rebalance_orders,
+)
+from sdk.analytics.risk import TRADING_DAYS, returns_panel
 
 
 class Portfolio:
@@ -19,14 +32,19 @@ class Portfolio:
         holdings: Optional[List[Holding]] = None,
         value_history: Optional[List] = None,
         transaction_history: Optional[List[Transaction]] = None,
+        load_local: bool = True,
     ):
+        """
+        :param load_local: look for saved holdings/transactions/values for this portfolio in the db
+        (disable for throwaway portfolios, e.g. in backtests).
+        """
         self.name = name
         self.free_cash = free_cash
         self.holdings = {holding.symbol: holding for holding in holdings} if holdings else {}
         self.value_history = value_history if value_history else []
         self.transaction_history = transaction_history if transaction_history else []
 
-        if not all((holdings, value_history, transaction_history)):
+        if load_local and not all((holdings, value_history, transaction_history)):
             try:
                 self.__load()  # try to look for local data for this portfolio
             except Exception as err:  # //TODO <find a better error to catch lul>
@@ -104,6 +122,26 @@ class Portfolio:
             val += self.holdings[holding].get_market_value(d=d)
         return val
 
+    def get_values_of_holdings(self, dates: Iterable[DateLike]) -> pd.Series:
+        """
+        Vectorized get_value_of_holdings - value of the current holdings on each of dates, with one batched price
+        lookup per holding.
+        :param dates: dates to value the holdings on.
+        :return: value of holdings indexed by dates.
+        """
+        index = dates if isinstance(dates, pd.DatetimeIndex) else pd.DatetimeIndex(list(dates))
+        values = pd.Series(0.0, index=index, name="holdings_value")
+        for holding in self.holdings.values():
+            values += holding.get_market_values(index).fillna(0.0).to_numpy()
+        return values
+
+    def get_valuation(self, close: Optional[pd.DataFrame] = None):
+        """
+        :param close: optional (dates x symbols) close panel (default: shared PricePanel / holdings' market data).
+        :return: PortfolioValuation - daily equity curve, cash and per-holding values/contributions.
+        """
+        return PortfolioValuation.from_portfolio(self, close=close)
+
     def get_total_value(self) -> float:
         """
         :return: value of holdings + free cash.
@@ -163,42 +201,195 @@ class Portfolio:
 
 
 class PortfolioBuilder:
-    def __init__(self, portfolio: Portfolio, stock_pool: StockPool):
+    """
+    Picks stocks from an index. Company records come from the shared in-memory CompanyUniverse (loaded once per
+    process), the constituent list is only fetched when first needed, and a Stock (and its market data) is only
+    built for a company once it is actually picked.
+    """
+
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        stock_pool: StockPool,
+        provider: Optional[MarketDataProvider] = None,
+        universe: Optional[CompanyUniverse] = None,
+    ):
+        """
+        :param provider: optional MarketDataProvider supplying the universe, company records and market data
+        (default: index constituents, the Company table and the local store / price panel).
+        :param universe: optional company index to screen (default: the shared index of the Company table, or an
+        index of the provider's companies).
+        """
         self.portfolio = portfolio
+        self.provider = provider
         self.name = f"{portfolio.name}_builder"
         self._stock_pool = stock_pool.value
-        _stock_pool = download_index_constituents(index_url=self._stock_pool)
-        _stock_pool = models.fetch_from_company_table(*_stock_pool)
-        self.stocks = [
-            Stock(symbol=company.symbol, company=company) for company in _stock_pool
-        ]
-        self._filtered_pool = None
+        self._universe = universe
+        self._pool: Optional[np.ndarray] = None
+        self._stocks: Dict[str, Stock] = {}
+        self._filtered_pool: Optional[List[Company]] = None
+        self._filter_criteria: Dict[str, Criterion] = {}
+
+    @property
+    def universe(self) -> CompanyUniverse:
+        if self._universe is None:
+            if self.provider is not None:
+                self._universe = CompanyUniverse(
+                    self.provider.companies(
+                        self.provider.universe(index_url=self._stock_pool)
+                    )
+                )
+            else:
+                self._universe = get_universe()
+        return self._universe
 
-    def fetch_new_stock(self):
-        if self._filtered_pool:
-            return random.choice(self._filtered_pool)
-        return random.choice(self.stocks)
+    @property
+    def pool(self) -> np.ndarray:
+        """
+        :return: bitset (over self.universe) of the index constituents.
+        """
+        if self._pool is None:
+            if self.provider is not None and self._universe is None:
+                self._pool = self.universe.all()
+            else:
+                constituents = (
+                    self.provider.universe(index_url=self._stock_pool)
+                    if self.provider is not None
+                    else download_index_constituents(index_url=self._stock_pool)
+                )
+                self._pool = self.universe.isin(constituents)
+        return self._pool
+
+    @property
+    def companies(self) -> List[Company]:
+        """
+        :return: Company records of the index constituents.
+        """
+        return self.universe.select_companies(self.pool)
+
+    def get_stock(self, company: Company) -> Stock:
+        """
+        :return: the (cached) Stock for company, sharing the memory-mapped price panel if one has been built
+        (and no provider was given).
+        """
+        if company.symbol not in self._stocks:
+            self._stocks[company.symbol] = Stock(
+                symbol=company.symbol,
+                company=company,
+                panel=get_panel() if self.provider is None else None,
+                provider=self.provider,
+            )
+        return self._stocks[company.symbol]
+
+    def candidates(self) -> List[Company]:
+        """
+        :return: Company records stocks are picked from - the filtered pool if a filter is set, else every
+        constituent.
+        """
+        if self._filtered_pool is None:
+            companies = self.companies
+            if not companies:
+                raise ValueError(f"No constituents in the {self.name} stock pool.")
+            return companies
+        if not self._filtered_pool:
+            raise ValueError(
+                f"No constituents match the filter {self._filter_criteria} - drop or change it."
+            )
+        return self._filtered_pool
+
+    def fetch_new_stock(self) -> Stock:
+        return self.get_stock(random.choice(self.candidates()))
+
+    def filter_by(self, **criteria: Criterion):
+        """
+        Restrict picks to constituents matching every criterion, e.g.
+        filter_by(sector="Technology", country="United States", market_cap=(10e9, None)).
+        :param criteria: see CompanyUniverse.screen.
+        :return: None
+        """
+        universe = self.universe
+        self._filtered_pool = universe.select_companies(
+            self.pool & universe.screen(**criteria)
+        )
+        self._filter_criteria = criteria
+        if not self._filtered_pool:
+            logger.warning(f"No constituents match the filter {criteria}.")
 
     def filter_by_sector(self, sector: str):
         """
         :param sector: key (attr) to filter companies
         :return: None
         """
-        self._filtered_pool = filter(
-            lambda stock: stock.company.sector == sector, self.stocks
-        )
+        self.filter_by(sector=sector)
 
     def filter_by_industry(self, industry: str):
         """
         :param industry: key (attr) to filter companies.
         :return: None
         """
-        self._filtered_pool = filter(
-            lambda stock: stock.company.industry == industry, self.stocks
-        )
+        self.filter_by(industry=industry)
 
     def drop_filter(self):
         self._filtered_pool = None
+        self._filter_criteria = {}
+
+    def target_weights(
+        self,
+        method: str = "min_variance",
+        lookback: int = TRADING_DAYS,
+        max_weight: float = 0.1,
+        sector_caps: Union[None, float, Dict[str, float]] = None,
+        **kwargs,
+    ) -> pd.Series:
+        """
+        Optimize weights over the (filtered) pool instead of picking at random.
+        :param method: min_variance, mean_variance or risk_parity (see PortfolioOptimizer).
+        :param lookback: days of returns to estimate covariance / expected returns from.
+        :param max_weight: cap on each stock's weight.
+        :param sector_caps: optional cap on each sector's total weight (one for all, or Dict[sector, cap]).
+        :param kwargs: passed to the optimizer method (e.g. risk_aversion).
+        :return: target weight per symbol (fractions of the portfolio's total value).
+        """
+        companies = self.candidates()
+        close = (
+            pd.DataFrame(
+                {c.symbol: self.get_stock(c).market_data["Close"] for c in companies}
+            )
+            .sort_index()
+            .iloc[-(lookback + 1) :]
+        )
+        constraints = WeightConstraints.for_symbols(
+            close.columns,
+            universe=self.universe,
+            max_weight=max_weight,
+            sector_caps=sector_caps,
+        )
+        optimizer = PortfolioOptimizer.from_returns(
+            returns_panel(close).iloc[1:], constraints=constraints
+        )
+        return optimizer.solve(method, **kwargs)
+
+    def rebalance(self, weights: pd.Series, execute: bool = True) -> List[Transaction]:
+        """
+        :param weights: target weights, e.g. from target_weights().
+        :param execute: apply the orders to the portfolio (sells first, so buys are funded from free_cash).
+        :return: whole-share MarketSell / MarketBuy orders at the latest closes.
+        """
+        stocks = {
+            symbol: holding.stock
+            for symbol, holding in self.portfolio.holdings.items()
+            if holding.stock is not None
+        }
+        stocks.update(self._stocks)
+        prices = pd.Series({s: stock.get_price() for s, stock in stocks.items()})
+        orders = rebalance_orders(self.portfolio, weights, prices)
+        if execute:
+            for order in orders:
+                if isinstance(order, MarketSell):
+                    self.portfolio.sell_asset(order)
+                else:
+                    self.portfolio.purchase_asset(order, stock=stocks[order.symbol])
+        return orders
 
 
 if __name__ == "__main__":
@@ -0,0 +1,253 @@
+import functools
+import hashlib
+import inspect
+import itertools
+import os
+import pathlib
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sdk.misc.utils import load_cfg
+
+module_path = pathlib.Path(__file__).parent.resolve()
+cfg = load_cfg(prepend_path=os.path.join(module_path, ".."))
+
+_MISSING = object()
+# rows whose values the default fingerprint samples.
+_SAMPLED_ROWS = 8
+_versions = itertools.count(1)
+# hash whole inputs for cache keys (see fingerprint).
+EXACT_FINGERPRINTS = bool(cfg.get("INDICATOR_CACHE_EXACT", False))
+
+
+def next_version() -> int:
+    """
+    :return: a process-unique number, stamped by Stock on every market data (re)load as attrs['version'].
+    """
+    return next(_versions)
+
+
+def fingerprint(data: Any, exact: bool = False) -> Tuple:
+    """
+    Content fingerprint of indicator input: row count, first and last index label and the values of a few evenly
+    spaced rows (first and last included) - O(1) in the length of the input. Appending bars, transforms that keep
+    the source's name and attrs (np.log(close), close * 2) and back-adjusted history all change sampled values, and
+    a reload by Stock changes attrs['version'].
+    :param data: pd.Series / pd.DataFrame passed to an indicator.
+    :param exact: hash every value and index label instead (costs more than most indicators it would save).
+    :return: tuple usable in a cache key.
+    """
+    label = tuple(data.columns) if isinstance(data, pd.DataFrame) else data.name
+    n_rows = len(data.index)
+    version = data.attrs.get("version")
+    if exact:
+        hashes = pd.util.hash_pandas_object(data, index=True).to_numpy(dtype=np.uint64)
+        digest = hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+        return label, n_rows, version, digest
+    if not n_rows:
+        return label, 0, version
+    # (plain numpy throughout - pandas scalar access costs tens of microseconds a call)
+    rows = np.arange(_SAMPLED_ROWS) * (n_rows - 1) // (_SAMPLED_ROWS - 1)
+    sampled = data.to_numpy()[rows].ravel().tolist()
+    index = data.index
+    if isinstance(index, pd.DatetimeIndex):
+        ends = index.asi8[[0, -1]].tolist()
+    else:
+        ends = [index[0], index[-1]]
+    return label, n_rows, version, *ends, *sampled
+
+
+class IndicatorCache:
+    """
+    Two-tier (in-memory LRU, then on-disk pickle) cache of indicator results keyed by
+    (symbol, indicator, params, fingerprint of the input data). The disk tier is bounded too: past
+    max_disk_entries files, the least recently used are deleted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1_024,
+        cache_dir: Optional[str] = None,
+        max_disk_entries: int = 8_192,
+    ):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._disk_entries = 0
+        self._memory: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypasses = 0
+        self.disk_evictions = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_entries = len(self._disk_files())
+
+    def _disk_files(self):
+        return [
+            os.path.join(self.cache_dir, file)
+            for file in os.listdir(self.cache_dir)
+            if file.endswith(".pkl")
+        ]
+
+    def _disk_path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def get(self, key: Hashable) -> Any:
+        """
+        :return: cached value for key, or the module-level _MISSING sentinel.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with open(self._disk_path(key), "rb") as file:
+                    value = pickle.load(file)
+            except (OSError, pickle.UnpicklingError, EOFError) as err:
+                logger.warning(f"Discarding unreadable indicator cache entry: {err}")
+            else:
+                self.disk_hits += 1
+                self._touch(self._disk_path(key))
+                self._remember(key, value)
+                return value
+        self.misses += 1
+        return _MISSING
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._remember(key, value)
+        if self.cache_dir:
+            path = self._disk_path(key)
+            is_new = not os.path.exists(path)
+            with open(f"{path}.tmp", "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{path}.tmp", path)
+            with self._lock:
+                self._disk_entries += is_new
+                over = self._disk_entries > self.max_disk_entries
+            if over:
+                self._prune_disk()
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        # modification time doubles as last use, for the disk tier's LRU order.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _prune_disk(self) -> None:
+        """
+        Delete the least recently used disk entries, down to 90% of max_disk_entries (so pruning, which lists the
+        directory, runs once per many writes rather than on every one).
+        """
+
+        def last_used(path: str) -> float:
+            try:
+                return os.path.getmtime(path)
+            except OSError:  # removed by another process meanwhile.
+                return 0.0
+
+        files = sorted(self._disk_files(), key=last_used)
+        excess = len(files) - int(self.max_disk_entries * 0.9)
+        removed = 0
+        for path in files[: max(excess, 0)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_entries = len(files) - removed
+            self.disk_evictions += removed
+
+    def _remember(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, disk: bool = False) -> None:
+        """
+        :param disk: also delete the on-disk tier.
+        """
+        with self._lock:
+            self._memory.clear()
+        if disk and self.cache_dir:
+            for file in os.listdir(self.cache_dir):
+                if file.endswith(".pkl"):
+                    os.remove(os.path.join(self.cache_dir, file))
+            self._disk_entries = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: hit/miss/eviction counters and current size of the memory tier.
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "bypasses": self.bypasses,
+            "entries": len(self._memory),
+        }
+
+    def __repr__(self):
+        return "IndicatorCache<max_entries, cache_dir, max_disk_entries, hits, disk_hits, misses, evictions, bypasses>"
+
+
+indicator_cache = IndicatorCache(
+    max_entries=cfg.get("INDICATOR_CACHE_SIZE", 1_024),
+    max_disk_entries=cfg.get("INDICATOR_CACHE_DISK_SIZE", 8_192),
+    cache_dir=(
+        os.path.join(module_path, "..", "data", cfg["INDICATOR_CACHE_PATH"])
+        if cfg.get("INDICATOR_CACHE_PATH")
+        else None
+    ),
+)
+
+
+def cached_indicator(func: Callable) -> Callable:
+    """
+    (decorator) Memoize an indicator method in indicator_cache. Apply beneath @classmethod.
+    The symbol is read from data.attrs['symbol'] (set by Stock on its market data); inputs without one bypass the
+    cache. Keys include a fingerprint of the input, so new bars, re-adjusted prices or a transformed series
+    (which inherits the symbol attr) never hit another input's entry.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper_cached(cls, *args, **kwargs):
+        bound = signature.bind(cls, *args, **kwargs)
+        bound.apply_defaults()
+        _, (_, data), *params = bound.arguments.items()
+        symbol = getattr(data, "attrs", {}).get("symbol")
+        if symbol is None:
+            indicator_cache.bypasses += 1
+            return func(cls, *args, **kwargs)
+        key = (
+            symbol,
+            func.__qualname__,
+            tuple(params),
+            fingerprint(data, exact=EXACT_FINGERPRINTS),
+        )
+        value = indicator_cache.get(key)
+        if value is _MISSING:
+            value = func(cls, *args, **kwargs)
+            indicator_cache.put(key, value)
+        return value.copy() if hasattr(value, "copy") else value
+
+    return wrapper_cached
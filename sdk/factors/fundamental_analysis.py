@@ -0,0 +1,210 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from sdk.data import models
+from sdk.data.storage import DateLike
+from sdk.entities.asset import Company
+from sdk.misc.utils import normalize_symbol, timed
+
+# fields valuation_ratios reads: trailing twelve month EPS, book value per share and float shares.
+VALUATION_FIELDS = ("eps", "book_value_per_share", "float_shares")
+# company metadata fields recorded by fundamentals_from_companies.
+COMPANY_FIELDS = ("market_cap", "float_shares", "employee_count")
+
+
+def _trading_days(dates: pd.DatetimeIndex) -> np.ndarray:
+    """
+    :return: calendar day of each (market timezone) date, as datetime64[D].
+    """
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[D]")
+
+
+class PointInTimeFundamentals:
+    """
+    Reported fundamentals (symbol, as_of_date, field, value) held as one sorted array per field, for as-of joins
+    onto a (dates x symbols) price grid. as_of_date is when a value became public, so a value is only visible on
+    trading dates after it - never on the fiscal period it describes. The join is a searchsorted of every
+    observation onto the trading calendar plus a forward fill, with no per-row lookups.
+    """
+
+    def __init__(self, fundamentals: pd.DataFrame):
+        """
+        :param fundamentals: long frame with symbol, as_of_date, field and value columns (NaN values are dropped).
+        """
+        missing = {"symbol", "as_of_date", "field", "value"} - set(fundamentals.columns)
+        if missing:
+            raise ValueError(f"Fundamentals are missing columns: {sorted(missing)}")
+        fundamentals = fundamentals.dropna(subset=["value"])
+        symbol_codes, symbols = pd.factorize(
+            fundamentals["symbol"].map(normalize_symbol)
+        )
+        self.symbols: List[str] = list(symbols)
+        days = pd.to_datetime(fundamentals["as_of_date"]).to_numpy(
+            dtype="datetime64[D]"
+        )
+        values = fundamentals["value"].to_numpy(dtype=np.float64)
+        field_codes, fields = pd.factorize(fundamentals["field"])
+        # field -> (symbol codes, days, values), sorted by symbol then day.
+        self.series: Dict[str, tuple] = {}
+        for code, name in enumerate(fields):
+            rows = np.flatnonzero(field_codes == code)
+            order = rows[np.lexsort((days[rows], symbol_codes[rows]))]
+            self.series[name] = (symbol_codes[order], days[order], values[order])
+
+    @classmethod
+    @timed
+    def from_db(
+        cls,
+        symbols: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None,
+    ) -> "PointInTimeFundamentals":
+        """
+        :param symbols: tickers to load (default: every symbol in the Fundamental table).
+        :param fields: fields to load (default: every field).
+        """
+        return cls(models.fetch_fundamentals(symbols, fields))
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.series)
+
+    def align(
+        self,
+        dates: pd.DatetimeIndex,
+        symbols: Sequence[str],
+        fields: Optional[Iterable[str]] = None,
+        lag: int = 1,
+    ) -> Dict[str, np.ndarray]:
+        """
+        :param dates: trading dates of the grid (sorted), e.g. the index of a close panel.
+        :param symbols: columns of the grid - symbols without fundamentals are all NaN.
+        :param fields: fields to align (default: every field).
+        :param lag: trading days after as_of_date before a value is used. 1 (default): first used the next trading
+        day, since filings usually land after the close; 0: used on as_of_date itself.
+        :return: Dict[field, (dates x symbols) array] holding, for each date, the latest value published before it.
+        """
+        days = _trading_days(dates)
+        columns = {normalize_symbol(s): i for i, s in enumerate(symbols)}
+        # symbol code (in this store) -> grid column, -1 for symbols not in the grid (and for code -1: no symbol).
+        column_of = np.array(
+            [columns.get(s, -1) for s in self.symbols] + [-1], dtype=np.int64
+        )
+        aligned = {}
+        for name in fields if fields is not None else self.fields:
+            if name not in self.series:
+                raise ValueError(
+                    f"No fundamental field {name!r}, expected one of {self.fields}."
+                )
+            symbol_codes, as_of, values = self.series[name]
+            grid = np.full((len(days), len(columns)), np.nan)
+            cols = column_of[symbol_codes]
+            # first grid row each observation may be used on.
+            if lag == 0:
+                starts = np.searchsorted(days, as_of, side="left")
+            else:
+                starts = np.searchsorted(days, as_of, side="right") + (lag - 1)
+                # published before the grid starts: known on its first date.
+                starts[as_of < days[:1]] = 0
+            used = (cols >= 0) & (starts < len(days))
+            cols, starts, values = cols[used], starts[used], values[used]
+            # several observations landing on one cell: the latest published wins (rows are date sorted).
+            last = np.ones(len(cols), dtype=bool)
+            last[:-1] = (cols[1:] != cols[:-1]) | (starts[1:] != starts[:-1])
+            cols, starts, values = cols[last], starts[last], values[last]
+            # forward fill by carrying the row of the latest observation down each column.
+            observed = np.full(grid.shape, -1, dtype=np.int64)
+            observed[starts, cols] = np.arange(len(values))
+            # observation numbers increase with date within a column, so a running max is the latest one.
+            observed = np.maximum.accumulate(observed, axis=0)
+            known = observed >= 0
+            grid[known] = values[observed[known]]
+            aligned[name] = grid
+        return aligned
+
+    def frames(
+        self,
+        close: pd.DataFrame,
+        fields: Optional[Iterable[str]] = None,
+        lag: int = 1,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        :param close: (dates x symbols) frame giving the grid.
+        :return: Dict[field, (dates x symbols) frame] - see align. Can be passed to FactorContext as extra fields.
+        """
+        return {
+            name: pd.DataFrame(values, index=close.index, columns=close.columns)
+            for name, values in self.align(
+                close.index, close.columns, fields, lag
+            ).items()
+        }
+
+    def __repr__(self):
+        return "PointInTimeFundamentals<symbols, series>"
+
+
+@timed
+def valuation_ratios(
+    close: pd.DataFrame, fundamentals: PointInTimeFundamentals, lag: int = 1
+) -> Dict[str, pd.DataFrame]:
+    """
+    Point-in-time valuation of every symbol on every date, from one as-of join of eps, book_value_per_share and
+    float_shares (whichever the store holds).
+    :param close: (dates x symbols) close prices.
+    :param fundamentals: reported values, see PointInTimeFundamentals.
+    :param lag: see PointInTimeFundamentals.align.
+    :return: Dict of (dates x symbols) frames: pe and pb (NaN where earnings / book value are not positive),
+    earnings_yield and book_to_price (defined for losses too, so better suited to ranking) and market_cap
+    (price x float shares).
+    """
+    prices = close.to_numpy(dtype=np.float64)
+    available = [name for name in VALUATION_FIELDS if name in fundamentals.series]
+    aligned = fundamentals.align(close.index, close.columns, available, lag)
+    missing = np.full(prices.shape, np.nan)
+    eps = aligned.get("eps", missing)
+    book = aligned.get("book_value_per_share", missing)
+    float_shares = aligned.get("float_shares", missing)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = {
+            "pe": np.where(eps > 0, prices / eps, np.nan),
+            "pb": np.where(book > 0, prices / book, np.nan),
+            "earnings_yield": eps / prices,
+            "book_to_price": book / prices,
+            "market_cap": prices * float_shares,
+        }
+    return {
+        name: pd.DataFrame(values, index=close.index, columns=close.columns)
+        for name, values in ratios.items()
+    }
+
+
+def fundamentals_from_companies(
+    companies: Iterable[Company], as_of_date: DateLike
+) -> pd.DataFrame:
+    """
+    Snapshot of Company metadata (market cap, float shares, employee count) as fundamentals rows, so that repeated
+    metadata refreshes build up a history instead of overwriting the Company table's single value.
+    :param companies: Company records, e.g. from ingest_companies.
+    :param as_of_date: date the metadata was retrieved.
+    :return: long frame for insert_into_fundamental_table.
+    """
+    rows = [
+        (normalize_symbol(company.symbol), name, getattr(company, name))
+        for company in companies
+        for name in COMPANY_FIELDS
+        if getattr(company, name) is not None
+    ]
+    fundamentals = pd.DataFrame(rows, columns=["symbol", "field", "value"])
+    fundamentals.insert(1, "as_of_date", pd.Timestamp(as_of_date).normalize())
+    return fundamentals
+
+
+if __name__ == "__main__":
+    close = models.fetch_price_panel(
+        [company.symbol for company in models.fetch_from_company_table(every=True)]
+    )
+    fundamentals = PointInTimeFundamentals.from_db(list(close.columns))
+    print(fundamentals.fields)
+    print(valuation_ratios(close, fundamentals)["pe"].tail())
@@ -0,0 +1,204 @@
+from typing import Union
+import numpy as np
+import pandas as pd
+
+Panel = Union[pd.DataFrame, np.ndarray]
+
+
+def _values(panel: Panel) -> np.ndarray:
+    return np.asarray(panel, dtype=np.float64)
+
+
+def _like(panel: Panel, values: np.ndarray, name: str) -> Panel:
+    """
+    :return: values wrapped in the same container (and labels) as the input panel.
+    """
+    if isinstance(panel, pd.DataFrame):
+        result = pd.DataFrame(values, index=panel.index, columns=panel.columns)
+        result.columns.name = name
+        return result
+    return values
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    shifted = np.full_like(values, np.nan)
+    if periods >= 0:
+        shifted[periods:] = values[: len(values) - periods]
+    else:
+        shifted[:periods] = values[-periods:]
+    return shifted
+
+
+def _windowed_cumsum(values: np.ndarray, window: int) -> np.ndarray:
+    cumulative = np.cumsum(values, axis=0)
+    cumulative[window:] = cumulative[window:] - cumulative[:-window]
+    return cumulative
+
+
+def _rolling_sums(values: np.ndarray, window: int, *powers: int):
+    """
+    NaN-aware rolling window sums along the date axis, via cumulative sums.
+    :return: (count of valid values, *sums of values**power) per window.
+    """
+    valid = ~np.isnan(values)
+    if valid.all():
+        # no gaps - the count only depends on the row, so skip a full (dates x symbols) pass.
+        count = np.minimum(np.arange(1, len(values) + 1), window)[:, None].astype(
+            np.float64
+        )
+        filled = values
+    else:
+        count = _windowed_cumsum(valid.astype(np.float64), window)
+        filled = np.where(valid, values, 0.0)
+    sums = [_windowed_cumsum(filled if p == 1 else filled**p, window) for p in powers]
+    return [count, *sums]
+
+
+def _nan_cumsum(values: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sum that skips NaN (pandas' cumsum semantics): NaN inputs stay NaN without breaking the running total.
+    """
+    cumulative = np.nancumsum(values, axis=0)
+    cumulative[np.isnan(values)] = np.nan
+    return cumulative
+
+
+class PanelIndicators:
+    """
+    Cross-sectional counterparts of Metrics / TechnicalIndicators - each method takes wide (dates x symbols) panels
+    and computes the indicator for every symbol at once, returning a panel of the same shape.
+    Results match the per-symbol methods column by column.
+    """
+
+    @classmethod
+    def percent_returns(cls, prices_or_values: Panel, interval: str = "daily") -> Panel:
+        """
+        :param prices_or_values: close prices (dates x symbols)
+        :param interval: specifies the interval to calculate returns over (daily, monthly, yearly)
+        :return: percent returns bucketed via interval
+        """
+        if interval == "yearly":
+            period = 252
+        elif interval == "monthly":
+            period = 21
+        else:
+            period = 1
+        values = _values(prices_or_values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent_returns = values / _shift(values, period) - 1
+        percent_returns[~np.isfinite(percent_returns)] = 0.0
+        return _like(prices_or_values, percent_returns, "pct_returns")
+
+    @classmethod
+    def rolling_std(cls, pct_returns: Panel, window: int = 30) -> Panel:
+        """
+        :param pct_returns: percent returns (dates x symbols)
+        :param window: number of days within window
+        :return: rolling sample standard deviation (decimal)
+        """
+        values = _values(pct_returns)
+        # centre each column first so the sum-of-squares difference doesn't lose precision.
+        with np.errstate(invalid="ignore"):
+            centre = np.nanmean if np.isnan(values).any() else np.mean
+            centred = values - np.nan_to_num(centre(values, axis=0))
+        count, total, total_sq = _rolling_sums(centred, window, 1, 2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            total *= total
+            total /= count
+            total_sq -= total
+            total_sq /= count - 1
+        np.maximum(total_sq, 0.0, out=total_sq)
+        rolling_std = np.sqrt(total_sq, out=total_sq)
+        rolling_std[np.broadcast_to(count < 2, rolling_std.shape)] = np.nan
+        return _like(pct_returns, rolling_std, "rolling_std")
+
+    @classmethod
+    def sma(cls, prices_or_values: Panel, window: int = 30) -> Panel:
+        """
+        :param prices_or_values: close prices (dates x symbols)
+        :param window: number of days within window
+        :return: simple moving average (rolling arithmetic mean)
+        """
+        count, total = _rolling_sums(_values(prices_or_values), window, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sma = total / count
+        sma[np.broadcast_to(count == 0, sma.shape)] = np.nan
+        return _like(prices_or_values, sma, "sma")
+
+    @classmethod
+    def ema(cls, prices_or_values: Panel, window: int = 30) -> Panel:
+        """
+        The recursion runs along the date axis, but each step updates every symbol in one vector operation.
+        :param prices_or_values: close prices (dates x symbols)
+        :param window: number of days within window
+        :return: exponential moving average (pandas ewm(adjust=True) weighting)
+        """
+        values = _values(prices_or_values)
+        decay = 1 - 2 / (window + 1)
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        numerator = np.zeros(values.shape[1])
+        denominator = np.zeros(values.shape[1])
+        ema = np.empty_like(values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for t in range(len(values)):
+                numerator *= decay
+                numerator += filled[t]
+                denominator *= decay
+                denominator += valid[t]
+                np.divide(numerator, denominator, out=ema[t])
+        return _like(prices_or_values, ema, "ema")
+
+    @classmethod
+    def obv(cls, close: Panel, volume: Panel) -> Panel:
+        """
+        {{ On-Balance Volume }}
+        :param close: close prices (dates x symbols)
+        :param volume: traded volume (dates x symbols)
+        :return: On Balance Volume
+        """
+        close_values = _values(close)
+        flow = np.sign(np.diff(close_values, axis=0, prepend=np.nan)) * _values(volume)
+        obv = np.cumsum(np.nan_to_num(flow, nan=0.0), axis=0)
+        return _like(close, obv, "obv")
+
+    @classmethod
+    def ad_line(cls, high: Panel, low: Panel, close: Panel, volume: Panel) -> Panel:
+        """
+        {{ Accumulation / Distribution Line }}
+        :param high: high prices (dates x symbols)
+        :param low: low prices (dates x symbols)
+        :param close: close prices (dates x symbols)
+        :param volume: traded volume (dates x symbols)
+        :return: Accumulation/Distribution Line
+        """
+        high, low, close_values = _values(high), _values(low), _values(close)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Money Flow Multiplier (MFM)
+            mfm = ((close_values - low) - (high - close_values)) / (high - low)
+        # Money Flow Volume (MFV)
+        mfv = mfm * _values(volume)
+        return _like(close, _nan_cumsum(mfv), "ad")
+
+    @classmethod
+    def atr(cls, high: Panel, low: Panel, close: Panel, n: int = 14) -> Panel:
+        """
+        {{ Average True Range }}
+        Same true range construction as TechnicalIndicators.atr.
+        :param high: high prices (dates x symbols)
+        :param low: low prices (dates x symbols)
+        :param close: close prices (dates x symbols)
+        :param n: periods used to calculate the average true range
+        :return: Average True Range
+        """
+        high, low, next_close = _values(high), _values(low), _shift(_values(close), -1)
+        ranges = np.stack(
+            (high - low, np.abs(high - next_close), np.abs(low - next_close))
+        )
+        all_missing = np.isnan(ranges).all(axis=0)
+        tr = np.where(
+            all_missing,
+            np.nan,
+            np.nanmax(np.where(np.isnan(ranges), -np.inf, ranges), axis=0),
+        )
+        return _like(close, _nan_cumsum(tr) / n, "atr")
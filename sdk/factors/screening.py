@@ -0,0 +1,528 @@
+from typing import Callable, Dict, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from sdk.backtest.vectorized import WeightBacktester, WeightBacktestResult
+from sdk.data.panel import PricePanel
+from sdk.data.universe import NUMERIC_FIELDS, CompanyUniverse
+from sdk.factors.panel_indicators import PanelIndicators, _shift
+from sdk.misc.utils import normalize_symbol, timed
+
+Operand = Union["Factor", float, int]
+
+
+class FactorContext:
+    """
+    The (dates x symbols) data a screen is evaluated on: price fields as aligned arrays, plus per-symbol company
+    metadata from a CompanyUniverse. Evaluated expressions are memoized by name, so sub-expressions shared between
+    factors (or screens) are only computed once per context.
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, pd.DataFrame],
+        universe: Optional[CompanyUniverse] = None,
+    ):
+        """
+        :param fields: Dict[field, (dates x symbols) frame], e.g. Close/High/Low/Volume - aligned to the first frame.
+        :param universe: optional company index supplying market_cap / float_shares / employee_count and sector /
+        industry / country screens.
+        """
+        first = next(iter(fields.values()))
+        self.dates = pd.DatetimeIndex(first.index)
+        self.symbols = [normalize_symbol(s) for s in first.columns]
+        self.arrays: Dict[str, np.ndarray] = {
+            name: frame.reindex(index=first.index, columns=first.columns).to_numpy(
+                dtype=np.float64
+            )
+            for name, frame in fields.items()
+        }
+        self.universe = universe
+        self._rows = None
+        if universe is not None:
+            rows = np.array([universe.symbol_index.get(s, -1) for s in self.symbols])
+            self._rows = rows
+            for name in NUMERIC_FIELDS:
+                if name not in self.arrays:
+                    values = np.where(rows >= 0, universe.numeric[name][rows], np.nan)
+                    # static per-symbol values broadcast over dates.
+                    self.arrays[name] = values[None, :]
+        self._cache: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_panel(
+        cls,
+        panel: PricePanel,
+        fields: Sequence[str] = ("Close", "High", "Low", "Volume"),
+        symbols: Optional[Sequence[str]] = None,
+        universe: Optional[CompanyUniverse] = None,
+    ) -> "FactorContext":
+        """
+        :param panel: e.g. the shared panel from get_panel().
+        :param fields: panel fields to expose.
+        :param symbols: optional subset of the panel's symbols.
+        """
+        return cls({f: panel.field(f, symbols) for f in fields}, universe=universe)
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.symbols)
+
+    def field(self, name: str) -> np.ndarray:
+        if name not in self.arrays:
+            raise ValueError(
+                f"No field {name!r} in context, expected one of {sorted(self.arrays)}."
+            )
+        return self.arrays[name]
+
+    def frame(self, values: np.ndarray) -> pd.DataFrame:
+        """
+        :return: (dates x symbols) frame of values (broadcast to the full shape).
+        """
+        return pd.DataFrame(
+            np.broadcast_to(values, self.shape), index=self.dates, columns=self.symbols
+        )
+
+    def evaluate(self, factor: "Factor") -> np.ndarray:
+        if factor.name not in self._cache:
+            self._cache[factor.name] = factor.compute(self)
+        return self._cache[factor.name]
+
+    def __repr__(self):
+        return "FactorContext<dates, symbols, arrays, universe>"
+
+
+def _rank(values: np.ndarray) -> np.ndarray:
+    """
+    :return: cross-sectional percentile rank in [0, 1] of each row (ordinal - ties keep column order), NaN stays NaN.
+    """
+    missing = np.isnan(values)
+    order = np.argsort(np.where(missing, np.inf, values), axis=1, kind="stable")
+    ranks = np.empty(values.shape, dtype=np.float64)
+    np.put_along_axis(
+        ranks, order, np.arange(values.shape[1], dtype=np.float64)[None, :], axis=1
+    )
+    count = values.shape[1] - missing.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ranks /= count - 1
+    ranks[np.broadcast_to(count == 1, ranks.shape)] = 0.5
+    ranks[missing] = np.nan
+    return ranks
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    """
+    :return: cross-sectional z-score of each row (sample standard deviation), NaN stays NaN.
+    """
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(valid, values, 0.0).sum(axis=1, keepdims=True) / count
+        deviation = np.where(valid, values - mean, 0.0)
+        std = np.sqrt((deviation * deviation).sum(axis=1, keepdims=True) / (count - 1))
+        return (values - mean) / std
+
+
+def _quantile(values: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    :return: cross-sectional bucket (0 lowest .. buckets - 1 highest) of each value, NaN stays NaN.
+    """
+    return np.minimum(np.floor(_rank(values) * buckets), buckets - 1)
+
+
+def _demean(values: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(valid, values, 0.0).sum(axis=1, keepdims=True) / valid.sum(
+            axis=1, keepdims=True
+        )
+    return values - mean
+
+
+class Factor:
+    """
+    Node of a declarative factor expression over the (dates x symbols) panel. Expressions are built with ordinary
+    operators and the cross-sectional methods below, e.g.
+        zscore(momentum(252, 21)) - zscore(volatility(63))
+    and evaluated lazily, as whole-array NumPy operations, against a FactorContext. Comparisons and &, |, ~ give
+    boolean masks for filters.
+    """
+
+    def __init__(self, name: str, compute: Callable, *inputs: "Factor"):
+        """
+        :param name: canonical expression string (also the memoization key).
+        :param compute: function of the inputs' evaluated arrays (or of the context, for leaves).
+        :param inputs: sub-expressions.
+        """
+        self.name = name
+        self._compute = compute
+        self.inputs = inputs
+
+    def compute(self, context: FactorContext) -> np.ndarray:
+        if not self.inputs:
+            return self._compute(context)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self._compute(*(context.evaluate(i) for i in self.inputs))
+
+    def evaluate(self, context: FactorContext) -> pd.DataFrame:
+        """
+        :return: the expression's (dates x symbols) values.
+        """
+        return context.frame(context.evaluate(self))
+
+    def _apply(self, symbol: str, func: Callable, other: Operand) -> "Factor":
+        other = _as_factor(other)
+        return Factor(f"({self.name} {symbol} {other.name})", func, self, other)
+
+    def _rapply(self, symbol: str, func: Callable, other: Operand) -> "Factor":
+        return _as_factor(other)._apply(symbol, func, self)
+
+    def __add__(self, other: Operand) -> "Factor":
+        return self._apply("+", np.add, other)
+
+    def __radd__(self, other: Operand) -> "Factor":
+        return self._rapply("+", np.add, other)
+
+    def __sub__(self, other: Operand) -> "Factor":
+        return self._apply("-", np.subtract, other)
+
+    def __rsub__(self, other: Operand) -> "Factor":
+        return self._rapply("-", np.subtract, other)
+
+    def __mul__(self, other: Operand) -> "Factor":
+        return self._apply("*", np.multiply, other)
+
+    def __rmul__(self, other: Operand) -> "Factor":
+        return self._rapply("*", np.multiply, other)
+
+    def __truediv__(self, other: Operand) -> "Factor":
+        return self._apply("/", np.divide, other)
+
+    def __rtruediv__(self, other: Operand) -> "Factor":
+        return self._rapply("/", np.divide, other)
+
+    def __neg__(self) -> "Factor":
+        return Factor(f"-{self.name}", np.negative, self)
+
+    def __gt__(self, other: Operand) -> "Factor":
+        return self._apply(">", np.greater, other)
+
+    def __ge__(self, other: Operand) -> "Factor":
+        return self._apply(">=", np.greater_equal, other)
+
+    def __lt__(self, other: Operand) -> "Factor":
+        return self._apply("<", np.less, other)
+
+    def __le__(self, other: Operand) -> "Factor":
+        return self._apply("<=", np.less_equal, other)
+
+    def __and__(self, other: "Factor") -> "Factor":
+        return self._apply("&", np.logical_and, other)
+
+    def __or__(self, other: "Factor") -> "Factor":
+        return self._apply("|", np.logical_or, other)
+
+    def __invert__(self) -> "Factor":
+        return Factor(f"~{self.name}", np.logical_not, self)
+
+    def rank(self) -> "Factor":
+        """
+        :return: cross-sectional percentile rank in [0, 1] on each date.
+        """
+        return Factor(f"rank({self.name})", _rank, self)
+
+    def zscore(self) -> "Factor":
+        """
+        :return: cross-sectional z-score on each date.
+        """
+        return Factor(f"zscore({self.name})", _zscore, self)
+
+    def quantile(self, buckets: int = 5) -> "Factor":
+        """
+        :return: cross-sectional bucket, 0 (lowest) to buckets - 1 (highest), on each date.
+        """
+        return Factor(
+            f"quantile({self.name}, {buckets})",
+            lambda values: _quantile(values, buckets),
+            self,
+        )
+
+    def demean(self) -> "Factor":
+        """
+        :return: values less their cross-sectional mean on each date.
+        """
+        return Factor(f"demean({self.name})", _demean, self)
+
+    def where(self, mask: "Factor") -> "Factor":
+        """
+        :return: values where mask holds, NaN elsewhere (excluded from cross-sectional operators downstream).
+        """
+        return Factor(
+            f"where({self.name}, {mask.name})",
+            lambda values, keep: np.where(keep, values, np.nan),
+            self,
+            mask,
+        )
+
+    def lag(self, periods: int = 1) -> "Factor":
+        """
+        :return: values as of periods dates earlier.
+        """
+        return Factor(
+            f"lag({self.name}, {periods})",
+            # static (per-symbol) values have a single row and nothing to lag.
+            lambda values: _shift(values, periods) if values.shape[0] > 1 else values,
+            self,
+        )
+
+    def __repr__(self):
+        return f"Factor<{self.name}>"
+
+
+def _as_factor(value: Operand) -> Factor:
+    if isinstance(value, Factor):
+        return value
+    value = float(value)
+    return Factor(repr(value), lambda context: np.float64(value))
+
+
+def constant(value: float) -> Factor:
+    return _as_factor(value)
+
+
+def field(name: str) -> Factor:
+    """
+    :param name: price field (Close, High, ...), company metadata (market_cap, float_shares, employee_count) or any
+    other frame given to the context, e.g. point-in-time pe / pb from fundamental_analysis.valuation_ratios.
+    """
+    return Factor(name, lambda context: context.field(name))
+
+
+def close() -> Factor:
+    return field("Close")
+
+
+def returns(interval: str = "daily") -> Factor:
+    """
+    :param interval: daily, monthly or yearly (see PanelIndicators.percent_returns).
+    """
+    return Factor(
+        f"returns({interval})",
+        lambda values: PanelIndicators.percent_returns(values, interval=interval),
+        close(),
+    )
+
+
+def momentum(window: int = 252, skip: int = 0) -> Factor:
+    """
+    :param window: lookback in bars.
+    :param skip: most recent bars left out (e.g. 21 for the usual 12-1 month momentum).
+    :return: return from window bars ago to skip bars ago.
+    """
+    return Factor(
+        f"momentum({window}, {skip})",
+        lambda values: _shift(values, skip) / _shift(values, window) - 1,
+        close(),
+    )
+
+
+def volatility(window: int = 63) -> Factor:
+    """
+    :return: rolling standard deviation of daily returns.
+    """
+    return Factor(
+        f"volatility({window})",
+        lambda values: PanelIndicators.rolling_std(values, window=window),
+        returns(),
+    )
+
+
+def sma(window: int = 50, of: Optional[Factor] = None) -> Factor:
+    of = of or close()
+    return Factor(
+        f"sma({of.name}, {window})",
+        lambda values: PanelIndicators.sma(values, window=window),
+        of,
+    )
+
+
+def ema(window: int = 20, of: Optional[Factor] = None) -> Factor:
+    of = of or close()
+    return Factor(
+        f"ema({of.name}, {window})",
+        lambda values: PanelIndicators.ema(values, window=window),
+        of,
+    )
+
+
+def universe_screen(**criteria) -> Factor:
+    """
+    :param criteria: see CompanyUniverse.screen, e.g. sector="Technology", market_cap=(10e9, None).
+    :return: mask of the context's symbols matching every criterion (symbols missing from the universe fail).
+    """
+
+    def compute(context: FactorContext) -> np.ndarray:
+        if context.universe is None:
+            raise ValueError("universe_screen needs a FactorContext with a universe.")
+        universe = context.universe
+        member = np.unpackbits(universe.screen(**criteria), count=len(universe))
+        rows = context._rows
+        return np.where(rows >= 0, member[rows] == 1, False)[None, :]
+
+    described = ", ".join(f"{k}={v!r}" for k, v in sorted(criteria.items()))
+    return Factor(f"universe({described})", compute)
+
+
+def rank(factor: Factor) -> Factor:
+    return factor.rank()
+
+
+def zscore(factor: Factor) -> Factor:
+    return factor.zscore()
+
+
+def quantile(factor: Factor, buckets: int = 5) -> Factor:
+    return factor.quantile(buckets)
+
+
+def _top_n(scores: np.ndarray, n: int) -> np.ndarray:
+    """
+    :return: boolean mask of the n highest (non-NaN) scores in each row.
+    """
+    missing = np.isnan(scores)
+    selected = np.zeros(scores.shape, dtype=bool)
+    if n >= scores.shape[1]:
+        return ~missing
+    picks = np.argpartition(np.where(missing, np.inf, -scores), n - 1, axis=1)[:, :n]
+    np.put_along_axis(selected, picks, True, axis=1)
+    return selected & ~missing
+
+
+class FactorScreen:
+    """
+    Ranks the universe by a score expression (optionally restricted by a filter) on every date, and turns the top
+    top_n picks on each rebalance date into target weights for WeightBacktester.
+    """
+
+    def __init__(
+        self,
+        score: Factor,
+        where: Optional[Factor] = None,
+        top_n: int = 20,
+        higher_is_better: bool = True,
+    ):
+        """
+        :param score: expression to rank symbols by.
+        :param where: optional boolean expression symbols must pass to be ranked.
+        :param top_n: symbols held on each rebalance date.
+        :param higher_is_better: False to pick the lowest scores.
+        """
+        if top_n < 1:
+            raise ValueError(f"top_n must be at least 1, got {top_n}.")
+        self.score = score if higher_is_better else -score
+        self.where = where
+        self.top_n = top_n
+
+    def scores(self, context: FactorContext) -> np.ndarray:
+        """
+        :return: (dates x symbols) scores, NaN where filtered out or not yet computable.
+        """
+        factor = self.score if self.where is None else self.score.where(self.where)
+        return np.broadcast_to(context.evaluate(factor), context.shape)
+
+    @timed
+    def rankings(self, context: FactorContext) -> pd.DataFrame:
+        """
+        :return: (dates x symbols) rank of each symbol on each date, 1 being the best, NaN if unranked.
+        """
+        scores = self.scores(context)
+        missing = np.isnan(scores)
+        order = np.argsort(np.where(missing, np.inf, -scores), axis=1, kind="stable")
+        ranks = np.empty(scores.shape, dtype=np.float64)
+        np.put_along_axis(
+            ranks,
+            order,
+            np.arange(1, scores.shape[1] + 1, dtype=np.float64)[None, :],
+            axis=1,
+        )
+        ranks[missing] = np.nan
+        return context.frame(ranks)
+
+    def rebalance_rows(
+        self, context: FactorContext, rebalance: Union[int, Sequence] = 21
+    ) -> np.ndarray:
+        """
+        :param rebalance: rebalance every n bars, or the rebalance dates (executed on the next trading day if not
+        one).
+        """
+        if isinstance(rebalance, int):
+            return np.arange(0, len(context.dates), rebalance)
+        rows = np.searchsorted(context.dates, pd.DatetimeIndex(rebalance), side="left")
+        return np.unique(rows[rows < len(context.dates)])
+
+    @timed
+    def weights(
+        self,
+        context: FactorContext,
+        rebalance: Union[int, Sequence] = 21,
+        weighting: str = "equal",
+    ) -> pd.DataFrame:
+        """
+        :param rebalance: rebalance every n bars, or the rebalance dates.
+        :param weighting: 'equal', or 'rank' (weights proportional to cross-sectional rank among the picks).
+        :return: (rebalance dates x symbols) target weights summing to 1 (0 - all cash - while nothing is ranked),
+        ready for WeightBacktester.run.
+        """
+        if weighting not in ("equal", "rank"):
+            raise ValueError(
+                f"Unknown weighting {weighting!r}, expected equal or rank."
+            )
+        rows = self.rebalance_rows(context, rebalance)
+        scores = np.ascontiguousarray(self.scores(context)[rows])
+        selected = _top_n(scores, self.top_n)
+        if weighting == "rank":
+            # ordinal rank among the picks: 1 for the weakest .. n for the strongest.
+            picks = selected.sum(axis=1, keepdims=True)
+            raw = np.where(
+                selected,
+                _rank(np.where(selected, scores, np.nan)) * (picks - 1) + 1,
+                0.0,
+            )
+        else:
+            raw = selected.astype(np.float64)
+        total = raw.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weights = np.where(total > 0, raw / total, 0.0)
+        return pd.DataFrame(weights, index=context.dates[rows], columns=context.symbols)
+
+    def backtest(
+        self,
+        context: FactorContext,
+        rebalance: Union[int, Sequence] = 21,
+        weighting: str = "equal",
+        initial_cash: float = 1_00_000.00,
+        cost_bps: float = 0.0,
+    ) -> WeightBacktestResult:
+        """
+        :return: WeightBacktestResult of holding the screen's picks, rebalanced on the context's Close prices.
+        """
+        weights = self.weights(context, rebalance=rebalance, weighting=weighting)
+        return WeightBacktester(
+            context.frame(context.field("Close")),
+            initial_cash=initial_cash,
+            cost_bps=cost_bps,
+        ).run(weights)
+
+    def __repr__(self):
+        return "FactorScreen<score, where, top_n>"
+
+
+if __name__ == "__main__":
+    from sdk.benchmarks.bench_panel_indicators import random_walk_panel
+
+    fields = random_walk_panel(n_dates=2_520, n_symbols=200)
+    screen = FactorScreen(
+        score=zscore(momentum(252, 21)) - zscore(volatility(63)),
+        where=volatility(63) < 0.03,
+        top_n=20,
+    )
+    print(screen.backtest(FactorContext(fields), rebalance=21, cost_bps=5))
@@ -0,0 +1,252 @@
+import json
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, List, Mapping, Type, Union
+import numpy as np
+import pandas as pd
+from sdk.factors.technical_indicators import TechnicalIndicators
+
+Bar = Union[float, Mapping[str, float]]
+
+
+class OnlineIndicator(ABC):
+    """
+    Stateful counterpart of a Metrics / TechnicalIndicators method: seeded once from history, then updated in
+    constant time per new bar. State round-trips through to_dict()/from_dict() so a job can resume where it left off.
+    """
+
+    @abstractmethod
+    def update(self, bar: Bar) -> float:
+        """
+        :param bar: the newest value (or OHLCV mapping for volume based indicators).
+        :return: indicator value including bar.
+        """
+
+    @property
+    @abstractmethod
+    def value(self) -> float:
+        """
+        :return: indicator value as of the last update.
+        """
+
+    def to_dict(self) -> Dict:
+        return {"type": type(self).__name__, **vars(self)}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "OnlineIndicator":
+        state = dict(state)
+        indicator_type = _INDICATOR_TYPES[state.pop("type")]
+        indicator = indicator_type.__new__(indicator_type)
+        indicator.__dict__.update(state)
+        return indicator
+
+
+class RollingMean(OnlineIndicator):
+    """
+    Online Metrics.sma - ring buffer of the last `window` values with a running (Welford) mean and M2.
+    NaN values take a slot in the window but are not counted, like pandas' rolling(min_periods=1).
+    """
+
+    def __init__(self, window: int = 30):
+        if window < 1:
+            raise ValueError(f"Window must be at least 1: ({window})")
+        self.window = window
+        self.buffer: List[float] = [math.nan] * window
+        self.position = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @classmethod
+    def seed(cls, history: pd.Series, window: int = 30) -> "RollingMean":
+        """
+        :param history: values up to (and including) the last processed bar - only the final window is read.
+        """
+        indicator = cls(window=window)
+        for value in history.iloc[-window:]:
+            indicator._push(float(value))
+        return indicator
+
+    def _push(self, value: float) -> None:
+        dropped = self.buffer[self.position]
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.window
+        if not math.isnan(dropped):
+            self.count -= 1
+            if self.count == 0:
+                self.mean, self.m2 = 0.0, 0.0
+            else:
+                delta = dropped - self.mean
+                self.mean -= delta / self.count
+                self.m2 -= delta * (dropped - self.mean)
+        if not math.isnan(value):
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        if self.position == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        """
+        Recompute mean/M2 exactly from the buffer once per lap, so add/remove rounding error can't accumulate.
+        """
+        values = [v for v in self.buffer if not math.isnan(v)]
+        self.count = len(values)
+        self.mean = math.fsum(values) / self.count if values else 0.0
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in values)
+
+    def update(self, bar: Bar) -> float:
+        self._push(float(bar))
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.mean if self.count else math.nan
+
+
+class RollingStd(RollingMean):
+    """
+    Online Metrics.rolling_std - sample standard deviation over the same ring buffer.
+    """
+
+    @property
+    def variance(self) -> float:
+        return max(self.m2, 0.0) / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def value(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class EMA(OnlineIndicator):
+    """
+    Online Metrics.ema - recursive form of pandas' ewm(alpha=2 / (window + 1), adjust=True).mean().
+    """
+
+    def __init__(self, window: int = 30):
+        self.window = window
+        self.decay = 1 - 2 / (window + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    @classmethod
+    def seed(cls, history: pd.Series, window: int = 30) -> "EMA":
+        indicator = cls(window=window)
+        values = history.to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        weights = indicator.decay ** np.arange(
+            len(values) - 1, -1, -1, dtype=np.float64
+        )
+        indicator.numerator = float(np.sum(np.where(valid, values, 0.0) * weights))
+        indicator.denominator = float(np.sum(valid * weights))
+        return indicator
+
+    def update(self, bar: Bar) -> float:
+        bar = float(bar)
+        self.numerator *= self.decay
+        self.denominator *= self.decay
+        if not math.isnan(bar):
+            self.numerator += bar
+            self.denominator += 1.0
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.numerator / self.denominator if self.denominator else math.nan
+
+
+class OBV(OnlineIndicator):
+    """
+    Online TechnicalIndicators.obv - running on-balance volume. Bars are mappings with Close and Volume.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.last_close = math.nan
+
+    @classmethod
+    def seed(cls, prices_and_volume: pd.DataFrame) -> "OBV":
+        indicator = cls()
+        if len(prices_and_volume.index):
+            indicator.total = float(TechnicalIndicators.obv(prices_and_volume).iloc[-1])
+            indicator.last_close = float(prices_and_volume["Close"].iloc[-1])
+        return indicator
+
+    def update(self, bar: Bar) -> float:
+        close = float(bar["Close"])
+        flow = np.sign(close - self.last_close) * float(bar["Volume"])
+        if not math.isnan(flow):
+            self.total += float(flow)
+        self.last_close = close
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.total
+
+
+class ADLine(OnlineIndicator):
+    """
+    Online TechnicalIndicators.ad_line - running accumulation/distribution. Bars are mappings with High, Low,
+    Close and Volume; a bar with no range yields NaN without resetting the running total (as with cumsum).
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.last_value = math.nan
+
+    @classmethod
+    def seed(cls, hlcv_price_data: pd.DataFrame) -> "ADLine":
+        indicator = cls()
+        ad = TechnicalIndicators.ad_line(hlcv_price_data)
+        if len(ad.index):
+            indicator.total = float(ad.ffill().fillna(0).iloc[-1])
+            indicator.last_value = float(ad.iloc[-1])
+        return indicator
+
+    def update(self, bar: Bar) -> float:
+        high, low, close = float(bar["High"]), float(bar["Low"]), float(bar["Close"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Money Flow Multiplier (MFM) x volume = Money Flow Volume (MFV)
+            mfv = (
+                np.float64((close - low) - (high - close)) / np.float64(high - low)
+            ) * float(bar["Volume"])
+        if math.isnan(mfv):
+            self.last_value = math.nan
+        else:
+            self.total += float(mfv)
+            self.last_value = self.total
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.last_value
+
+
+_INDICATOR_TYPES: Dict[str, Type[OnlineIndicator]] = {
+    indicator.__name__: indicator
+    for indicator in (RollingMean, RollingStd, EMA, OBV, ADLine)
+}
+
+
+def save_indicator_states(states: Dict[str, OnlineIndicator], path: str) -> None:
+    """
+    :param states: indicators keyed by any label (e.g. 'AAPL:ema:30').
+    :param path: json file to write.
+    :return: None.
+    """
+    with open(path, "w") as file:
+        json.dump({key: indicator.to_dict() for key, indicator in states.items()}, file)
+
+
+def load_indicator_states(path: str) -> Dict[str, OnlineIndicator]:
+    """
+    :param path: json file written by save_indicator_states.
+    :return: indicators keyed by the labels they were saved under.
+    """
+    with open(path, "r") as file:
+        return {
+            key: OnlineIndicator.from_dict(state)
+            for key, state in json.load(file).items()
+        }
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from sdk.factors.cache import cached_indicator
 
 
 class Metrics:
@@ -8,6 +9,7 @@ class Metrics:
     """
 
     @classmethod
+    @cached_indicator
     def percent_returns(cls, prices_or_values: pd.Series, interval: str = 'daily') -> pd.Series:
         """
         :param prices_or_values: close prices of stock or total values of portfolio
@@ -25,6 +27,7 @@ class Metrics:
         return percent_returns.fillna(0)
 
     @classmethod
+    @cached_indicator
     def rolling_std(cls, pct_returns: pd.Series, window: int = 30) -> pd.Series:
         """
         :param pct_returns: percent returns of close prices
@@ -36,6 +39,7 @@ class Metrics:
         return rolling_std
 
     @classmethod
+    @cached_indicator
     def sma(cls, prices_or_values: pd.Series, window: int = 30) -> pd.Series:
         """
         :param prices_or_values: close prices of stock or total values of portfolio
@@ -47,6 +51,7 @@ class Metrics:
         return sma
 
     @classmethod
+    @cached_indicator
     def ema(cls, prices_or_values: pd.Series, window: int = 30) -> pd.Series:
         """
         :param prices_or_values: close prices of stock or total values of portfolio
@@ -86,6 +91,7 @@ class TechnicalIndicators:
     """
 
     @classmethod
+    @cached_indicator
     def obv(cls, prices_and_volume: pd.DataFrame) -> pd.Series:
         """
         {{ On-Balance Volume }}
@@ -102,6 +108,7 @@ class TechnicalIndicators:
         return obv
 
     @classmethod
+    @cached_indicator
     def ad_line(cls, hlcv_price_data: pd.DataFrame) -> pd.Series:
         """
         {{ Accumulation / Distribution Line }}
@@ -125,6 +132,7 @@ class TechnicalIndicators:
         return ad
 
     @classmethod
+    @cached_indicator
     def atr(cls, hlc_price_data: pd.DataFrame) -> pd.Series:
         """
         {{ Average True Range }}
@@ -145,17 +153,33 @@ class TechnicalIndicators:
         return atr
 
     @classmethod
+    @cached_indicator
     def adx(cls, hlc_price_data: pd.DataFrame) -> pd.Series:
         """
         The ADX is the main line on the indicator, usually colored black. There are two additional lines that can be
         optionally shown. These are DI+ and DI-. These lines are often colored red and green, respectively. All three
         lines work together to show the direction of the trend as well as the momentum of the trend.
         :param hlc_price_data: High, Low, Close price data
-        :return: Average Directional Index
+        :return: Average Directional Index (0 - 100, Wilder's 14 period smoothing)
         """
         n = 14
-        dm_pos = hlc_price_data['High'].shift(1) - hlc_price_data['High']
-        smoothed_dm_pos = dm_pos.cumsum()
-        dm_neg = hlc_price_data['Low'] - hlc_price_data['Low'].shift(1)
-
-        smoothed
\ No newline at end of file
+        high = hlc_price_data['High']
+        low = hlc_price_data['Low']
+        close = hlc_price_data['Close']
+        up_move = high.diff()
+        down_move = -low.diff()
+        dm_pos = up_move.where((up_move > down_move) & (up_move > 0), 0.0)
+        dm_neg = down_move.where((down_move > up_move) & (down_move > 0), 0.0)
+        tr = pd.concat([
+            high - low,
+            (high - close.shift(1)).abs(),
+            (low - close.shift(1)).abs()
+        ], axis=1).max(axis=1)
+        # Wilder's smoothing is an exponential moving average with alpha = 1 / n
+        smoothed_tr = tr.ewm(alpha=1 / n, adjust=False).mean()
+        di_pos = 100 * dm_pos.ewm(alpha=1 / n, adjust=False).mean() / smoothed_tr
+        di_neg = 100 * dm_neg.ewm(alpha=1 / n, adjust=False).mean() / smoothed_tr
+        dx = (100 * (di_pos - di_neg).abs() / (di_pos + di_neg)).fillna(0)
+        adx = dx.ewm(alpha=1 / n, adjust=False).mean()
+        adx.name = "adx"
+        return adx
@@ -22,15 +22,23 @@ def currency(val: float) -> str:
 def save_cfg(config: Dict, cfg_file: str = "../config.json"):
     with open(cfg_file, "w") as cfg:
         json.dump(config, cfg)
+    _read_cfg.cache_clear()
     logger.debug(f"UPDATED {cfg_file}")
 
 
-def load_cfg(prepend_path: str) -> Dict:
-    cfg_file = os.path.join(prepend_path, "config.json")
+@functools.lru_cache(maxsize=None)
+def _read_cfg(cfg_file: str) -> Dict:
     with open(cfg_file, "r") as cfg:
         return json.load(cfg)
 
 
+def load_cfg(prepend_path: str) -> Dict:
+    """
+    Parsed once per process per config file - every later call returns the same (shared, don't mutate) dict.
+    """
+    return _read_cfg(os.path.realpath(os.path.join(prepend_path, "config.json")))
+
+
 def format_datetime_12h(time: datetime) -> str:
     time = time.strftime("%Y-%m-%d %I:%M %p")
     return time
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sdk.factors import cache
+from sdk.factors.cache import IndicatorCache
+from sdk.factors.technical_indicators import Metrics
+
+
+@pytest.fixture
+def close(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        cache, "indicator_cache", IndicatorCache(cache_dir=str(tmp_path / "cache"))
+    )
+    dates = pd.bdate_range("2022-01-03", periods=300)
+    close = pd.Series(
+        np.linspace(100, 160, 300), index=dates, name="Close", dtype=np.float64
+    )
+    close.attrs["symbol"] = "AAPL"
+    return close
+
+
+def test_transformed_input_is_not_served_the_raw_entry(close):
+    raw = Metrics.sma(close)
+    # transforms keep the name and attrs of the source series.
+    assert np.log(close).attrs["symbol"] == "AAPL"
+    assert Metrics.sma(np.log(close)).iloc[-1] == pytest.approx(
+        np.log(close).rolling(30, min_periods=1).mean().iloc[-1]
+    )
+    assert Metrics.sma(close * 2).iloc[-1] == pytest.approx(2 * raw.iloc[-1])
+    assert Metrics.sma(close).iloc[-1] == raw.iloc[-1]
+    assert cache.indicator_cache.hits == 1
+
+
+def test_readjusted_history_misses(close):
+    before = Metrics.sma(close)
+    adjusted = close / 2  # e.g. a 2:1 split applied to the whole history.
+    adjusted.attrs["symbol"] = "AAPL"
+    assert Metrics.sma(adjusted).iloc[-1] == pytest.approx(before.iloc[-1] / 2)
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    disk = IndicatorCache(
+        max_entries=1, cache_dir=str(tmp_path / "disk"), max_disk_entries=10
+    )
+    for i in range(25):
+        disk.put(("AAPL", "sma", (i,)), i)
+    assert len(list((tmp_path / "disk").glob("*.pkl"))) <= 10
+    assert disk.stats()["disk_evictions"] >= 15
+    # the latest entry survives pruning.
+    assert disk.get(("AAPL", "sma", (24,))) == 24
+
+
+def test_reload_misses_and_exact_fingerprint(close):
+    Metrics.sma(close)
+    reloaded = close.copy()
+    reloaded.attrs["version"] = cache.next_version()
+    Metrics.sma(reloaded)
+    assert cache.indicator_cache.stats()["misses"] == 2
+    # a change between sampled rows is only seen by exact fingerprints.
+    edited = close.copy()
+    edited.iloc[1] += 1
+    assert cache.fingerprint(edited) == cache.fingerprint(close)
+    assert cache.fingerprint(edited, exact=True) != cache.fingerprint(close, exact=True)
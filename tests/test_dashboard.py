@@ -0,0 +1,23 @@
+import os
+import numpy as np
+import pandas as pd
+from sdk.analytics.dashboard import (
+    _MANIFEST_FILE,
+    DashboardSnapshot,
+    build_dashboard_snapshot,
+)
+
+
+def test_builds_within_one_second_get_their_own_versions(tmp_path):
+    dates = pd.bdate_range("2022-01-03", periods=40, tz="America/New_York")
+    close = pd.DataFrame(
+        {"AAA": np.linspace(10, 20, 40), "BBB": np.linspace(30, 20, 40)}, index=dates
+    )
+    path = str(tmp_path)
+    first = build_dashboard_snapshot(portfolios=[], close=close, path=path, keep=3)
+    second = build_dashboard_snapshot(portfolios=[], close=close, path=path, keep=3)
+    assert first != second
+    assert sorted(os.listdir(path)) == sorted(
+        [os.path.basename(first), os.path.basename(second), _MANIFEST_FILE]
+    )
+    assert DashboardSnapshot(path).version == os.path.basename(second)
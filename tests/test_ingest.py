@@ -0,0 +1,120 @@
+import threading
+import time
+import pytest
+from sdk.benchmarks.fake_quote_server import start_fake_quote_server
+from sdk.data.ingest import (
+    IngestionPipeline,
+    RetryPolicy,
+    TokenBucket,
+    http_quote_fetcher,
+)
+
+SYMBOLS = [f"SYM{i}" for i in range(40)]
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**kwargs):
+        kwargs.setdefault("latency", 0.0)
+        kwargs.setdefault("n_bars", 5)
+        servers.append(start_fake_quote_server(**kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class RecordingWriter:
+    def __init__(self, fail_batches: int = 0):
+        self.batches = []
+        self.fail_batches = fail_batches
+
+    def __call__(self, batch):
+        self.batches.append([result["symbol"] for result in batch])
+        if len(self.batches) <= self.fail_batches:
+            raise OSError("disk full")
+        return len(batch)
+
+
+def run(server, write=None, **kwargs):
+    kwargs.setdefault("retry", RetryPolicy(max_attempts=10, base_delay=0.001))
+    kwargs.setdefault("max_workers", 4)
+    pipeline = IngestionPipeline(
+        fetch=http_quote_fetcher(server.url), write=write or RecordingWriter(), **kwargs
+    )
+    return pipeline.run(SYMBOLS)
+
+
+def test_throttled_and_unavailable_responses_are_retried(serve):
+    server = serve(throttle_rate=0.2, error_rate=0.2, seed=1)
+    writer = RecordingWriter()
+    metrics = run(server, writer)
+    assert server.statuses[429] and server.statuses[503]
+    assert metrics.fetched == len(SYMBOLS) and metrics.failed == 0
+    assert metrics.retries == server.statuses[429] + server.statuses[503]
+    assert sorted(sum(writer.batches, [])) == sorted(SYMBOLS)
+
+
+def test_client_errors_fail_without_retries(serve):
+    server = serve(symbol_statuses={"SYM3": 403, "SYM7": 400})
+    metrics = run(server)
+    assert metrics.failed == 2 and metrics.fetched == len(SYMBOLS) - 2
+    assert metrics.retries == 0
+    assert server.statuses[403] == 1 and server.statuses[400] == 1
+
+
+def test_token_bucket_holds_long_run_rate():
+    bucket = TokenBucket(rate=100, capacity=5)
+    times = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(20):
+            bucket.acquire()
+            with lock:
+                times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    times.sort()
+    # any window admits at most the burst plus what refilled during it.
+    for i, start in enumerate(times):
+        for j in range(i, len(times)):
+            assert j - i + 1 <= 5 + (times[j] - start) * 100 + 1e-6
+    assert times[-1] - times[0] >= (80 - 5) / 100 * 0.95
+
+
+def test_pipeline_respects_rate_limit(serve):
+    server = serve()
+    started = time.monotonic()
+    metrics = run(server, rate_limit=50, burst=1)
+    elapsed = time.monotonic() - started
+    assert metrics.fetched == len(SYMBOLS)
+    assert server.requests / elapsed <= 50 * 1.1
+
+
+def test_batches_flushed_at_batch_size(serve):
+    server = serve()
+    writer = RecordingWriter()
+    metrics = run(server, writer, batch_size=7)
+    sizes = [len(batch) for batch in writer.batches]
+    assert sizes == [7] * (len(SYMBOLS) // 7) + [len(SYMBOLS) % 7]
+    assert metrics.batches_written == len(sizes)
+    assert metrics.rows_written == len(SYMBOLS)
+
+
+def test_failed_write_moves_batch_from_fetched_to_failed(serve):
+    server = serve()
+    writer = RecordingWriter(fail_batches=1)
+    metrics = run(server, writer, batch_size=10)
+    assert metrics.failed == 10 and metrics.fetched == len(SYMBOLS) - 10
+    assert metrics.batches_written == len(writer.batches) - 1
+    assert metrics.rows_written == len(SYMBOLS) - 10
+    assert metrics.done == len(SYMBOLS)
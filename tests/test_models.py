@@ -0,0 +1,97 @@
+import shutil
+import sqlite3
+from datetime import datetime
+import pytest
+from sdk.data import models
+from sdk.entities.transaction import MarketBuy
+
+OLD_SCHEMA = (
+    'CREATE TABLE "transactionmodel" ("date" DATETIME NOT NULL PRIMARY KEY, "symbol" VARCHAR(255) NOT NULL, '
+    '"direction" VARCHAR(255) NOT NULL, "order_type" VARCHAR(255) NOT NULL, "price" REAL NOT NULL, '
+    '"qty" INTEGER NOT NULL, "portfolio" VARCHAR(255) NOT NULL)'
+)
+
+
+@pytest.fixture
+def old_db(tmp_path):
+    """
+    Database with the old single-column primary key Transaction table, bound to models.db for the test.
+    """
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute(OLD_SCHEMA)
+        connection.execute(
+            "INSERT INTO transactionmodel VALUES "
+            "('2022-01-03 10:00:00', 'AAPL', 'Direction.Buy', 'OrderType.Market', 170.0, 5, 'Test')"
+        )
+    models.db.close()
+    models.db.init(path)
+    yield path
+    models.db.close()
+    models.db.init(models.db_path)
+
+
+def test_migrate_keeps_rows_and_indexes(old_db):
+    # same order as running models.py directly: tables (and their indexes) first, then the migration.
+    models.create_table(models.TransactionModel)
+    models.migrate_history_tables()
+    indexes = {index.name for index in models.db.get_indexes("transactionmodel")}
+    assert {
+        "transactionmodel_portfolio_symbol_date_direction",
+        "transactionmodel_portfolio_date",
+    } <= indexes
+    assert not models.db.table_exists("transactionmodel_old")
+    (transaction,) = models.fetch_from_transactions_table(portfolio="Test")
+    assert transaction.direction.value == "BUY" and transaction.qty == 5
+
+
+def test_upsert_after_migration(old_db):
+    models.create_table(models.TransactionModel)
+    models.migrate_history_tables()
+    buy = MarketBuy(datetime(2022, 1, 4, 10), "MSFT", price=300.0, qty=2)
+    assert models.insert_into_transactions_table(buy, portfolio="Test") == {
+        "inserted": 1,
+        "updated": 0,
+    }
+    buy.qty = 3
+    assert models.insert_into_transactions_table(buy, portfolio="Test") == {
+        "inserted": 0,
+        "updated": 1,
+    }
+    assert len(models.fetch_from_transactions_table(portfolio="Test")) == 2
+
+
+def test_migration_is_idempotent(old_db):
+    models.create_table(models.TransactionModel)
+    models.migrate_history_tables()
+    models.migrate_history_tables()
+    assert len(models.db.get_indexes("transactionmodel")) >= 2
+
+
+def test_bulk_upsert_counts(old_db):
+    models.create_table(models.HoldingModel)
+    rows = [
+        {
+            "symbol": f"S{i}",
+            "qty_owned": i,
+            "date_purchased": "2022-01-03",
+            "portfolio": "Test",
+        }
+        for i in range(1200)
+    ]
+    upsert = lambda batch: models._bulk_upsert(
+        models.HoldingModel,
+        batch,
+        conflict_target=[models.HoldingModel.portfolio, models.HoldingModel.symbol],
+        preserve=[models.HoldingModel.qty_owned],
+    )
+    assert upsert(rows[:700]) == {"inserted": 700, "updated": 0}
+    assert upsert(rows) == {"inserted": 500, "updated": 700}
+    assert models.HoldingModel.select().count() == 1200
+
+
+def test_history_functions_migrate_on_first_use(old_db):
+    # no create_table / migrate_history_tables call: reading the old schema migrates it first.
+    (transaction,) = models.fetch_from_transactions_table(portfolio="Test")
+    assert transaction.symbol == "AAPL"
+    assert models.db.get_primary_keys("transactionmodel") == ["id"]
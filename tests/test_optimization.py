@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from sdk.analytics.optimization import (
+    PortfolioOptimizer,
+    WeightConstraints,
+    rebalance_orders,
+)
+from sdk.entities.transaction import MarketBuy, MarketSell
+
+
+@pytest.fixture
+def constraints():
+    groups = np.random.default_rng(0).integers(-1, 5, 60)
+    return WeightConstraints(
+        60, max_weight=0.06, groups=groups, group_caps=[0.15, 0.2, 0.3, 0.25, 0.1]
+    )
+
+
+def _feasible(constraints, w, tol=1e-9):
+    grouped = constraints.groups >= 0
+    totals = np.bincount(
+        constraints.groups[grouped],
+        w[grouped],
+        minlength=len(constraints.group_caps),
+    )
+    return (
+        (w >= -tol).all()
+        and (w <= constraints.upper + tol).all()
+        and (totals <= constraints.group_caps + tol).all()
+        and abs(w.sum() - constraints.budget) < tol
+    )
+
+
+def test_project_is_the_closest_feasible_point(constraints):
+    rng = np.random.default_rng(1)
+    for scale in (0.01, 0.1, 1.0):
+        v = rng.normal(0, scale, constraints.n_assets)
+        p = constraints.project(v)
+        assert _feasible(constraints, p)
+        np.testing.assert_allclose(constraints.project(p), p, atol=1e-12)
+        # projection onto a convex set: (v - p) . (z - p) <= 0 for every feasible z.
+        for _ in range(50):
+            z = constraints.project(rng.normal(0, scale, constraints.n_assets))
+            assert (v - p) @ (z - p) <= 1e-12
+
+
+def test_infeasible_constraints_raise():
+    with pytest.raises(ValueError, match="at most"):
+        WeightConstraints(10, max_weight=0.05)
+
+
+def test_min_variance_beats_feasible_perturbations(constraints):
+    rng = np.random.default_rng(2)
+    factors = rng.normal(0, 0.01, (60, 3))
+    covariance = factors @ factors.T + np.diag(rng.uniform(1e-5, 1e-4, 60))
+    optimizer = PortfolioOptimizer(
+        covariance,
+        symbols=[f"S{i}" for i in range(60)],
+        constraints=constraints,
+        shrinkage=0.0,
+    )
+    w = optimizer.min_variance().to_numpy()
+    assert optimizer.converged and _feasible(constraints, w)
+    variance = w @ covariance @ w
+    for _ in range(100):
+        z = constraints.project(w + rng.normal(0, 0.01, 60))
+        assert z @ covariance @ z >= variance - 1e-12
+
+
+def _portfolio(free_cash, **holdings):
+    return SimpleNamespace(
+        free_cash=free_cash,
+        holdings={s: SimpleNamespace(qty_owned=q) for s, q in holdings.items()},
+    )
+
+
+def test_rebalance_orders_sell_first_and_never_overdraw():
+    portfolio = _portfolio(1_000.0, AAA=50, BBB=20)
+    prices = pd.Series({"AAA": 10.0, "BBB": 50.0, "CCC": 25.0})
+    weights = pd.Series({"BBB": 0.5, "CCC": 0.5})
+    orders = rebalance_orders(portfolio, weights, prices)
+
+    kinds = [type(order) for order in orders]
+    assert kinds == sorted(kinds, key=lambda kind: kind is MarketBuy)
+    cash, held = portfolio.free_cash, {"AAA": 50, "BBB": 20}
+    for order in orders:
+        sign = 1 if isinstance(order, MarketBuy) else -1
+        cash -= sign * order.market_value
+        held[order.symbol] = held.get(order.symbol, 0) + sign * order.qty
+        assert cash >= 0
+    # equity 2500: AAA sold out, 1250 of each target in whole shares.
+    assert held == {"AAA": 0, "BBB": 25, "CCC": 50}
+    assert isinstance(orders[0], MarketSell) and orders[0].symbol == "AAA"
+
+
+def test_rebalance_orders_skip_unpriced_and_small_trades():
+    portfolio = _portfolio(100.0, AAA=10, BBB=10)
+    prices = pd.Series({"AAA": 10.0, "CCC": 1.0})
+    weights = pd.Series({"AAA": 0.25, "CCC": 0.5})
+    orders = rebalance_orders(portfolio, weights, prices, min_trade_value=60.0)
+    # equity 200 (BBB has no price and is left alone): selling 5 AAA is only worth 50 < 60.
+    assert [(o.symbol, o.qty) for o in orders] == [("CCC", 100)]
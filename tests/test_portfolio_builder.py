@@ -0,0 +1,29 @@
+import pytest
+from sdk.data.providers import SyntheticProvider
+from sdk.entities.portfolio import Portfolio, PortfolioBuilder
+from sdk.misc.enums import StockPool
+
+
+@pytest.fixture
+def builder():
+    portfolio = Portfolio("Test", load_local=False)
+    return PortfolioBuilder(
+        portfolio, StockPool.SNP500, provider=SyntheticProvider(n_symbols=20)
+    )
+
+
+def test_empty_filter_raises_instead_of_using_every_company(builder):
+    builder.filter_by(sector="No Such Sector")
+    with pytest.raises(ValueError, match="No constituents match"):
+        builder.fetch_new_stock()
+    with pytest.raises(ValueError, match="No constituents match"):
+        builder.target_weights()
+
+
+def test_filter_restricts_picks(builder):
+    sector = builder.universe.unique("sector")[0]
+    builder.filter_by(sector=sector)
+    for _ in range(10):
+        assert builder.fetch_new_stock().company.sector == sector
+    builder.drop_filter()
+    assert len(builder.candidates()) == len(builder.companies)
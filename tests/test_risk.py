@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from sdk.analytics.risk import (
+    EWMACovariance,
+    RollingCovariance,
+    load_covariance,
+    refresh_covariance,
+    returns_panel,
+)
+
+
+def _close(n_dates=120):
+    dates = pd.bdate_range("2022-01-03", periods=n_dates, tz="America/New_York")
+    rng = np.random.default_rng(0)
+    prices = 100 * np.cumprod(1 + rng.normal(0, 0.01, (n_dates, 4)), axis=0)
+    return pd.DataFrame(prices, index=dates, columns=["AAA", "BBB", "CCC", "DDD"])
+
+
+def test_refresh_updates_saved_state_with_new_days(tmp_path):
+    close = _close()
+    path = str(tmp_path / "covariance.npz")
+    refresh_covariance(close.iloc[:100], path=path, halflife=20)
+    updated = refresh_covariance(close, path=path, halflife=20)
+    assert updated.last_date == close.index[-1]
+    expected = EWMACovariance.from_returns(returns_panel(close), halflife=20)
+    np.testing.assert_allclose(updated.values, expected.values, rtol=1e-10)
+    np.testing.assert_allclose(load_covariance(path).values, expected.values)
+
+
+def test_refresh_keeps_a_rolling_state_and_reseeds_on_new_symbols(tmp_path):
+    close = _close()
+    path = str(tmp_path / "covariance.npz")
+    RollingCovariance.from_returns(returns_panel(close.iloc[:100]), window=60).save(
+        path
+    )
+    updated = refresh_covariance(close, path=path)
+    assert isinstance(updated, RollingCovariance)
+    expected = RollingCovariance.from_returns(returns_panel(close), window=60)
+    np.testing.assert_allclose(updated.values, expected.values, rtol=1e-10)
+
+    reseeded = refresh_covariance(close.drop(columns="DDD"), path=path)
+    assert isinstance(reseeded, EWMACovariance)
+    assert reseeded.symbols == ["AAA", "BBB", "CCC"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sdk.data import storage
+from sdk.data.storage import MARKET_TZ, CsvStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CsvStore(str(tmp_path))
+
+
+@pytest.fixture
+def bars():
+    dates = pd.bdate_range("2022-01-03", periods=3, tz=MARKET_TZ, name="Date")
+    return pd.DataFrame(
+        {"Open": [1.0, 2, 3], "Close": [1.5, 2.5, 3.5], "Volume": [10.0, 20, 30]},
+        index=dates,
+    )
+
+
+@pytest.mark.parametrize("content", ["", "   \n\n", "Date,Open,Close,Volume\n"])
+def test_last_date_without_rows(store, content):
+    with open(store.path("AAPL"), "w") as csv:
+        csv.write(content)
+    assert store.last_date("AAPL") is None
+
+
+def test_last_date(store, bars):
+    store.save("AAPL", bars)
+    assert store.last_date("AAPL") == bars.index[-1]
+    assert store.last_date("MSFT") is None
+
+
+def test_append_to_empty_file_writes_header(store, bars):
+    open(store.path("AAPL"), "w").close()
+    store.save("AAPL", bars, append=True)
+    loaded = store.load("AAPL")
+    assert list(loaded.columns) == list(bars.columns)
+    assert np.allclose(loaded.to_numpy(), bars.to_numpy())
+
+
+def test_empty_parquet_store_is_filled_from_csv(tmp_path, monkeypatch, bars):
+    monkeypatch.setitem(storage.cfg, "TICKER_DATA_PATH", str(tmp_path / "csv"))
+    monkeypatch.setitem(storage.cfg, "PARQUET_DATA_PATH", str(tmp_path / "parquet"))
+    (tmp_path / "csv").mkdir()
+    CsvStore(str(tmp_path / "csv")).save("AAPL", bars)
+    storage._get_store.cache_clear()
+    try:
+        parquet = storage.get_store("parquet")
+        assert parquet.symbols() == ["AAPL"]
+        np.testing.assert_allclose(
+            parquet.load("AAPL")["Close"].to_numpy(), bars["Close"].to_numpy()
+        )
+    finally:
+        storage._get_store.cache_clear()
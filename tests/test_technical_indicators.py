@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+from sdk.factors.technical_indicators import TechnicalIndicators
+
+
+def _bars(close):
+    close = pd.Series(close, index=pd.bdate_range("2022-01-03", periods=len(close)))
+    return pd.DataFrame({"High": close + 1, "Low": close - 1, "Close": close})
+
+
+def test_adx_is_high_in_a_trend_and_low_in_a_range():
+    trend = TechnicalIndicators.adx(_bars(np.linspace(100, 200, 120)))
+    choppy = TechnicalIndicators.adx(_bars(100 + 2 * (-1.0) ** np.arange(120)))
+    assert trend.name == "adx"
+    assert trend.between(0, 100).all() and choppy.between(0, 100).all()
+    assert trend.iloc[-1] > 90
+    assert choppy.iloc[-1] < 20
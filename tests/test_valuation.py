@@ -0,0 +1,73 @@
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from sdk.analytics.valuation import PortfolioValuation
+from sdk.data.storage import MARKET_TZ
+from sdk.entities.asset import Holding
+from sdk.entities.transaction import MarketBuy, MarketSell
+
+
+def make_portfolio(transactions, free_cash):
+    holdings = {}
+    for t in transactions:
+        qty = t.qty if isinstance(t, MarketBuy) else -t.qty
+        holding = holdings.setdefault(
+            t.symbol, Holding(t.symbol, date_purchased=t.date)
+        )
+        holding.qty_owned += qty
+    return SimpleNamespace(
+        name="Test",
+        transaction_history=transactions,
+        holdings={s: h for s, h in holdings.items() if h.qty_owned},
+        free_cash=free_cash,
+    )
+
+
+@pytest.fixture
+def close():
+    dates = pd.bdate_range("2022-01-03", periods=5, tz=MARKET_TZ)
+    return pd.DataFrame(
+        {"AAPL": [100.0, 101, 102, 103, 104], "MSFT": [200.0, 202, 204, 206, 208]},
+        index=dates,
+    )
+
+
+def test_trade_after_last_close_is_valued_at_last_close(close):
+    transactions = [
+        MarketBuy(datetime(2022, 1, 4, 10), "AAPL", price=101.0, qty=10),
+        # traded after the last stored bar (2022-01-07), e.g. today before the nightly refresh.
+        MarketBuy(datetime(2022, 1, 11, 10), "MSFT", price=210.0, qty=5),
+    ]
+    portfolio = make_portfolio(transactions, free_cash=10_000.0)
+    valuation = PortfolioValuation.from_portfolio(portfolio, close=close)
+    assert valuation.dates[-1].date() == datetime(2022, 1, 11).date()
+    assert valuation.positions.iloc[-1].to_dict() == {"AAPL": 10, "MSFT": 5}
+    assert valuation.cash.iloc[-1] == pytest.approx(10_000.0)
+    assert valuation.equity.iloc[-1] == pytest.approx(10_000.0 + 10 * 104 + 5 * 208)
+
+
+def test_symbol_without_closes_is_marked_at_fill_price(close):
+    transactions = [MarketBuy(datetime(2022, 1, 11, 10), "NVDA", price=50.0, qty=4)]
+    portfolio = make_portfolio(transactions, free_cash=800.0)
+    valuation = PortfolioValuation.from_portfolio(
+        portfolio, close=close.assign(NVDA=np.nan)
+    )
+    assert valuation.equity.iloc[-1] == pytest.approx(1_000.0)
+
+
+def test_empty_close(close):
+    empty = close.iloc[:0]
+    valuation = PortfolioValuation.from_portfolio(
+        make_portfolio([], free_cash=500.0), close=empty
+    )
+    assert len(valuation.dates) == 0 and len(valuation.equity) == 0
+    transactions = [
+        MarketBuy(datetime(2022, 1, 3, 10), "AAPL", price=100.0, qty=2),
+        MarketSell(datetime(2022, 1, 4, 10), "AAPL", price=110.0, qty=1),
+    ]
+    valuation = PortfolioValuation.from_portfolio(
+        make_portfolio(transactions, free_cash=410.0), close=empty
+    )
+    assert valuation.equity.iloc[-1] == pytest.approx(410.0 + 110.0)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sdk.backtest.vectorized import WeightBacktester
+
+
+@pytest.fixture
+def close():
+    dates = pd.bdate_range("2022-01-03", periods=60, tz="America/New_York")
+    rng = np.random.default_rng(0)
+    prices = 100 * np.cumprod(1 + rng.normal(0, 0.01, (60, 3)), axis=0)
+    return pd.DataFrame(prices, index=dates, columns=["AAA", "BBB", "CCC"])
+
+
+def test_naive_and_utc_rebalance_dates_match_market_dates(close):
+    weights = pd.DataFrame(
+        [[0.5, 0.5, 0.0], [0.0, 0.5, 0.5]],
+        index=close.index[[0, 30]],
+        columns=close.columns,
+    )
+    backtester = WeightBacktester(close)
+    expected = backtester.run(weights).equity
+    for index in (weights.index.tz_localize(None), weights.index.tz_convert("UTC")):
+        result = backtester.run(weights.set_axis(index, axis=0))
+        pd.testing.assert_series_equal(result.equity, expected)
+
+
+def test_aware_rebalance_dates_on_naive_prices(close):
+    naive = close.set_axis(close.index.tz_localize(None), axis=0)
+    weights = pd.DataFrame(
+        [[1.0, 0.0, 0.0]], index=close.index[:1], columns=close.columns
+    )
+    result = WeightBacktester(naive).run(weights)
+    np.testing.assert_allclose(
+        result.equity.to_numpy(),
+        1_00_000.00 * naive["AAA"].to_numpy() / naive["AAA"].iloc[0],
+    )